@@ -0,0 +1,229 @@
+"""Capacity-aware assignment of candidates to internship seats.
+
+Each candidate takes at most one seat and each internship at most its
+remaining capacity. Optional reservation quotas set aside a fraction of every
+internship's seats for a category/district_type group; reserved seats left
+unfilled are released to everyone in a final pass.
+
+The "stable" method assigns shortlist edges greedily in descending score
+order. The "optimal" method seats as many candidates as possible, then
+maximizes the total score, by min-cost flow: candidates send one unit each
+over their shortlist edges to one node per (internship, seat bucket), which
+passes on up to its seat count to the sink, so the work grows with the edges
+and not with the seats. A max flow gives the most candidates that can be
+seated; the rest go to a dummy bucket, and the cheapest flow placing everyone
+seats that many with the best total. Scores are rounded to thousandths, so
+costs are exact integers and the flow is solved by cost scaling: each phase
+raises node potentials by a Dijkstra from the nodes with excess and pushes a
+max flow over the zero reduced-cost arcs.
+"""
+import math
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from batch_kernels import BatchInputs
+
+
+class AllocationEngine:
+    """Capacity-aware assignment of candidates to internship seats"""
+
+    METHODS = ("stable", "optimal")
+
+    def __init__(self, shortlists: Callable[..., Tuple[np.ndarray, np.ndarray, np.ndarray]]):
+        # BatchMatchingEngine.shortlists: (candidate position, industry position, score) arrays
+        self.shortlists = shortlists
+
+    @staticmethod
+    def seat_buckets(industry: Dict[str, Any],
+                     quotas: Dict[str, Dict[str, float]]) -> Dict[Optional[Tuple[str, str]], int]:
+        """Split an internship's open seats into reserved buckets and an open (None) bucket"""
+        available = max(industry.get("internship_capacity", 0) - industry.get("filled_positions", 0), 0)
+        buckets: Dict[Optional[Tuple[str, str]], int] = {}
+        reserved = 0
+        for field, shares in quotas.items():
+            for value, share in shares.items():
+                seats = int(math.floor(share * available + 1e-9))
+                if seats > 0:
+                    buckets[(field, value)] = seats
+                    reserved += seats
+        buckets[None] = available - reserved
+        return buckets
+
+    @staticmethod
+    def _take_seat(candidate: Dict[str, Any], buckets: Dict[Optional[Tuple[str, str]], int]) -> Optional[str]:
+        """Take an open seat if any, else a reserved seat the candidate is eligible for"""
+        if buckets[None] > 0:
+            buckets[None] -= 1
+            return "open"
+        for key, seats in buckets.items():
+            if key is not None and seats > 0 and candidate.get(key[0]) == key[1]:
+                buckets[key] -= 1
+                return f"{key[0]}:{key[1]}"
+        return None
+
+    @classmethod
+    def _greedy(cls, candidates, edges, buckets, assignment) -> None:
+        """Assign edges in descending score order while both sides have room
+
+        With a shared pair score this yields the stable matching: no unmatched
+        candidate-internship pair both prefer each other over their assignment.
+        """
+        c_idx, i_idx, scores = edges
+        for e in np.lexsort((i_idx, c_idx, -scores)):
+            c, i = int(c_idx[e]), int(i_idx[e])
+            if c in assignment:
+                continue
+            seat = cls._take_seat(candidates[c], buckets[i])
+            if seat is not None:
+                assignment[c] = (i, float(scores[e]), seat)
+
+    @classmethod
+    def _optimal(cls, candidates, edges, buckets, assignment) -> None:
+        """Maximize assigned candidates, then total score, by min-cost flow (see the module docstring)"""
+        c_idx, i_idx, scores = edges
+        n = len(candidates)
+        # Bucket nodes n..n+B-1, per quota key (None is the open bucket) and internship
+        keys = list(dict.fromkeys(key for industry_buckets in buckets for key in industry_buckets))
+        node_keys: List[Tuple[int, Optional[Tuple[str, str]]]] = []
+        seats: List[int] = []
+        e_c, e_node, e_q = [], [], []
+        q_idx = np.rint(np.asarray(scores) * 1000).astype(np.int64)
+        for key in keys:
+            node_of = np.full(len(buckets), -1, dtype=np.int64)
+            for i, industry_buckets in enumerate(buckets):
+                if industry_buckets.get(key, 0) > 0:
+                    node_of[i] = n + len(node_keys)
+                    node_keys.append((i, key))
+                    seats.append(industry_buckets[key])
+            keep = node_of[i_idx] >= 0
+            if key is not None:
+                eligible = np.array([candidate.get(key[0]) == key[1] for candidate in candidates], dtype=bool)
+                keep &= eligible[c_idx]
+            e_c.append(c_idx[keep])
+            e_node.append(node_of[i_idx[keep]])
+            e_q.append(q_idx[keep])
+        e_c, e_node, e_q = np.concatenate(e_c), np.concatenate(e_node), np.concatenate(e_q)
+        if not len(e_c):
+            return
+
+        # Imported here, off the startup path (main.warm_up() preloads it)
+        from scipy import sparse
+        from scipy.sparse.csgraph import dijkstra, maximum_flow
+
+        # Every candidate also has an edge to the dummy bucket, which holds the unseated
+        n_buckets = len(node_keys) + 1
+        sink = n + n_buckets
+        size = sink + 3
+        capacity = np.asarray(seats + [n - cls._max_seated(n, e_c, e_node, seats)], dtype=np.int64)
+        tail = np.concatenate([e_c, np.arange(n)])
+        head = np.concatenate([e_node, np.full(n, sink - 1)])
+        gain = np.concatenate([e_q, np.zeros(n, dtype=np.int64)])
+        n_edges = len(tail)
+        bucket_nodes = np.arange(n, sink)
+        supply = np.zeros(size, dtype=np.int64)
+        supply[:n] = 1
+        supply[sink] = -n
+
+        # used[e]: edge e carries its candidate; filled[b]: flow from bucket b to the sink
+        used = np.zeros(n_edges, dtype=bool)
+        filled = np.zeros(n_buckets, dtype=np.int64)
+        potential = np.zeros(size, dtype=np.int64)
+        top_shift = max(int(gain.max()).bit_length() - 4, 0)
+        for shift in range(top_shift, -1, -1):
+            cost = gain >> shift
+            if shift == top_shift:
+                potential[n:sink + 1] = -int(cost.max())
+            else:
+                # Double the potentials and saturate every arc whose reduced cost went negative
+                potential *= 2
+                reduced = potential[tail] - potential[head] - cost
+                used = (used & (reduced <= 0)) | (reduced < 0)
+                reduced = potential[bucket_nodes] - potential[sink]
+                filled = np.where(reduced < 0, capacity, np.where(reduced > 0, 0, filled))
+            while True:
+                excess = supply - np.bincount(tail[used], minlength=size) + np.bincount(head[used], minlength=size)
+                excess[n:sink] -= filled
+                excess[sink] += filled.sum()
+                sources = np.flatnonzero(excess > 0)
+                if not len(sources):
+                    break
+                deficits = np.flatnonzero(excess < 0)
+                
+                # Residual arcs: unused edges forward, used edges back, then bucket <-> sink
+                up, down = np.flatnonzero(filled < capacity), np.flatnonzero(filled > 0)
+                arc_from = np.concatenate([np.where(used, head, tail), bucket_nodes[up], np.full(len(down), sink)])
+                arc_to = np.concatenate([np.where(used, tail, head), np.full(len(up), sink), bucket_nodes[down]])
+                arc_cost = np.concatenate([np.where(used, cost, -cost), np.zeros(len(up) + len(down), dtype=np.int64)])
+                graph = sparse.csr_matrix(((arc_cost + potential[arc_from] - potential[arc_to]).astype(np.float64),
+                                           (arc_from, arc_to)), shape=(size, size))
+                distance = dijkstra(graph, indices=sources, min_only=True)
+                potential += np.rint(np.minimum(distance, distance[deficits].min())).astype(np.int64)
+                
+                # Push as much as fits from the excess to the deficits along zero reduced-cost arcs
+                tight = np.flatnonzero(arc_cost + potential[arc_from] - potential[arc_to] == 0)
+                arc_capacity = np.concatenate([np.ones(n_edges, dtype=np.int64), (capacity - filled)[up], filled[down]])
+                network = sparse.csr_matrix((
+                    np.concatenate([excess[sources], arc_capacity[tight], -excess[deficits]]).astype(np.int32),
+                    (np.concatenate([np.full(len(sources), size - 2), arc_from[tight], deficits]),
+                     np.concatenate([sources, arc_to[tight], np.full(len(deficits), size - 1)]))
+                ), shape=(size, size))
+                flow = maximum_flow(network, size - 2, size - 1).flow.tocsr()
+                pushed = np.asarray(flow[arc_from[tight], arc_to[tight]]).ravel()
+                arcs, pushed = tight[pushed > 0], pushed[pushed > 0]
+                used[arcs[arcs < n_edges]] ^= True
+                raised = (arcs >= n_edges) & (arcs < n_edges + len(up))
+                lowered = arcs >= n_edges + len(up)
+                np.add.at(filled, up[arcs[raised] - n_edges], pushed[raised])
+                np.subtract.at(filled, down[arcs[lowered] - n_edges - len(up)], pushed[lowered])
+
+        score_of = {(c, i): s for c, i, s in zip(c_idx.tolist(), i_idx.tolist(), scores.tolist())}
+        for c, node in zip(tail[used].tolist(), head[used].tolist()):
+            if node == sink - 1:
+                continue
+            i, key = node_keys[node - n]
+            buckets[i][key] -= 1
+            assignment[c] = (i, score_of[(c, i)], "open" if key is None else f"{key[0]}:{key[1]}")
+
+    @staticmethod
+    def _max_seated(n: int, e_c: np.ndarray, e_node: np.ndarray, seats: List[int]) -> int:
+        """Most candidates that can be seated at once: a max flow source -> candidate -> bucket -> sink"""
+        from scipy import sparse
+        from scipy.sparse.csgraph import maximum_flow
+        b = len(seats)
+        sink = n + b + 1
+        graph = sparse.csr_matrix((
+            np.concatenate([np.ones(n + len(e_c), dtype=np.int32), np.asarray(seats, dtype=np.int32)]),
+            (np.concatenate([np.zeros(n, dtype=np.int64), e_c + 1, np.arange(n + 1, sink)]),
+             np.concatenate([np.arange(1, n + 1), e_node + 1, np.full(b, sink)]))
+        ), shape=(sink + 1, sink + 1))
+        return int(maximum_flow(graph, 0, sink).flow_value)
+
+    def allocate(self, candidates: List[Dict[str, Any]], industries: List[Dict[str, Any]],
+                 inputs: Optional[BatchInputs], method: str = "stable", min_score_threshold: float = 0.3,
+                 shortlist_size: int = 20, quotas: Optional[Dict[str, Dict[str, float]]] = None,
+                 cancel: Optional[threading.Event] = None,
+                 progress: Optional[Callable[[int], None]] = None) -> Dict[int, Tuple[int, float, str]]:
+        """Assign candidates to seats, scored from ``inputs`` (BatchMatchingEngine.prepare of both);
+        returns candidate position -> (industry position, score, seat type)"""
+        if not candidates or not industries:
+            return {}
+        quotas = quotas or {}
+        buckets = [self.seat_buckets(industry, quotas) for industry in industries]
+        edges = self.shortlists(inputs, shortlist_size, min_score_threshold, cancel, progress)
+        assignment: Dict[int, Tuple[int, float, str]] = {}
+
+        if method == "optimal":
+            self._optimal(candidates, edges, buckets, assignment)
+        else:
+            self._greedy(candidates, edges, buckets, assignment)
+
+        # Release unfilled reserved seats and fill them from the remaining shortlists
+        if quotas:
+            for industry_buckets in buckets:
+                for key in [k for k in industry_buckets if k is not None]:
+                    industry_buckets[None] += industry_buckets.pop(key)
+            self._greedy(candidates, edges, buckets, assignment)
+
+        return assignment
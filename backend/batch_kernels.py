@@ -0,0 +1,194 @@
+"""Numeric kernels for vectorized all-pairs scoring.
+
+BatchInputs holds every per-record array the scorer needs, already encoded
+by BatchMatchingEngine.prepare. The functions here only do NumPy/SciPy work
+on those arrays and import nothing from the API module, so shards can run in
+worker threads or in separate processes. Shards in other processes are
+cancelled through a SharedCancelFlag, which they poll between blocks like a
+threading.Event.
+"""
+import threading
+from dataclasses import dataclass, replace
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from scipy import sparse
+
+
+# Overall score weights: skills, location, qualification, sector, base, affirmative bonus, experience penalty
+Weights = Tuple[float, float, float, float, float, float, float]
+DEFAULT_WEIGHTS: Weights = (0.35, 0.20, 0.15, 0.15, 0.15, 1.0, 1.0)
+
+
+class MatchCancelled(Exception):
+    """Raised inside a scoring loop once its cancel event has been set"""
+
+
+class SharedCancelFlag:
+    """A cancel event that worker processes can poll: one byte of shared memory
+
+    Pickles to the name of the segment; copies attach to it on first use. The
+    creating process sets and closes it; once it has been closed, copies
+    read it as set.
+    """
+
+    def __init__(self, name: Optional[str] = None):
+        self._owner = name is None
+        self._memory = shared_memory.SharedMemory(create=True, size=1) if self._owner else None
+        self.name = self._memory.name if self._owner else name
+
+    def __reduce__(self):
+        return SharedCancelFlag, (self.name,)
+
+    def set(self) -> None:
+        if self._memory is not None:
+            self._memory.buf[0] = 1
+
+    def is_set(self) -> bool:
+        if self._memory is None:
+            try:
+                self._memory = shared_memory.SharedMemory(self.name)
+            except FileNotFoundError:
+                return True
+        return self._memory.buf[0] == 1
+
+    def close(self) -> None:
+        """Detach; the creating process also removes the segment"""
+        if self._memory is not None:
+            self._memory.close()
+            if self._owner:
+                self._memory.unlink()
+            self._memory = None
+
+
+# Anything scoring loops can poll for cancellation
+CancelFlag = Union[threading.Event, SharedCancelFlag]
+
+
+@dataclass
+class BatchInputs:
+    """Encoded candidate-side rows and internship-side columns for one scoring run"""
+    # Candidate side: one row per candidate
+    c_skills: "sparse.csr_matrix"          # normalized TF-IDF rows
+    location_scores: np.ndarray            # candidate x distinct location
+    sector_scores: np.ndarray              # candidate x distinct sector
+    c_quals: "sparse.csr_matrix"           # candidate x distinct qualification
+    bonus: np.ndarray                      # affirmative bonus
+    penalty: np.ndarray                    # experience penalty
+    fallback_rows: np.ndarray              # rows whose skills have no TF-IDF tokens
+    fallback_scores: np.ndarray            # Jaccard of fallback_rows x fallback_cols
+    # Internship side: one column per internship
+    i_skills_t: "sparse.csr_matrix"
+    location_codes: np.ndarray
+    sector_codes: np.ndarray
+    exact_by_industry: np.ndarray          # distinct qualification x internship
+    keyword_by_industry: np.ndarray
+    no_qual_pref: np.ndarray
+    fallback_cols: np.ndarray
+    # Position of row 0 in the full candidate list
+    offset: int = 0
+
+    @property
+    def n_rows(self) -> int:
+        return self.c_skills.shape[0]
+
+    @property
+    def n_cols(self) -> int:
+        return len(self.location_codes)
+
+    def rows(self, start: int, stop: int) -> "BatchInputs":
+        """The same inputs restricted to candidate rows [start, stop)"""
+        keep = (self.fallback_rows >= start) & (self.fallback_rows < stop)
+        return replace(
+            self,
+            c_skills=self.c_skills[start:stop],
+            location_scores=self.location_scores[start:stop],
+            sector_scores=self.sector_scores[start:stop],
+            c_quals=self.c_quals[start:stop],
+            bonus=self.bonus[start:stop],
+            penalty=self.penalty[start:stop],
+            fallback_rows=self.fallback_rows[keep] - start,
+            fallback_scores=self.fallback_scores[keep],
+            offset=self.offset + start
+        )
+
+
+def iter_component_blocks(inputs: BatchInputs, block_cells: int, cancel: Optional[CancelFlag] = None
+                          ) -> Iterator[Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """Yield (first row of the block, skills, location, qualification, sector) block scores"""
+    n, m = inputs.n_rows, inputs.n_cols
+    if n == 0 or m == 0:
+        return
+
+    block = max(1, block_cells // m)
+    for start in range(0, n, block):
+        if cancel is not None and cancel.is_set():
+            raise MatchCancelled()
+        stop = min(start + block, n)
+        rows = slice(start, stop)
+
+        skills = (inputs.c_skills[rows] @ inputs.i_skills_t).toarray()
+        in_block = (inputs.fallback_rows >= start) & (inputs.fallback_rows < stop)
+        if in_block.any() and len(inputs.fallback_cols):
+            skills[np.ix_(inputs.fallback_rows[in_block] - start, inputs.fallback_cols)] = \
+                inputs.fallback_scores[in_block]
+
+        location = inputs.location_scores[rows][:, inputs.location_codes]
+        sector = inputs.sector_scores[rows][:, inputs.sector_codes]
+        block_quals = inputs.c_quals[rows]
+        exact = (block_quals @ inputs.exact_by_industry) > 0
+        keyword = block_quals @ inputs.keyword_by_industry
+        qualification = np.where(exact, 1.0, np.minimum(keyword * 0.3, 0.8))
+        qualification[:, inputs.no_qual_pref] = 0.5
+        yield start, skills, location, qualification, sector
+
+
+def weighted_overall(skills: np.ndarray, location: np.ndarray, qualification: np.ndarray, sector: np.ndarray,
+                     bonus: np.ndarray, penalty: np.ndarray, weights: Weights = DEFAULT_WEIGHTS) -> np.ndarray:
+    """Rounded overall scores of a block from its component scores and per-row bonus and penalty"""
+    w_skills, w_location, w_qualification, w_sector, w_base, w_bonus, w_penalty = weights
+    base = skills * w_skills + location * w_location + qualification * w_qualification + sector * w_sector + w_base
+    return np.round(np.minimum(base + (bonus * w_bonus - penalty * w_penalty)[:, None], 1.0), 3)
+
+
+def iter_score_blocks(inputs: BatchInputs, block_cells: int, cancel: Optional[CancelFlag] = None,
+                      weights: Weights = DEFAULT_WEIGHTS) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (global position of the block's first candidate, rounded overall scores)"""
+    for start, skills, location, qualification, sector in iter_component_blocks(inputs, block_cells, cancel):
+        rows = slice(start, start + skills.shape[0])
+        yield inputs.offset + start, weighted_overall(skills, location, qualification, sector,
+                                                      inputs.bonus[rows], inputs.penalty[rows], weights)
+
+
+def select_top(indices: np.ndarray, scores: np.ndarray, top_n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Keep the top_n scores; ties go to the lowest index, like a stable sort
+
+    ``indices`` must be ascending.
+    """
+    if len(scores) <= top_n:
+        return indices, scores
+    kth = np.partition(scores, len(scores) - top_n)[len(scores) - top_n]
+    above = scores > kth
+    ties = np.flatnonzero(scores == kth)[:top_n - int(above.sum())]
+    keep = np.flatnonzero(above)
+    keep = np.sort(np.concatenate([keep, ties]))
+    return indices[keep], scores[keep]
+
+
+def top_in_rows(inputs: BatchInputs, top_n: int, min_score_threshold: float, block_cells: int,
+                cancel: Optional[CancelFlag] = None,
+                weights: Weights = DEFAULT_WEIGHTS) -> Tuple[np.ndarray, np.ndarray]:
+    """Best pairs among the given rows as (flat candidate*m + industry index, score), ascending index"""
+    m = inputs.n_cols
+    best_idx = np.empty(0, dtype=np.int64)
+    best_scores = np.empty(0)
+    for start, overall in iter_score_blocks(inputs, block_cells, cancel, weights):
+        overall = overall.ravel()
+        hits = np.flatnonzero(overall >= min_score_threshold)
+        idx, scores = select_top(hits + start * m, overall[hits], top_n)
+        best_idx, best_scores = select_top(
+            np.concatenate([best_idx, idx]), np.concatenate([best_scores, scores]), top_n)
+    return best_idx, best_scores
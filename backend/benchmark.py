@@ -0,0 +1,274 @@
+"""Benchmark suite for the matching API on synthetic registries.
+
+Each scale runs in a fresh child process against an empty store. It
+bulk-loads synthetic candidates (plus internships at --internship-ratio)
+and then times every /match_internships mode, both /allocate methods, single
+registrations, /stats and the listings through the full ASGI stack. Each
+case reports throughput and p50/p99 latency, and each scale reports the
+child's peak memory. The match result cache is disabled so that matching
+cost is measured, not cache hits.
+
+    python benchmark.py --scales 1000 10000            # run and compare with the baseline
+    python benchmark.py --scales 1000 10000 --save-baseline
+    python benchmark.py --check                        # exit 1 on regression
+
+Baselines are machine specific; save one on the machine you compare on.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+DEFAULT_SCALES = [1_000, 10_000, 100_000, 1_000_000]
+# Pairs scored per all-pairs case before repeats are cut short
+ALL_PAIRS_BUDGET = 2e9
+
+
+def summarize(latencies: List[float], items: int, unit: str) -> Dict[str, Any]:
+    seconds = sum(latencies)
+    return {
+        "ops": len(latencies),
+        "seconds": round(seconds, 4),
+        "throughput": round(items / seconds, 2) if seconds > 0 else None,
+        "unit": unit,
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3)
+    }
+
+
+def timed(calls: int, call: Callable[[int], Any]) -> List[float]:
+    latencies = []
+    for i in range(calls):
+        started = time.perf_counter()
+        call(i)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def write_jsonl(path: str, records: Iterator[Dict[str, Any]]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def stream_file(path: str, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def run_scale(args: argparse.Namespace) -> Dict[str, Any]:
+    """Child process: benchmark one registry size and return the results"""
+    import main
+    from fastapi.testclient import TestClient
+    from synthetic import generate_candidates, generate_industries
+
+    n = args.worker
+    m = max(10, int(n * args.internship_ratio))
+    requests = args.requests
+    rng = random.Random(args.seed)
+    cases: Dict[str, Any] = {}
+
+    def check(response):
+        if response.status_code >= 400:
+            raise RuntimeError(f"{response.request.url}: {response.status_code} {response.text[:200]}")
+        return response
+
+    with tempfile.TemporaryDirectory() as workdir, TestClient(main.app) as client:
+        candidates_file = os.path.join(workdir, "candidates.jsonl")
+        industries_file = os.path.join(workdir, "industries.jsonl")
+        write_jsonl(candidates_file, generate_candidates(n, main.MatchingEngine.REGION_MAPPING, args.seed))
+        write_jsonl(industries_file, generate_industries(m, main.MatchingEngine.REGION_MAPPING, args.seed))
+
+        for case, path, count, url in (("register_bulk_candidates", candidates_file, n, "/register_candidates/bulk"),
+                                       ("register_bulk_industries", industries_file, m, "/register_industries/bulk")):
+            latencies = timed(1, lambda _: check(client.post(f"{url}?format=jsonl", content=stream_file(path))))
+            cases[case] = summarize(latencies, count, "records/s")
+
+        candidate_ids = list(main.candidates_db.keys())
+        industry_ids = list(main.industries_db.keys())
+
+        def match(body_for: Callable[[], Dict[str, Any]]) -> Callable[[int], Any]:
+            return lambda _: check(client.post("/match_internships", json=body_for()))
+
+        cases["match_candidate"] = summarize(timed(requests, match(
+            lambda: {"candidate_id": rng.choice(candidate_ids), "top_n": 10})), requests, "req/s")
+        cases["match_industry"] = summarize(timed(requests, match(
+            lambda: {"industry_id": rng.choice(industry_ids), "top_n": 10})), requests, "req/s")
+
+        pairs = len(candidate_ids) * len(industry_ids)
+        if pairs <= args.max_all_pairs:
+            calls = max(1, min(requests // 20, int(ALL_PAIRS_BUDGET // pairs)))
+            cases["match_all"] = summarize(timed(calls, match(lambda: {"top_n": 100})), calls * pairs, "pairs/s")
+            cases["allocate"] = summarize(
+                timed(1, lambda _: check(client.post("/allocate", json={"method": "stable"}))), pairs, "pairs/s")
+            cases["allocate_optimal"] = summarize(timed(1, lambda _: check(client.post("/allocate", json={
+                "method": "optimal", "reservation_quotas": {"category": {"SC": 0.15}}}))), pairs, "pairs/s")
+
+        generated = iter(generate_candidates(requests, main.MatchingEngine.REGION_MAPPING, args.seed + 1))
+        cases["register_candidate"] = summarize(
+            timed(requests, lambda _: check(client.post("/register_candidate", json=next(generated)))),
+            requests, "req/s")
+
+        cases["stats"] = summarize(timed(requests, lambda _: check(client.get("/stats"))), requests, "req/s")
+
+        def walk(url: str, params: Dict[str, Any]):
+            cursor = None
+
+            def call(_):
+                nonlocal cursor
+                page = check(client.get(url, params={**params, "cursor": cursor})).json()
+                cursor = page["next_cursor"]
+            return call
+
+        cases["list_candidates"] = summarize(
+            timed(requests, walk("/candidates", {"limit": 100})), requests, "req/s")
+        cases["list_candidates_filtered"] = summarize(
+            timed(requests, walk("/candidates", {"limit": 100, "category": "SC", "sector": "Finance"})),
+            requests, "req/s")
+        cases["list_industries"] = summarize(
+            timed(requests, walk("/industries", {"limit": 100})), requests, "req/s")
+
+    return {
+        "candidates": n,
+        "internships": m,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "cases": cases
+    }
+
+
+def run_child(scale: int, args: argparse.Namespace) -> Dict[str, Any]:
+    env = dict(os.environ)
+    env.update({
+        "PM_STORAGE_BACKEND": args.backend,
+        "PM_MATCH_CACHE_SIZE": "0",
+        "PM_MATCH_TIMEOUT_SECONDS": str(args.timeout)
+    })
+    with tempfile.TemporaryDirectory() as workdir:
+        env["PM_SQLITE_PATH"] = os.path.join(workdir, "benchmark.db")
+        command = [sys.executable, os.path.abspath(__file__), "--worker", str(scale),
+                   "--requests", str(args.requests), "--internship-ratio", str(args.internship_ratio),
+                   "--max-all-pairs", str(args.max_all_pairs), "--seed", str(args.seed)]
+        completed = subprocess.run(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                   stdout=subprocess.PIPE, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions beyond the tolerance: slower p50/p99, lower throughput or more peak memory"""
+    regressions = []
+    for scale, current in results.items():
+        base = baseline.get("results", {}).get(scale)
+        if base is None:
+            continue
+        if current["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{scale}: peak memory {base['peak_rss_mb']} -> {current['peak_rss_mb']} MB")
+        for case, now in current["cases"].items():
+            before = base["cases"].get(case)
+            if before is None:
+                continue
+            for metric in ("p50_ms", "p99_ms"):
+                # Ignore sub-millisecond noise on very fast cases
+                if now[metric] > before[metric] * (1 + tolerance) and now[metric] - before[metric] > 1.0:
+                    regressions.append(f"{scale}/{case}: {metric} {before[metric]} -> {now[metric]}")
+            if before["throughput"] and now["throughput"] and \
+                    now["throughput"] < before["throughput"] / (1 + tolerance):
+                regressions.append(f"{scale}/{case}: throughput {before['throughput']} -> {now['throughput']} "
+                                   f"{now['unit']}")
+    return regressions
+
+
+def print_report(results: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    for scale, result in results.items():
+        base = (baseline or {}).get("results", {}).get(scale, {}).get("cases", {})
+        print(f"\n{result['candidates']:,} candidates x {result['internships']:,} internships, "
+              f"peak RSS {result['peak_rss_mb']} MB")
+        print(f"  {'case':<26}{'throughput':>16} {'unit':<10}{'p50 ms':>10}{'p99 ms':>10}{'vs baseline':>13}")
+        for case, stats in result["cases"].items():
+            delta = ""
+            if case in base and base[case]["p50_ms"]:
+                delta = f"{(stats['p50_ms'] / base[case]['p50_ms'] - 1) * 100:+.0f}% p50"
+            print(f"  {case:<26}{stats['throughput'] or 0:>16,.1f} {stats['unit']:<10}"
+                  f"{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}{delta:>13}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="candidate counts")
+    parser.add_argument("--internship-ratio", type=float, default=0.05, help="internships per candidate")
+    parser.add_argument("--requests", type=int, default=200, help="requests per latency case")
+    parser.add_argument("--backend", choices=("memory", "sqlite"), default="memory")
+    parser.add_argument("--max-all-pairs", type=float, default=1e9,
+                        help="skip all-pairs matching and allocation above this many pairs")
+    parser.add_argument("--timeout", type=float, default=3600, help="PM_MATCH_TIMEOUT_SECONDS for the run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 on regressions")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(run_scale(args)))
+        return 0
+
+    results = {}
+    for scale in args.scales:
+        print(f"Benchmarking {scale:,} candidates...", file=sys.stderr)
+        results[str(scale)] = run_child(scale, args)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    if baseline and baseline.get("meta", {}).get("backend") != args.backend:
+        baseline = None
+    print_report(results, baseline)
+
+    document = {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "backend": args.backend,
+            "requests": args.requests,
+            "internship_ratio": args.internship_ratio,
+            "seed": args.seed
+        },
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    regressions = compare(results, baseline, args.tolerance) if baseline else []
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    if args.save_baseline:
+        if baseline:
+            # Keep baseline scales that weren't re-run
+            document["results"] = {**baseline.get("results", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
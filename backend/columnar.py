@@ -0,0 +1,826 @@
+"""Compact column-oriented record storage.
+
+ColumnStore keeps a table's records as typed columns instead of one dict per
+record: enum-like fields as integer codes, numbers and flags in NumPy arrays,
+timestamps as integer microseconds, free text as UTF-8 in one growing buffer,
+and string lists (skills, qualifications, ...) as ids into a Vocabulary shared
+by the tables of a store. Records are rebuilt as dicts only when read. Values
+a column can't encode, and fields outside the schema, are kept as-is on the
+side, so a record always reads back equal to what was written.
+
+ColumnStore.frozen() gives a read-only copy of a store as of one moment that
+shares its arrays; the first in-place write to a shared array afterwards
+copies it, so frozen copies are cheap to take and never see later writes.
+
+RecordColumns hands a set of records to the vectorized scorer column by
+column: StoreColumns reads a ColumnStore's arrays directly, DictColumns
+encodes a list of plain dict records on the fly.
+"""
+import copy
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Record = Dict[str, Any]
+# (field name, column kind); kinds are the keys of COLUMN_KINDS plus "id"
+Schema = Sequence[Tuple[str, str]]
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return "MISSING"
+
+    def __reduce__(self) -> str:
+        # Unpickle as the module singleton so identity checks keep working
+        return "MISSING"
+
+
+# Value of a field the record doesn't have
+MISSING: Any = _Missing()
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+class Vocabulary:
+    """Interned strings numbered in order of first use"""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def id(self, value: str) -> int:
+        token = self._ids.get(value)
+        if token is None:
+            token = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return token
+
+
+class _Growable:
+    """NumPy array appended to one element at a time, with amortized doubling
+
+    Appends only write past the current size, so views of the contents stay
+    valid; in-place writes copy the array first once it has been shared.
+    """
+
+    def __init__(self, dtype, capacity: int = 16):
+        self._data = np.zeros(capacity, dtype=dtype)
+        self.size = 0
+        self._shared = False
+
+    @classmethod
+    def wrap(cls, data: np.ndarray) -> "_Growable":
+        """Adopt an existing array, e.g. a memory-mapped one, as the full contents"""
+        growable = cls.__new__(cls)
+        growable._data = data
+        growable.size = len(data)
+        growable._shared = False
+        return growable
+
+    def share(self) -> "_Growable":
+        """A fixed-size copy of the current contents without copying the data"""
+        self._shared = True
+        return _Growable.wrap(self.view())
+
+    def append(self, value) -> None:
+        if self.size == len(self._data):
+            grown = np.zeros(max(len(self._data) * 2, 16), dtype=self._data.dtype)
+            grown[:self.size] = self._data
+            self._data = grown
+        self._data[self.size] = value
+        self.size += 1
+
+    def extend(self, values: np.ndarray) -> None:
+        needed = self.size + len(values)
+        if needed > len(self._data):
+            grown = np.zeros(max(needed, len(self._data) * 2), dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:needed] = values
+        self.size = needed
+
+    def view(self) -> np.ndarray:
+        return self._data[:self.size]
+
+    def __getitem__(self, index):
+        return self._data[index]
+
+    def __setitem__(self, index, value) -> None:
+        if self._shared:
+            self._data = self._data.copy()
+            self._shared = False
+        self._data[index] = value
+
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+
+class Column(ABC):
+    """One field of every row; values the encoding can't hold go to ``overflow``"""
+
+    def __init__(self):
+        self.overflow: Dict[int, Any] = {}
+
+    @abstractmethod
+    def _append_encoded(self, value: Any) -> bool:
+        """Append the encoded value, or a placeholder and False if it can't be encoded"""
+
+    @abstractmethod
+    def _set_encoded(self, row: int, value: Any) -> bool:
+        ...
+
+    @abstractmethod
+    def _get_encoded(self, row: int) -> Any:
+        ...
+
+    def append(self, value: Any) -> None:
+        row = self._size()
+        if not self._append_encoded(value):
+            self.overflow[row] = value
+
+    def set(self, row: int, value: Any) -> None:
+        if self._set_encoded(row, value):
+            self.overflow.pop(row, None)
+        else:
+            self.overflow[row] = value
+
+    def get(self, row: int) -> Any:
+        if self.overflow and row in self.overflow:
+            return self.overflow[row]
+        return self._get_encoded(row)
+
+    @abstractmethod
+    def _size(self) -> int:
+        ...
+
+    def nbytes(self) -> int:
+        return 0
+
+    def frozen(self) -> "Column":
+        """Read-only copy of the column as it is now, sharing its arrays"""
+        column = copy.copy(self)
+        for name, value in vars(self).items():
+            if isinstance(value, _Growable):
+                setattr(column, name, value.share())
+        column.overflow = dict(self.overflow)
+        return column
+
+    def export(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """(arrays, remaining attributes) for a snapshot"""
+        arrays: Dict[str, np.ndarray] = {}
+        attributes: Dict[str, Any] = {}
+        for name, value in vars(self).items():
+            if isinstance(value, _Growable):
+                arrays[name] = value.view()
+            else:
+                attributes[name] = value
+        return arrays, attributes
+
+    @classmethod
+    def restore(cls, arrays: Dict[str, np.ndarray], attributes: Dict[str, Any]) -> "Column":
+        """Rebuild an exported column around its (possibly memory-mapped) arrays"""
+        column = cls.__new__(cls)
+        vars(column).update(attributes)
+        for name, array in arrays.items():
+            setattr(column, name, _Growable.wrap(array))
+        return column
+
+
+class CategoryColumn(Column):
+    """Low-cardinality scalars as int32 codes into the distinct values; code 0 is MISSING"""
+
+    def __init__(self):
+        super().__init__()
+        self.values: List[Any] = [MISSING]
+        # Keyed by (type, value) so that 1, 1.0 and True stay distinct
+        self._codes: Dict[Tuple[type, Any], int] = {}
+        self.codes = _Growable(np.int32)
+
+    def code_of(self, value: Any) -> int:
+        """Code of a value, or -1 if no row has ever held it"""
+        try:
+            return self._codes.get((type(value), value), -1)
+        except TypeError:
+            return -1
+
+    def _encode(self, value: Any) -> Optional[int]:
+        if value is MISSING:
+            return 0
+        if type(value) not in (str, int, float, bool, type(None)):
+            return None
+        key = (type(value), value)
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def _append_encoded(self, value: Any) -> bool:
+        code = self._encode(value)
+        self.codes.append(0 if code is None else code)
+        return code is not None
+
+    def _set_encoded(self, row: int, value: Any) -> bool:
+        code = self._encode(value)
+        stored = 0 if code is None else code
+        # Unchanged values aren't written, so they don't copy a shared array
+        if self.codes[row] != stored:
+            self.codes[row] = stored
+        return code is not None
+
+    def _get_encoded(self, row: int) -> Any:
+        return self.values[self.codes[row]]
+
+    def _size(self) -> int:
+        return self.codes.size
+
+    def nbytes(self) -> int:
+        return self.codes.nbytes()
+
+
+class _FixedColumn(Column):
+    """Fixed-width scalars of one Python type in a NumPy array"""
+    python_type: type = int
+    dtype: Any = np.int64
+
+    def __init__(self):
+        super().__init__()
+        self.data = _Growable(self.dtype)
+
+    def _encode(self, value: Any) -> Optional[Any]:
+        return value if type(value) is self.python_type else None
+
+    def _append_encoded(self, value: Any) -> bool:
+        encoded = self._encode(value)
+        self.data.append(0 if encoded is None else encoded)
+        return encoded is not None
+
+    def _set_encoded(self, row: int, value: Any) -> bool:
+        encoded = self._encode(value)
+        if self.data[row] != (0 if encoded is None else encoded):
+            self.data[row] = 0 if encoded is None else encoded
+        return encoded is not None
+
+    def _size(self) -> int:
+        return self.data.size
+
+    def nbytes(self) -> int:
+        return self.data.nbytes()
+
+
+class IntColumn(_FixedColumn):
+    python_type = int
+    dtype = np.int64
+
+    def _encode(self, value: Any) -> Optional[int]:
+        if type(value) is not int or not _INT64_MIN <= value <= _INT64_MAX:
+            return None
+        return value
+
+    def _get_encoded(self, row: int) -> int:
+        return int(self.data[row])
+
+
+class BoolColumn(_FixedColumn):
+    python_type = bool
+    dtype = np.bool_
+
+    def _get_encoded(self, row: int) -> bool:
+        return bool(self.data[row])
+
+
+class TimestampColumn(_FixedColumn):
+    """Naive ISO-8601 strings as int64 microseconds since the epoch"""
+    python_type = str
+    dtype = np.int64
+
+    def _encode(self, value: Any) -> Optional[int]:
+        if type(value) is not str:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        # Only strings that isoformat() reproduces exactly round-trip
+        if parsed.tzinfo is not None or parsed.isoformat() != value:
+            return None
+        return (parsed - _EPOCH) // _MICROSECOND
+
+    def _get_encoded(self, row: int) -> str:
+        return (_EPOCH + timedelta(microseconds=int(self.data[row]))).isoformat()
+
+
+class _SegmentColumn(Column):
+    """Variable-length values as (start, length) slices of one append-only buffer
+
+    Rewriting a row appends its new value and leaves the old bytes behind;
+    the buffer is compacted once the garbage outweighs the live data. None
+    and MISSING are stored as negative lengths.
+    """
+    COMPACT_MIN_GARBAGE = 1 << 16
+    _MARKERS = {-1: None, -2: MISSING}
+
+    @staticmethod
+    def _marker(value: Any) -> Optional[int]:
+        if value is None:
+            return -1
+        return -2 if value is MISSING else None
+
+    def __init__(self):
+        super().__init__()
+        self.starts = _Growable(np.int64)
+        self.lengths = _Growable(np.int32)
+        self._garbage = 0
+
+    @abstractmethod
+    def _encode(self, value: Any) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def _buffer_size(self) -> int:
+        ...
+
+    @abstractmethod
+    def _write(self, payload: Any) -> None:
+        ...
+
+    @abstractmethod
+    def _read(self, start: int, length: int) -> Any:
+        ...
+
+    @abstractmethod
+    def _compact(self) -> None:
+        ...
+
+    def _append_encoded(self, value: Any) -> bool:
+        marker = self._marker(value)
+        payload = None if marker is not None else self._encode(value)
+        self.starts.append(self._buffer_size())
+        if payload is None:
+            self.lengths.append(0 if marker is None else marker)
+            return marker is not None
+        self.lengths.append(len(payload))
+        self._write(payload)
+        return True
+
+    def _set_encoded(self, row: int, value: Any) -> bool:
+        marker = self._marker(value)
+        payload = None if marker is not None else self._encode(value)
+        start, length = int(self.starts[row]), int(self.lengths[row])
+        if payload is not None and len(payload) == length and self._same(start, payload):
+            return True
+        if marker is not None and marker == length:
+            return True
+        self._garbage += max(length, 0)
+        self.starts[row] = self._buffer_size()
+        if payload is None:
+            self.lengths[row] = 0 if marker is None else marker
+        else:
+            self.lengths[row] = len(payload)
+            self._write(payload)
+        if self._garbage > self.COMPACT_MIN_GARBAGE and self._garbage * 2 > self._buffer_size():
+            self._compact()
+            self._garbage = 0
+        return payload is not None or marker is not None
+
+    @abstractmethod
+    def _same(self, start: int, payload: Any) -> bool:
+        ...
+
+    def _get_encoded(self, row: int) -> Any:
+        length = int(self.lengths[row])
+        return self._MARKERS[length] if length < 0 else self._read(int(self.starts[row]), length)
+
+    def _size(self) -> int:
+        return self.starts.size
+
+    def _live_slices(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(source index per live element, new starts, lengths) for compaction"""
+        starts, lengths = self.starts.view(), np.maximum(self.lengths.view(), 0).astype(np.int64)
+        new_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if len(lengths) else lengths
+        total = int(lengths.sum())
+        source = np.repeat(starts - new_starts, lengths) + np.arange(total)
+        return source, new_starts, lengths
+
+
+class TextColumn(_SegmentColumn):
+    """Strings as UTF-8 slices of one growing byte array"""
+
+    def __init__(self):
+        super().__init__()
+        self.buffer = _Growable(np.uint8, 1024)
+
+    def _encode(self, value: Any) -> Optional[np.ndarray]:
+        return np.frombuffer(value.encode("utf-8", "surrogatepass"), dtype=np.uint8) if type(value) is str else None
+
+    def _buffer_size(self) -> int:
+        return self.buffer.size
+
+    def _write(self, payload: np.ndarray) -> None:
+        self.buffer.extend(payload)
+
+    def _same(self, start: int, payload: np.ndarray) -> bool:
+        return bool(np.array_equal(self.buffer[start:start + len(payload)], payload))
+
+    def _read(self, start: int, length: int) -> str:
+        return self.buffer[start:start + length].tobytes().decode("utf-8", "surrogatepass")
+
+    def _compact(self) -> None:
+        source, new_starts, _ = self._live_slices()
+        live = self.buffer.view()[source]
+        self.buffer = _Growable(np.uint8, max(1024, len(live)))
+        self.buffer.extend(live)
+        self.starts[:self.starts.size] = new_starts
+
+    def nbytes(self) -> int:
+        return self.buffer.nbytes() + self.starts.nbytes() + self.lengths.nbytes()
+
+
+class TokenListColumn(_SegmentColumn):
+    """Lists of strings as int32 ids into a shared Vocabulary"""
+
+    def __init__(self, vocabulary: Vocabulary):
+        super().__init__()
+        self.vocabulary = vocabulary
+        self.tokens = _Growable(np.int32)
+
+    def _encode(self, value: Any) -> Optional[np.ndarray]:
+        if type(value) is not list or not all(type(item) is str for item in value):
+            return None
+        return np.fromiter((self.vocabulary.id(item) for item in value), dtype=np.int32, count=len(value))
+
+    def _buffer_size(self) -> int:
+        return self.tokens.size
+
+    def _write(self, payload: np.ndarray) -> None:
+        self.tokens.extend(payload)
+
+    def _same(self, start: int, payload: np.ndarray) -> bool:
+        return bool(np.array_equal(self.tokens[start:start + len(payload)], payload))
+
+    def _read(self, start: int, length: int) -> List[str]:
+        strings = self.vocabulary.strings
+        return [strings[token] for token in self.tokens[start:start + length].tolist()]
+
+    def _compact(self) -> None:
+        source, new_starts, _ = self._live_slices()
+        live = self.tokens.view()[source]
+        self.tokens = _Growable(np.int32, max(16, len(live)))
+        self.tokens.extend(live)
+        self.starts[:self.starts.size] = new_starts
+
+    def nbytes(self) -> int:
+        return self.tokens.nbytes() + self.starts.nbytes() + self.lengths.nbytes()
+
+
+COLUMN_KINDS = {
+    "text": TextColumn,
+    "category": CategoryColumn,
+    "int": IntColumn,
+    "bool": BoolColumn,
+    "timestamp": TimestampColumn,
+    "tokens": TokenListColumn
+}
+
+
+class ColumnStore:
+    """Records of one table as columns, keyed by their "id" field
+
+    Supports the dict operations the record tables use (get, item
+    assignment, pop, values, len, in). Rows are numbered in insertion order;
+    a replaced record keeps its row and a deleted one leaves a dead row
+    behind. Re-registering a deleted id starts a new row.
+    """
+
+    def __init__(self, schema: Schema, vocabulary: Optional[Vocabulary] = None):
+        self.schema = tuple(schema)
+        if ("id", "id") not in self.schema:
+            self.schema = (("id", "id"),) + self.schema
+        self.vocabulary = vocabulary or Vocabulary()
+        self.columns: Dict[str, Column] = {}
+        for name, kind in self.schema:
+            if kind == "tokens":
+                self.columns[name] = TokenListColumn(self.vocabulary)
+            elif kind != "id":
+                self.columns[name] = COLUMN_KINDS[kind]()
+        self._readers = [(name, None if kind == "id" else self.columns[name].get) for name, kind in self.schema]
+        self.ids: List[str] = []
+        self.live = _Growable(np.bool_)
+        self._rows: Dict[str, int] = {}
+        # Fields outside the schema, per row
+        self._extras: Dict[int, Record] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, record_id: object) -> bool:
+        return record_id in self._rows
+
+    def row(self, record_id: str) -> Optional[int]:
+        return self._rows.get(record_id)
+
+    def record(self, row: int) -> Record:
+        """Materialize one row as a dict"""
+        record: Record = {}
+        for name, read in self._readers:
+            value = self.ids[row] if read is None else read(row)
+            if value is not MISSING:
+                record[name] = value
+        extras = self._extras.get(row)
+        if extras:
+            record.update(extras)
+        return record
+
+    def get(self, record_id: str, default: Optional[Record] = None) -> Optional[Record]:
+        row = self._rows.get(record_id)
+        return default if row is None else self.record(row)
+
+    def __getitem__(self, record_id: str) -> Record:
+        return self.record(self._rows[record_id])
+
+    def __setitem__(self, record_id: str, record: Record) -> None:
+        self.put(record)
+
+    def put(self, record: Record) -> int:
+        """Insert or replace a record; returns its row"""
+        record_id = record["id"]
+        row = self._rows.get(record_id)
+        if row is None:
+            row = len(self.ids)
+            self.ids.append(record_id)
+            self.live.append(True)
+            self._rows[record_id] = row
+            for name, column in self.columns.items():
+                column.append(record.get(name, MISSING))
+        else:
+            for name, column in self.columns.items():
+                column.set(row, record.get(name, MISSING))
+        extras = {field: value for field, value in record.items() if field not in self.columns and field != "id"}
+        if extras:
+            self._extras[row] = extras
+        else:
+            self._extras.pop(row, None)
+        return row
+
+    def pop(self, record_id: str, default: Any = None) -> Any:
+        row = self._rows.get(record_id)
+        if row is None:
+            return default
+        record = self.record(row)
+        self.remove(record_id)
+        return record
+
+    def remove(self, record_id: str) -> None:
+        """Drop a record; its dead row still reads back, so earlier snapshots of rows stay valid"""
+        row = self._rows.pop(record_id)
+        self.live[row] = False
+
+    def live_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.live.view())
+
+    def values(self) -> Iterator[Record]:
+        """Live records in row order"""
+        for row in self.live_rows().tolist():
+            yield self.record(row)
+
+    def nbytes(self) -> int:
+        """Approximate size of the column arrays and buffers"""
+        return sum(column.nbytes() for column in self.columns.values()) + self.live.nbytes()
+
+    def frozen(self) -> "FrozenColumnStore":
+        """Read-only copy of the records as they are now; O(columns), the data is shared"""
+        return FrozenColumnStore(self)
+
+    def export(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """(arrays keyed "field.attribute", picklable rest) for a snapshot
+
+        The arrays are views of the live columns; copy them before writing
+        them out while other threads may still write.
+        """
+        arrays = {"live": self.live.view()}
+        columns = {}
+        for name, column in self.columns.items():
+            column_arrays, attributes = column.export()
+            arrays.update({f"{name}.{key}": array for key, array in column_arrays.items()})
+            columns[name] = (type(column), attributes)
+        state = {"schema": self.schema, "vocabulary": self.vocabulary, "ids": self.ids,
+                 "extras": self._extras, "columns": columns}
+        return arrays, state
+
+    @classmethod
+    def restore(cls, arrays: Dict[str, np.ndarray], state: Dict[str, Any]) -> "ColumnStore":
+        store = cls(state["schema"], state["vocabulary"])
+        for name, (kind, attributes) in state["columns"].items():
+            prefix = f"{name}."
+            store.columns[name] = kind.restore(
+                {key[len(prefix):]: array for key, array in arrays.items() if key.startswith(prefix)}, attributes)
+        store._readers = [(name, None if kind == "id" else store.columns[name].get) for name, kind in store.schema]
+        store.ids = state["ids"]
+        store.live = _Growable.wrap(arrays["live"])
+        store._rows = {store.ids[row]: row for row in store.live_rows().tolist()}
+        store._extras = state["extras"]
+        return store
+
+
+class FrozenColumnStore(ColumnStore):
+    """A ColumnStore as of one moment, sharing the arrays of the live store
+
+    Ids are looked up in the live store's row map and checked against this
+    copy's rows; only an id deleted since (or never seen) falls back to a
+    row map built once from this copy.
+    """
+
+    def __init__(self, store: ColumnStore):
+        self.schema = store.schema
+        self.vocabulary = store.vocabulary
+        self.columns = {name: column.frozen() for name, column in store.columns.items()}
+        self._readers = [(name, None if kind == "id" else self.columns[name].get) for name, kind in self.schema]
+        # Append-only, so the first live.size ids are this copy's
+        self.ids = store.ids
+        self.live = store.live.share()
+        self._extras = dict(store._extras)
+        self._count = len(store)
+        self._live_rows = store._rows
+        self._own_rows: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, record_id: object) -> bool:
+        return self.row(record_id) is not None
+
+    def row(self, record_id: str) -> Optional[int]:
+        row = self._live_rows.get(record_id)
+        # A row that is live now and existed then was live then too
+        if row is not None and row < self.live.size:
+            return row
+        if self._own_rows is None:
+            self._own_rows = {self.ids[row]: row for row in self.live_rows().tolist()}
+        return self._own_rows.get(record_id)
+
+    def get(self, record_id: str, default: Optional[Record] = None) -> Optional[Record]:
+        row = self.row(record_id)
+        return default if row is None else self.record(row)
+
+    def __getitem__(self, record_id: str) -> Record:
+        row = self.row(record_id)
+        if row is None:
+            raise KeyError(record_id)
+        return self.record(row)
+
+    def put(self, record: Record) -> int:
+        raise TypeError("Frozen column store is read-only")
+
+    def remove(self, record_id: str) -> None:
+        raise TypeError("Frozen column store is read-only")
+
+    def frozen(self) -> "FrozenColumnStore":
+        return self
+
+
+class RecordColumns(ABC):
+    """A fixed sequence of records, read column by column"""
+
+    @property
+    @abstractmethod
+    def ids(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def record(self, position: int) -> Record:
+        """The record at a position as a dict"""
+
+    @abstractmethod
+    def categories(self, field: str, default: Any) -> Tuple[np.ndarray, List[Any]]:
+        """(code per record, distinct values); missing fields read as ``default``"""
+
+    @abstractmethod
+    def token_lists(self, field: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """CSR-style (indptr, codes, distinct strings) of a list-of-strings field"""
+
+    def list_lengths(self, field: str) -> np.ndarray:
+        """Number of items in a list field per record"""
+        return np.diff(self.token_lists(field)[0])
+
+    @abstractmethod
+    def numbers(self, field: str, default: Any) -> np.ndarray:
+        ...
+
+    @abstractmethod
+    def subset(self, mask: np.ndarray) -> "RecordColumns":
+        """The records where ``mask`` is true, in the same order"""
+
+
+class DictColumns(RecordColumns):
+    """Columns encoded on the fly from a list of dict records"""
+
+    def __init__(self, records: List[Record]):
+        self.records = records
+
+    @property
+    def ids(self) -> List[str]:
+        return [record.get("id", "") for record in self.records]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def record(self, position: int) -> Record:
+        return self.records[position]
+
+    def categories(self, field: str, default: Any) -> Tuple[np.ndarray, List[Any]]:
+        index: Dict[Any, int] = {}
+        codes = np.fromiter((index.setdefault(record.get(field, default), len(index)) for record in self.records),
+                            dtype=np.int64, count=len(self.records))
+        return codes, list(index)
+
+    def token_lists(self, field: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        index: Dict[str, int] = {}
+        indptr = [0]
+        codes: List[int] = []
+        for record in self.records:
+            codes.extend(index.setdefault(value, len(index)) for value in record.get(field, []))
+            indptr.append(len(codes))
+        return np.array(indptr, dtype=np.int64), np.array(codes, dtype=np.int64), list(index)
+
+    def numbers(self, field: str, default: Any) -> np.ndarray:
+        return np.array([record.get(field, default) for record in self.records])
+
+    def subset(self, mask: np.ndarray) -> "DictColumns":
+        return DictColumns([self.records[i] for i in np.flatnonzero(mask)])
+
+
+class StoreColumns(RecordColumns):
+    """Columns read straight from a ColumnStore's arrays for a set of rows
+
+    Rows whose value overflowed the column encoding are read one by one.
+    """
+
+    def __init__(self, store: ColumnStore, rows: np.ndarray):
+        self.store = store
+        self.rows = rows
+
+    @property
+    def ids(self) -> List[str]:
+        ids = self.store.ids
+        return [ids[row] for row in self.rows.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def record(self, position: int) -> Record:
+        return self.store.record(int(self.rows[position]))
+
+    def _fallback(self) -> DictColumns:
+        return DictColumns([self.store.record(row) for row in self.rows.tolist()])
+
+    def _overflows(self, column: Column) -> bool:
+        return bool(column.overflow) and not column.overflow.keys().isdisjoint(self.rows.tolist())
+
+    def categories(self, field: str, default: Any) -> Tuple[np.ndarray, List[Any]]:
+        column = self.store.columns.get(field)
+        if not isinstance(column, CategoryColumn) or self._overflows(column):
+            return self._fallback().categories(field, default)
+        used, codes = np.unique(column.codes.view()[self.rows], return_inverse=True)
+        values = [default if column.values[code] is MISSING else column.values[code] for code in used.tolist()]
+        return codes.astype(np.int64), values
+
+    def token_lists(self, field: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        column = self.store.columns.get(field)
+        lengths = column.lengths.view()[self.rows].astype(np.int64) if isinstance(column, TokenListColumn) else None
+        if lengths is None or self._overflows(column) or (lengths == -1).any():
+            return self._fallback().token_lists(field)
+        # Missing fields read as empty lists
+        lengths = np.maximum(lengths, 0)
+        starts = column.starts.view()[self.rows]
+        indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        source = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        used, codes = np.unique(column.tokens.view()[source], return_inverse=True)
+        strings = self.store.vocabulary.strings
+        return indptr, codes.astype(np.int64), [strings[token] for token in used.tolist()]
+
+    def list_lengths(self, field: str) -> np.ndarray:
+        column = self.store.columns.get(field)
+        lengths = column.lengths.view()[self.rows].astype(np.int64) if isinstance(column, TokenListColumn) else None
+        if lengths is None or self._overflows(column) or (lengths == -1).any():
+            return super().list_lengths(field)
+        return np.maximum(lengths, 0)
+
+    def numbers(self, field: str, default: Any) -> np.ndarray:
+        column = self.store.columns.get(field)
+        if not isinstance(column, _FixedColumn) or isinstance(column, TimestampColumn) or self._overflows(column):
+            return self._fallback().numbers(field, default)
+        return column.data.view()[self.rows].copy()
+
+    def subset(self, mask: np.ndarray) -> "StoreColumns":
+        return StoreColumns(self.store, self.rows[mask])
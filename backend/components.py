@@ -0,0 +1,279 @@
+"""Component scores of every candidate x internship pair, for ranking under custom weights.
+
+Rows are candidates and columns internships, in registration order. The
+skills score is kept as is; location, qualification and sector take a
+few values each and are kept as uint8 codes into their value tables
+(9 bytes a pair). With the bonus and penalty per row, any weight vector
+ranks the whole cohort with a weighted sum instead of a rescoring, and
+the default weights give exactly the standard ranking.
+
+Built by the batch scorer on first use, then patched: writes only queue
+the changed ids, and the next read rescores the rows of written
+candidates and the columns of written internships, masks out deleted
+ones and re-reads seat counts. Every score is taken with one set of
+TF-IDF weights, so the matrices are rebuilt in full when the skills
+index refits them; not kept at all for registries of more than
+``max_cells`` pairs.
+"""
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from batch_kernels import BatchInputs, MatchCancelled, Weights, iter_component_blocks, select_top, weighted_overall
+from storage import RegistryVersion
+
+if TYPE_CHECKING:
+    from main import SkillWeights
+
+
+class ComponentMatrices:
+    """Component scores of every candidate x internship pair, for ranking under custom weights"""
+
+    # The values the batch scorer produces for each coded component
+    VALUES = {
+        "location": np.array([0.2, 0.5, 0.7, 1.0]),
+        "qualification": np.unique(np.append(np.minimum(np.arange(4) * 0.3, 0.8), [0.5, 1.0])),
+        "sector": np.array([0.3, 1.0])
+    }
+
+    def __init__(self, max_cells: int, lock: threading.RLock,
+                 pin_scoring: Callable[[], Tuple[RegistryVersion, "SkillWeights"]],
+                 prepare: Callable[[Any, Any, "SkillWeights"], BatchInputs], block_cells: int):
+        self.max_cells = max_cells
+        # The store lock, and the registry version with the TF-IDF weights as of the same moment
+        self.store_lock = lock
+        self.pin_scoring = pin_scoring
+        # BatchMatchingEngine.prepare, and the cells it scores at a time
+        self.prepare = prepare
+        self.block_cells = block_cells
+        # Held while the matrices are refreshed or read; taken before the store lock
+        self._lock = threading.Lock()
+        self._pending: deque = deque()
+        self._stale = True
+        self.built = False
+        self.rebuilds = 0
+        self.patched_rows = 0
+        self.patched_columns = 0
+        self._clear()
+
+    def _clear(self) -> None:
+        self.row_of: Dict[str, int] = {}
+        self.row_ids: List[str] = []
+        self.col_of: Dict[str, int] = {}
+        self.col_ids: List[str] = []
+        self.skills = np.zeros((0, 0))
+        self.codes = {name: np.zeros((0, 0), dtype=np.uint8) for name in self.VALUES}
+        self.bonus = np.zeros(0)
+        self.penalty = np.zeros(0)
+        self.row_live = np.zeros(0, dtype=bool)
+        self.col_live = np.zeros(0, dtype=bool)
+        self.col_open = np.zeros(0, dtype=bool)
+        self._skills: Optional["SkillWeights"] = None
+
+    def reset(self) -> None:
+        """Drop the matrices at the next read, e.g. after the derived indexes were rebuilt"""
+        self._stale = True
+        self._pending.clear()
+
+    def record_change(self, kind: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """Table listener body: queue a written record; seat count changes are re-read anyway"""
+        if not self.built:
+            return
+        if kind == "industry" and old is not None and new is not None and \
+                {**old, "filled_positions": new.get("filled_positions")} == new:
+            return
+        self._pending.append((kind, (new or old)["id"], new is None))
+
+    # Maintenance
+    @classmethod
+    def _encode(cls, name: str, scores: np.ndarray) -> np.ndarray:
+        values = cls.VALUES[name]
+        return np.searchsorted((values[1:] + values[:-1]) / 2, scores).astype(np.uint8)
+
+    def _reserve(self, rows: int, cols: int) -> None:
+        """Grow the arrays to hold at least rows x cols, by a quarter at a time"""
+        cap_rows, cap_cols = self.skills.shape
+        if rows <= cap_rows and cols <= cap_cols:
+            return
+        new_rows = cap_rows if rows <= cap_rows else max(rows, cap_rows + cap_rows // 4 + 16)
+        new_cols = cap_cols if cols <= cap_cols else max(cols, cap_cols + cap_cols // 4 + 16)
+
+        def grown(array: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+            result = np.zeros(shape, dtype=array.dtype)
+            result[tuple(slice(0, size) for size in array.shape)] = array
+            return result
+
+        self.skills = grown(self.skills, (new_rows, new_cols))
+        self.codes = {name: grown(codes, (new_rows, new_cols)) for name, codes in self.codes.items()}
+        self.bonus, self.penalty = grown(self.bonus, (new_rows,)), grown(self.penalty, (new_rows,))
+        self.row_live = grown(self.row_live, (new_rows,))
+        self.col_live, self.col_open = grown(self.col_live, (new_cols,)), grown(self.col_open, (new_cols,))
+
+    def _store(self, inputs: BatchInputs, rows: np.ndarray, cols: np.ndarray,
+               cancel: Optional[threading.Event] = None) -> None:
+        """Score prepared inputs and write them to the given rows x columns"""
+        for start, skills, location, qualification, sector in iter_component_blocks(
+                inputs, self.block_cells, cancel):
+            grid = np.ix_(rows[start:start + len(skills)], cols)
+            self.skills[grid] = skills
+            self.codes["location"][grid] = self._encode("location", location)
+            self.codes["qualification"][grid] = self._encode("qualification", qualification)
+            self.codes["sector"][grid] = self._encode("sector", sector)
+        self.bonus[rows] = inputs.bonus
+        self.penalty[rows] = inputs.penalty
+
+    def _assign(self, kind: str, record_id: str) -> int:
+        """Row or column of a written record; a new one if it is new or was deleted"""
+        index, ids, live = ((self.row_of, self.row_ids, self.row_live) if kind == "candidate"
+                            else (self.col_of, self.col_ids, self.col_live))
+        position = index.get(record_id)
+        if position is None or not live[position]:
+            position = index[record_id] = len(ids)
+            ids.append(record_id)
+            if kind == "candidate":
+                self._reserve(len(ids), len(self.col_ids))
+            else:
+                self._reserve(len(self.row_ids), len(ids))
+        return position
+
+    def _refresh(self, cancel: Optional[threading.Event] = None) -> Optional[Tuple[RegistryVersion, "SkillWeights"]]:
+        """Bring the matrices up to date; returns the registry version they now reflect and
+        the TF-IDF weights they were scored with, or None if the registry is too large to keep them
+
+        Writes queued so far are taken together with the registry version
+        under the store lock; the written records are scored after it is
+        released, which the matrix lock keeps to one refresh at a time.
+        """
+        with self.store_lock:
+            version, skills = self.pin_scoring()
+            candidates, industries = version.candidates.columns(), version.industries.columns()
+            if len(candidates) * len(industries) > self.max_cells:
+                if self.built:
+                    self.built = False
+                    self._clear()
+                self._pending.clear()
+                return None
+            if self._stale or not self.built or skills is not self._skills:
+                self._pending.clear()
+                self._clear()
+                self._skills = skills
+                self._stale = False
+                self.built = True
+                self.rebuilds += 1
+                rows = np.array([self._assign("candidate", record_id) for record_id in candidates.ids], dtype=np.int64)
+                cols = np.array([self._assign("industry", record_id) for record_id in industries.ids], dtype=np.int64)
+                jobs = [(candidates, industries, rows, cols)] if len(candidates) and len(industries) else []
+            else:
+                written: Dict[str, Dict[str, None]] = {"candidate": {}, "industry": {}}
+                while self._pending:
+                    kind, record_id, deleted = self._pending.popleft()
+                    if deleted:
+                        index, live = (self.row_of, self.row_live) if kind == "candidate" else (self.col_of, self.col_live)
+                        if record_id in index:
+                            live[index[record_id]] = False
+                        written[kind].pop(record_id, None)
+                    else:
+                        written[kind][record_id] = None
+                new_candidates = [version.candidates[record_id] for record_id in written["candidate"]]
+                new_industries = [version.industries[record_id] for record_id in written["industry"]]
+                new_rows = np.array([self._assign("candidate", c["id"]) for c in new_candidates], dtype=np.int64)
+                new_cols = np.array([self._assign("industry", i["id"]) for i in new_industries], dtype=np.int64)
+                self.row_live[new_rows] = True
+                self.col_live[new_cols] = True
+                cols = np.array([self.col_of[record_id] for record_id in industries.ids], dtype=np.int64)
+                jobs = []
+                if new_candidates and len(industries):
+                    jobs.append((new_candidates, industries, new_rows, cols))
+                if new_industries and len(candidates):
+                    rows = np.array([self.row_of[record_id] for record_id in candidates.ids], dtype=np.int64)
+                    jobs.append((candidates, new_industries, rows, new_cols))
+                self.patched_rows += len(new_rows)
+                self.patched_columns += len(new_cols)
+            self.row_live[:] = False
+            self.row_live[[self.row_of[record_id] for record_id in candidates.ids]] = True
+            self.col_live[:] = False
+            self.col_live[cols] = True
+            self.col_open[:] = False
+            self.col_open[cols] = industries.numbers("filled_positions", 0) < industries.numbers("internship_capacity", 0)
+        try:
+            for job_candidates, job_industries, rows, cols in jobs:
+                self._store(self.prepare(job_candidates, job_industries, skills), rows, cols, cancel)
+        except BaseException:
+            # The queued writes are gone, so rebuild rather than patch next time
+            self._stale = True
+            raise
+        return version, skills
+
+    # Reads
+    def rank(self, weights: Weights, top_n: int, min_score_threshold: float,
+             candidate_id: Optional[str] = None, industry_id: Optional[str] = None,
+             cancel: Optional[threading.Event] = None
+             ) -> Optional[Tuple[RegistryVersion, "SkillWeights", List[Tuple[str, str]]]]:
+        """Best (candidate id, internship id) pairs under ``weights``, best first, with the
+        registry version and TF-IDF weights they were ranked on; None if the matrices are not kept
+
+        Same selection as the matcher: a candidate is ranked against open
+        internships (``industry_id`` is then ignored), an internship against
+        all candidates, and with neither every candidate against every open
+        internship. An id not in the registry ranks nothing. Ties go to
+        registration order.
+        """
+        if self.max_cells <= 0:
+            return None
+        with self._lock:
+            refreshed = self._refresh(cancel)
+            if refreshed is None:
+                return None
+            version, skills = refreshed
+            rows = np.flatnonzero(self.row_live[:len(self.row_ids)])
+            cols = np.flatnonzero(self.col_open[:len(self.col_ids)])
+            if candidate_id is not None:
+                rows = self._live_position(self.row_of, self.row_live, candidate_id)
+            elif industry_id is not None:
+                cols = self._live_position(self.col_of, self.col_live, industry_id)
+            m = len(cols)
+            if top_n <= 0 or not len(rows) or not m:
+                return version, skills, []
+
+            values = self.VALUES
+            block = max(1, self.block_cells // m)
+            best_idx, best_scores = np.empty(0, dtype=np.int64), np.empty(0)
+            for start in range(0, len(rows), block):
+                if cancel is not None and cancel.is_set():
+                    raise MatchCancelled()
+                block_rows = rows[start:start + block]
+                grid = np.ix_(block_rows, cols)
+                overall = weighted_overall(
+                    self.skills[grid],
+                    values["location"][self.codes["location"][grid]],
+                    values["qualification"][self.codes["qualification"][grid]],
+                    values["sector"][self.codes["sector"][grid]],
+                    self.bonus[block_rows], self.penalty[block_rows], weights
+                ).ravel()
+                hits = np.flatnonzero(overall >= min_score_threshold)
+                best_idx, best_scores = select_top(
+                    np.concatenate([best_idx, hits + start * m]),
+                    np.concatenate([best_scores, overall[hits]]), top_n)
+            order = np.lexsort((best_idx, -best_scores))
+            return version, skills, [(self.row_ids[rows[k // m]], self.col_ids[cols[k % m]])
+                                     for k in best_idx[order].tolist()]
+
+    @staticmethod
+    def _live_position(index: Dict[str, int], live: np.ndarray, record_id: str) -> np.ndarray:
+        position = index.get(record_id)
+        return np.array([position] if position is not None and live[position] else [], dtype=np.int64)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_cells": self.max_cells,
+            "built": self.built,
+            "candidates": int(self.row_live.sum()),
+            "internships": int(self.col_live.sum()),
+            "bytes": self.skills.nbytes + sum(codes.nbytes for codes in self.codes.values()),
+            "rebuilds": self.rebuilds,
+            "patched_rows": self.patched_rows,
+            "patched_columns": self.patched_columns,
+            "pending_writes": len(self._pending)
+        }
@@ -0,0 +1,131 @@
+"""Streaming parsers for bulk registration uploads (JSON Lines and CSV).
+
+Uploads are consumed chunk by chunk from the request body and yielded row by
+row, so memory stays flat however large the file is. Lines that aren't valid
+UTF-8 are reported as row errors like any other malformed row.
+"""
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional, Tuple, Union
+
+# (row number, parsed row) or (row number, error message)
+ParsedRow = Tuple[int, Union[Dict[str, Any], str]]
+
+# Separator for list-valued cells in CSV uploads, e.g. "Python;SQL;Excel"
+CSV_LIST_SEPARATOR = ";"
+
+
+def _decode(line: bytes) -> Tuple[str, Optional[str]]:
+    try:
+        return line.decode("utf-8"), None
+    except UnicodeDecodeError as e:
+        return line.decode("utf-8", errors="replace"), f"Invalid UTF-8 at byte {e.start} of the line"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, Optional[str]]]:
+    """Split a byte stream into text lines without buffering the whole body
+
+    Yields (line, error): error is None, or why the line isn't valid UTF-8,
+    in which case invalid bytes are replaced by U+FFFD. A leading byte order
+    mark is dropped. Each chunk is scanned once: the unterminated tail of a
+    line is kept as pieces and joined when its newline arrives.
+    """
+    pending: List[bytes] = []
+    head = b""
+    started = False
+    async for chunk in chunks:
+        if not started:
+            head += chunk
+            if codecs.BOM_UTF8.startswith(head):
+                continue    # may still be a byte order mark
+            started = True
+            chunk = head[len(codecs.BOM_UTF8):] if head.startswith(codecs.BOM_UTF8) else head
+        # A newline byte is never part of a multi-byte UTF-8 sequence
+        end = chunk.find(b"\n")
+        if end < 0:
+            pending.append(chunk)
+            continue
+        pending.append(chunk[:end])
+        yield _decode(b"".join(pending).rstrip(b"\r"))
+        *lines, tail = chunk[end + 1:].split(b"\n")
+        for line in lines:
+            yield _decode(line.rstrip(b"\r"))
+        pending = [tail]
+    if not started and head != codecs.BOM_UTF8:
+        pending = [head]
+    rest = b"".join(pending)
+    if rest:
+        yield _decode(rest.rstrip(b"\r"))
+
+
+async def iter_jsonl_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """One JSON object per line; blank lines are skipped"""
+    row_number = 0
+    async for line, error in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row_number += 1
+        if error is not None:
+            yield row_number, error
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield row_number, "Each line must be a JSON object"
+            continue
+        yield row_number, row
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes],
+                        list_fields: FrozenSet[str]) -> AsyncIterator[ParsedRow]:
+    """CSV with a header row; list fields are split on CSV_LIST_SEPARATOR
+
+    Empty list cells are empty lists, as in JSON Lines uploads; other empty
+    cells are dropped so the model defaults apply. Quoted cells may span
+    lines: physical lines are joined until the quotes balance. Rows are
+    numbered from 1 after the header; an unreadable header is row 0 and ends
+    the upload.
+    """
+    header: List[str] = []
+    record = ""
+    record_error: Optional[str] = None
+    row_number = 0
+    async for line, error in iter_lines(chunks):
+        record = f"{record}\n{line}" if record else line
+        record_error = record_error or error
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        error, record_error = record_error, None
+        if not text.strip():
+            continue
+        if not header and error is not None:
+            yield 0, f"Header row: {error}"
+            return
+        cells = next(csv.reader([text]))
+        if not header:
+            header = [cell.strip() for cell in cells]
+            continue
+
+        row_number += 1
+        if error is not None:
+            yield row_number, error
+            continue
+        if len(cells) != len(header):
+            yield row_number, f"Expected {len(header)} columns, got {len(cells)}"
+            continue
+        row: Dict[str, Any] = {}
+        for field, cell in zip(header, cells):
+            cell = cell.strip()
+            if field in list_fields:
+                row[field] = [item.strip() for item in cell.split(CSV_LIST_SEPARATOR) if item.strip()]
+            elif cell:
+                row[field] = cell
+        yield row_number, row
+
+    if record:
+        yield row_number + 1, "Unterminated quoted field at end of file"
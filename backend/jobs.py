@@ -0,0 +1,189 @@
+"""Background match and allocation jobs with persisted progress and results.
+
+Jobs run one at a time on their own thread and score the registry in
+candidate chunks, reporting pairs scored and an ETA after each chunk, so a
+nationwide run doesn't depend on one HTTP connection staying open. Job
+records, result rows and cancellation requests live in the store's JobTable,
+so any worker can report on or cancel a job. Jobs whose owning process died
+are marked interrupted at startup.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from batch_kernels import MatchCancelled
+from storage import JobTable
+
+logger = logging.getLogger(__name__)
+
+
+class JobContext:
+    """What a running job uses to report progress, store results and notice cancellation"""
+
+    # Progress is persisted at most this often; cancellation is checked on every call
+    REPORT_INTERVAL_SECONDS = 0.5
+
+    def __init__(self, table: JobTable, job_id: str, cancel: threading.Event,
+                 loop: asyncio.AbstractEventLoop, count_pairs: Callable[[int], None]):
+        self.table = table
+        self.count_pairs = count_pairs
+        self.job_id = job_id
+        self.cancel = cancel
+        self._loop = loop
+        self.total_pairs = 0
+        self.pairs_scored = 0
+        self.result_count = 0
+        self._started = time.monotonic()
+        self._last_report = 0.0
+
+    def progress(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started
+        remaining = self.total_pairs - self.pairs_scored
+        return {
+            "pairs_scored": self.pairs_scored,
+            "total_pairs": self.total_pairs,
+            "percent": round(100 * self.pairs_scored / self.total_pairs, 1) if self.total_pairs else 0.0,
+            "elapsed_seconds": round(elapsed, 1),
+            "eta_seconds": round(elapsed * remaining / self.pairs_scored, 1) if self.pairs_scored else None
+        }
+
+    def set_total(self, total_pairs: int) -> None:
+        self.total_pairs = total_pairs
+        self._report(force=True)
+
+    def advance(self, pairs: int) -> None:
+        """Count scored pairs; raises MatchCancelled if the job was cancelled"""
+        self.pairs_scored += pairs
+        self.count_pairs(pairs)
+        self._report()
+
+    def _report(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if force or now - self._last_report >= self.REPORT_INTERVAL_SECONDS:
+            self._last_report = now
+            job = self.table.update(self.job_id, {"progress": self.progress(), "result_count": self.result_count})
+            if job is None or job.get("cancel_requested"):
+                self.cancel.set()
+        if self.cancel.is_set():
+            raise MatchCancelled()
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        """Append result rows after the ones already stored"""
+        if rows:
+            self.table.append_results(self.job_id, self.result_count, rows)
+            self.result_count += len(rows)
+
+    def on_loop(self, coroutine_fn, *args):
+        """Run a coroutine on the event loop (e.g. registry writes) and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine_fn(*args), self._loop).result()
+
+class JobManager:
+    """Background match and allocation jobs with persisted progress and results"""
+
+    KINDS = ("match", "allocation")
+    # Candidate x internship cells scored between progress reports
+    CHUNK_CELLS = 4_000_000
+    # Owner token, so a restarted process that got the same pid can tell its jobs are orphaned
+    PROCESS_TOKEN = uuid.uuid4().hex
+
+    def __init__(self, table: JobTable, count_pairs: Callable[[int], None]):
+        self.table = table
+        # Adds pairs scored by jobs to the process metrics
+        self.count_pairs = count_pairs
+        # Created when the app starts
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._cancel: Dict[str, threading.Event] = {}
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="match-job")
+
+    def submit(self, kind: str, params: Dict[str, Any],
+               run: Callable[[JobContext], Dict[str, Any]]) -> Dict[str, Any]:
+        """Queue ``run(context)``; it returns a summary stored on the finished job"""
+        job = {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "status": "queued",
+            "params": params,
+            "progress": {"pairs_scored": 0, "total_pairs": None, "percent": 0.0,
+                         "elapsed_seconds": 0.0, "eta_seconds": None},
+            "result_count": 0,
+            "summary": None,
+            "error": None,
+            "cancel_requested": False,
+            "owner": {"pid": os.getpid(), "token": self.PROCESS_TOKEN},
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None
+        }
+        self.table.put(job)
+        cancel = self._cancel[job["id"]] = threading.Event()
+        context = JobContext(self.table, job["id"], cancel, asyncio.get_running_loop(), self.count_pairs)
+        self._executor.submit(self._run, job["id"], run, context)
+        return job
+
+    def _run(self, job_id: str, run, context: JobContext) -> None:
+        try:
+            job = self.table.get(job_id)
+            if job is None or job.get("cancel_requested"):
+                raise MatchCancelled()
+            self.table.update(job_id, {"status": "running", "started_at": datetime.now().isoformat()})
+            summary = run(context)
+            self._finish(context, "completed", summary=summary)
+        except MatchCancelled:
+            self._finish(context, "cancelled")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            self._finish(context, "failed", error=str(e))
+        finally:
+            self._cancel.pop(job_id, None)
+
+    def _finish(self, context: JobContext, status: str, **changes: Any) -> None:
+        self.table.update(context.job_id, {
+            "status": status,
+            "progress": context.progress(),
+            "result_count": context.result_count,
+            "finished_at": datetime.now().isoformat(),
+            **changes
+        })
+        logger.info(f"Job {context.job_id} {status} with {context.result_count} results")
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.table.update(job_id, {"cancel_requested": True})
+        event = self._cancel.get(job_id)
+        if event is not None:
+            event.set()
+        return job
+
+    @staticmethod
+    def _owner_alive(owner: Dict[str, Any]) -> bool:
+        pid = owner.get("pid")
+        if pid == os.getpid():
+            return owner.get("token") == JobManager.PROCESS_TOKEN
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, TypeError):
+            pass
+        return True
+
+    def recover(self, scan_limit: int = 1000) -> None:
+        """Mark queued/running jobs whose owning process is gone as interrupted"""
+        for job in self.table.recent(scan_limit):
+            if job["status"] in ("queued", "running") and not self._owner_alive(job.get("owner", {})):
+                self.table.update(job["id"], {"status": "interrupted", "finished_at": datetime.now().isoformat()})
+
+    def shutdown(self) -> None:
+        for event in list(self._cancel.values()):
+            event.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
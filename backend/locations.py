@@ -0,0 +1,137 @@
+"""Location hierarchy and the place x place location score table.
+
+The hierarchy is loaded once from a CSV with one row per city: its
+district, state and region, coordinates, extra areas it belongs to (e.g.
+"NCR") and alternative spellings, the areas and alternatives separated by
+";". Every name in it (city, district, state, region or area) is a place a
+candidate can prefer or an internship can be located at.
+
+A preference scores against a location as:
+
+- SAME_PLACE when it names the location itself (or an alias of it)
+- NEARBY when it names an area containing the location, or, with a
+  nearby radius, a city within that many kilometres of it
+- ELSEWHERE otherwise
+
+These are precomputed for every pair of known places, so scoring a
+preference is a table lookup. Names outside the hierarchy only match
+themselves.
+"""
+import csv
+import hashlib
+from typing import Dict, FrozenSet, List, Sequence, Set
+
+import numpy as np
+
+SAME_PLACE = 1.0
+NEARBY = 0.7
+ELSEWHERE = 0.2
+# Score per level in LocationHierarchy.levels
+LEVELS = np.array([ELSEWHERE, NEARBY, SAME_PLACE])
+
+_EARTH_RADIUS_KM = 6371.0
+_HIERARCHY_COLUMNS = ("district", "state", "region")
+
+
+class LocationHierarchy:
+    """Places indexed once, with the score level of every (preference, location) pair"""
+
+    def __init__(self, rows: List[Dict[str, str]], nearby_km: float = 0.0, fingerprint: str = ""):
+        self.nearby_km = nearby_km
+        self.fingerprint = fingerprint
+        self.codes: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.aliases: Dict[str, str] = {}
+        # City -> the areas containing it, innermost first
+        self.areas: Dict[str, List[str]] = {}
+        containing: List[Set[int]] = []
+        cities: List[int] = []
+        coordinates: List[List[float]] = []
+
+        def code(name: str) -> int:
+            if name not in self.codes:
+                self.codes[name] = len(self.names)
+                self.names.append(name)
+                containing.append(set())
+            return self.codes[name]
+
+        for row in rows:
+            chain = [row["city"]] + [row[column] for column in _HIERARCHY_COLUMNS if row.get(column)]
+            areas = [area.strip() for area in (row.get("areas") or "").split(";") if area.strip()]
+            codes = [code(name) for name in chain + areas]
+            city = codes[0]
+            self.areas[row["city"]] = [name for name in chain[1:] + areas if name != row["city"]]
+            containing[city].update(codes[1:])
+            for position in range(1, len(chain)):
+                containing[codes[position]].update(codes[position + 1:len(chain)])
+            if row.get("latitude") and row.get("longitude"):
+                cities.append(city)
+                coordinates.append([float(row["latitude"]), float(row["longitude"])])
+            for alias in (row.get("aliases") or "").split(";"):
+                if alias.strip():
+                    self.aliases[alias.strip()] = row["city"]
+        for name in self.aliases:
+            if name in self.codes:
+                raise ValueError(f"Location alias {name!r} is also a place name")
+
+        # levels[preference, location]: index into LEVELS
+        size = len(self.names)
+        self.levels = np.zeros((size, size), dtype=np.int8)
+        for location, areas in enumerate(containing):
+            areas.discard(location)
+            self.levels[list(areas), location] = 1
+        if nearby_km > 0 and cities:
+            radians = np.radians(np.array(coordinates))
+            lat, lon = radians[:, :1], radians[:, 1:]
+            # Haversine distance between every two cities
+            h = (np.sin((lat - lat.T) / 2) ** 2 +
+                 np.cos(lat) * np.cos(lat.T) * np.sin((lon - lon.T) / 2) ** 2)
+            close = 2 * _EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0))) <= nearby_km
+            city_codes = np.array(cities)
+            block = self.levels[np.ix_(city_codes, city_codes)]
+            self.levels[np.ix_(city_codes, city_codes)] = np.maximum(block, close.astype(np.int8))
+        np.fill_diagonal(self.levels, 2)
+
+        # Per location, the other places a preference for scores NEARBY
+        self._nearby: List[FrozenSet[str]] = [
+            frozenset(self.names[p] for p in np.flatnonzero(self.levels[:, location] == 1).tolist())
+            for location in range(size)
+        ]
+
+    @classmethod
+    def load(cls, path: str, nearby_km: float = 0.0) -> "LocationHierarchy":
+        with open(path, "rb") as f:
+            data = f.read()
+        rows = list(csv.DictReader(data.decode("utf-8-sig").splitlines()))
+        fingerprint = hashlib.sha1(data + repr(nearby_km).encode()).hexdigest()
+        return cls(rows, nearby_km, fingerprint)
+
+    def canonical(self, name: str) -> str:
+        """The place name for an alias; other names unchanged"""
+        return self.aliases.get(name, name)
+
+    def nearby(self, location: str) -> FrozenSet[str]:
+        """Canonical names a preference for scores NEARBY against ``location``"""
+        code = self.codes.get(self.canonical(location))
+        return self._nearby[code] if code is not None else frozenset()
+
+    def score(self, preference: str, location: str) -> float:
+        preference, location = self.canonical(preference), self.canonical(location)
+        pref_code, loc_code = self.codes.get(preference), self.codes.get(location)
+        if pref_code is None or loc_code is None:
+            return SAME_PLACE if preference == location else ELSEWHERE
+        return float(LEVELS[self.levels[pref_code, loc_code]])
+
+    def score_table(self, preferences: Sequence[str], locations: Sequence[str]) -> np.ndarray:
+        """preferences x locations scores, vectorized over the known places"""
+        preferences = [self.canonical(name) for name in preferences]
+        locations = [self.canonical(name) for name in locations]
+        pref_codes = np.array([self.codes.get(name, -1) for name in preferences], dtype=np.int64)
+        loc_codes = np.array([self.codes.get(name, -1) for name in locations], dtype=np.int64)
+        same = np.array(preferences, dtype=object)[:, None] == np.array(locations, dtype=object)[None, :]
+        table = np.where(same, SAME_PLACE, ELSEWHERE).reshape(len(pref_codes), len(loc_codes))
+        known_prefs, known_locs = pref_codes >= 0, loc_codes >= 0
+        if known_prefs.any() and known_locs.any():
+            levels = self.levels[np.ix_(pref_codes[known_prefs], loc_codes[known_locs])]
+            table[np.ix_(known_prefs, known_locs)] = LEVELS[levels]
+        return table
@@ -1,22 +1,81 @@
-from fastapi import FastAPI, HTTPException
+import time
+# Taken before anything else is imported, for the startup profile
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, ValidationError
+from typing import (TYPE_CHECKING, List, Optional, Dict, Any, Tuple, Union, Iterable, Iterator, FrozenSet, Callable,
+                    NamedTuple)
+from contextlib import asynccontextmanager
 from datetime import datetime
+from dataclasses import dataclass
+import math
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from functools import lru_cache
+from array import array
+from collections import deque
+import heapq
+import json
 import logging
+import os
+import re
+import sys
+import threading
 import uuid
+import asyncio
+import contextvars
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from allocation import AllocationEngine
+from batch_kernels import (DEFAULT_WEIGHTS, BatchInputs, MatchCancelled, SharedCancelFlag, Weights,
+                           iter_score_blocks, select_top, top_in_rows)
+from columnar import DictColumns, RecordColumns
+from components import ComponentMatrices
+from ingest import ParsedRow, iter_csv_rows, iter_jsonl_rows
+from jobs import JobContext, JobManager
+from locations import LocationHierarchy
+from metrics import MetricsRegistry, RequestProfile, StartupProfile, current_profile, stage_timer
+from responses import CompressionMiddleware, FastJSONResponse, conditional_json
+from recommendations import Recommendations
+from result_cache import MatchResultCache
+from semantic import TextEmbedding, VectorIndex, preload as preload_semantic
+from qualifications import qualification_token_ids, vocabulary as qualification_vocabulary
+from snapshot import SnapshotManager
+from stats import RegistryStats
+from storage import RecordTable, RegistryVersion, open_store
+
+if TYPE_CHECKING:
+    # Imported where used instead: only batch scoring and allocation need it, not startup
+    from scipy import sparse
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Startup phases, from IMPORT_STARTED to the end of warm_up(); see /ready
+startup_profile = StartupProfile(IMPORT_STARTED)
+startup_profile.checkpoint("import_modules")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start workers and warm-up with the server (see start_up) and stop them with it"""
+    await start_up()
+    try:
+        yield
+    finally:
+        shut_down()
+
 app = FastAPI(
     title="PM Internship Scheme - Smart Matching API",
     description="AI-powered internship matching system with affirmative action support",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -28,6 +87,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Responses of at least PM_COMPRESSION_MIN_BYTES are sent brotli- or
+# gzip-compressed to clients that accept it (0 disables compression)
+COMPRESSION_MIN_BYTES = int(os.getenv("PM_COMPRESSION_MIN_BYTES", "1024"))
+if COMPRESSION_MIN_BYTES > 0:
+    app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_BYTES)
+
 # Pydantic Models
 class CandidateRegistration(BaseModel):
     name: str
@@ -60,15 +125,349 @@ class IndustryRegistration(BaseModel):
     remote_allowed: bool = False
     preferred_candidate_profile: str = ""
 
+class ScoreWeights(BaseModel):
+    """Weights of the overall match score; the defaults are the standard policy"""
+    skills: float = 0.35
+    location: float = 0.20
+    qualification: float = 0.15
+    sector: float = 0.15
+    base: float = 0.15
+    affirmative_bonus: float = 1.0
+    experience_penalty: float = 1.0
+    
+    def as_tuple(self) -> Weights:
+        return (self.skills, self.location, self.qualification, self.sector, self.base,
+                self.affirmative_bonus, self.experience_penalty)
+    
 class MatchRequest(BaseModel):
+    # A candidate's internships, else an internship's candidates, else all pairs
     candidate_id: Optional[str] = None
     industry_id: Optional[str] = None
-    top_n: int = 10
+    top_n: int = Field(10, ge=0)
+    min_score_threshold: float = 0.3
+    # Rank under these weights instead of the standard policy (what-if ranking)
+    weights: Optional[ScoreWeights] = None
+    # "exact" scores every record on the other side (with pruning); "semantic"
+    # reranks the records nearest in the semantic index (approximate)
+    retrieval: str = "exact"
+    # "compact" lists each candidate and internship once in side tables and each
+    # match as a row of match_fields; include_breakdown=false keeps only overall_score
+    response_format: str = "full"
+    include_breakdown: bool = True
+
+class AllocationRequest(BaseModel):
+    method: str = "stable"  # stable, optimal
     min_score_threshold: float = 0.3
+    shortlist_size: int = 20
+    # Share of each internship's seats reserved per group, e.g. {"category": {"SC": 0.15}}
+    reservation_quotas: Dict[str, Dict[str, float]] = {}
+    commit: bool = False
+
+class MatchJobRequest(BaseModel):
+    min_score_threshold: float = 0.3
+    top_n: int = 1000
+    # Set to list each candidate's best k internships instead of the overall top_n pairs
+    per_candidate: Optional[int] = None
+
+# Storage: "sqlite" (default, persistent and shared by workers) or "memory" (tests)
+STORAGE_BACKEND = os.getenv("PM_STORAGE_BACKEND", "sqlite")
+SQLITE_PATH = os.getenv("PM_SQLITE_PATH", "pm_internship.db")
+
+# In-process record layout: "columnar" (default, compact) or "dict" (one dict per record)
+RECORD_LAYOUT = os.getenv("PM_RECORD_LAYOUT", "columnar")
+
+store = open_store(STORAGE_BACKEND, SQLITE_PATH, RECORD_LAYOUT)
+startup_profile.checkpoint("open_store")
+
+# Qualification matching: "tokens" (default) compares normalized token sets;
+# "substring" keeps the original keyword-substring rules. Both score 1.0 for
+# an exact match and 0.3 per keyword hit up to 0.8.
+QUALIFICATION_MATCHING = os.getenv("PM_QUALIFICATION_MATCHING", "tokens")
+if QUALIFICATION_MATCHING not in ("tokens", "substring"):
+    raise ValueError(f"PM_QUALIFICATION_MATCHING must be tokens or substring, not {QUALIFICATION_MATCHING!r}")
+candidates_db: RecordTable = store.candidates
+industries_db: RecordTable = store.industries
+
+# Location scoring reads the city -> district -> state -> region hierarchy in
+# PM_LOCATIONS_FILE (see locations.py). With PM_LOCATION_NEARBY_KM set, a
+# preferred city within that distance of the internship also scores as nearby.
+LOCATIONS_FILE = os.getenv("PM_LOCATIONS_FILE",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), "locations.csv"))
+LOCATION_NEARBY_KM = float(os.getenv("PM_LOCATION_NEARBY_KM", "0"))
+location_hierarchy = LocationHierarchy.load(LOCATIONS_FILE, LOCATION_NEARBY_KM)
+startup_profile.checkpoint("load_locations")
+
+# Prometheus metrics served at /metrics. Per-pair score component timers cost a
+# few clock reads per pair, so they only run for profiled requests (X-Profile: 1)
+# or, with PM_METRICS_COMPONENT_TIMERS=1, for every request.
+METRICS_COMPONENT_TIMERS = os.getenv("PM_METRICS_COMPONENT_TIMERS", "0") == "1"
+PROFILE_HEADER = "x-profile"
+
+metrics = MetricsRegistry()
+request_duration = metrics.histogram(
+    "pm_http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+match_stage_duration = metrics.histogram(
+    "pm_match_stage_duration_seconds", "Time spent in each matching pipeline stage", ("stage", "mode"))
+match_component_seconds = metrics.counter(
+    "pm_match_score_component_seconds_total", "Time spent in each score component of timed requests",
+    ("component",))
+pairs_scored_total = metrics.counter(
+    "pm_match_pairs_scored_total", "Candidate-internship pairs scored", ("mode",))
+pairs_pruned_total = metrics.counter(
+    "pm_match_pairs_pruned_total", "Candidate-internship pairs skipped by index pruning", ("mode",))
+for _field in ("hits", "misses", "invalidations", "evictions"):
+    metrics.gauge(f"pm_match_cache_{_field}_total", f"Match result cache {_field}",
+                  lambda field=_field: [((), match_cache.stats()[field])], kind="counter")
+metrics.gauge("pm_match_cache_entries", "Entries in the match result cache",
+              lambda: [((), match_cache.stats()["size"])])
+metrics.gauge("pm_registry_records", "Registered records", lambda: [
+    (("candidate",), registry_stats.candidates_total), (("industry",), registry_stats.industries_total)
+], ("kind",))
+
+# A record's skill terms as shared (term, count) pairs; terms are vocabulary ids, or the token for unseen ones
+TermCounts = Tuple[Tuple[Union[int, str], int], ...]
+
+class SkillWeights:
+    """IDF weights fitted at one version of the skills index
+    
+    Never changed once fitted (a refit builds a new instance), so readers
+    holding one score consistently while the index takes writes. Normalized
+    vectors are cached per distinct term counts, which records share.
+    """
+    
+    def __init__(self, doc_freq: List[int], documents: int, version: int):
+        # Smoothed IDF, as sklearn computes it
+        self.idf = [math.log((1 + documents) / (1 + df)) + 1.0 for df in doc_freq]
+        self.unseen_idf = math.log(1 + documents) + 1.0
+        self.documents = documents
+        self.version = version
+        self._vectors: Dict[TermCounts, Dict[Union[int, str], float]] = {}
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # Vectors are a cache, rebuilt on demand after load
+        state = dict(vars(self))
+        state["_vectors"] = {}
+        return state
+    
+    def idf_of(self, term: Union[int, str]) -> float:
+        """IDF of a term; terms added to the vocabulary after the fit weigh as unseen"""
+        return self.idf[term] if isinstance(term, int) and term < len(self.idf) else self.unseen_idf
+    
+    def weigh(self, counts: TermCounts) -> Dict[Union[int, str], float]:
+        """L2-normalized TF-IDF vector of term counts"""
+        weights = {term: count * self.idf_of(term) for term, count in counts}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        if norm == 0.0:
+            return {}
+        return {term: w / norm for term, w in weights.items()}
+    
+    def vector(self, counts: TermCounts) -> Dict[Union[int, str], float]:
+        """weigh(), cached for as long as these weights are current"""
+        vec = self._vectors.get(counts)
+        if vec is None:
+            vec = self._vectors[counts] = self.weigh(counts)
+        return vec
 
-# In-memory storage
-candidates_db: Dict[str, Dict[str, Any]] = {}
-industries_db: Dict[str, Dict[str, Any]] = {}
+class SkillsIndex:
+    """Shared TF-IDF vocabulary fitted over all registered candidates and internships.
+    
+    Term counts are cached per record when it is added, as a shared tuple of
+    (term, count) pairs rather than a dict per record, and compiled features
+    carry the same tuples. A write refits the IDF weights from the document
+    frequencies only once more than REFIT_TOLERANCE of the corpus has been
+    written since the last fit (0 refits on every write), so it does not
+    throw away the vectors of every other record. Writes run under the store
+    lock; the weights they leave behind can be read without it.
+    """
+    
+    # TfidfVectorizer's default analyzer (lowercased words of two or more
+    # characters), as used per pair previously, without importing scikit-learn
+    TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+    REFIT_TOLERANCE = float(os.getenv("PM_SKILLS_IDF_TOLERANCE", "0.01"))
+    
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self._doc_freq: List[int] = []
+        # kind -> record id -> term counts; equal term counts share one tuple
+        self._term_counts: Dict[str, Dict[str, TermCounts]] = {"candidate": {}, "industry": {}}
+        self._shared_counts: Dict[TermCounts, TermCounts] = {}
+        self._pairs: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        self._documents = 0
+        self.version = 0
+        self._weights = SkillWeights([], 0, 0)
+    
+    def __len__(self) -> int:
+        return self._documents
+    
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        kind, record_id = key
+        return record_id in self._term_counts[kind]
+    
+    def tokens(self, skills: Iterable[str]) -> List[str]:
+        return self.TOKEN_PATTERN.findall(" ".join(skills).lower())
+    
+    def add(self, kind: str, record_id: str, skills: List[str]) -> None:
+        """Add (or replace) a record's skills and update document frequencies"""
+        if record_id in self._term_counts[kind]:
+            self.remove(kind, record_id)
+        
+        counts: Dict[int, int] = {}
+        for token in self.tokens(skills):
+            term_id = self.vocabulary.get(token)
+            if term_id is None:
+                term_id = len(self.vocabulary)
+                self.vocabulary[token] = term_id
+                self._doc_freq.append(0)
+            counts[term_id] = counts.get(term_id, 0) + 1
+        
+        for term_id in counts:
+            self._doc_freq[term_id] += 1
+        shared = tuple(self._pairs.setdefault(pair, pair) for pair in counts.items())
+        self._term_counts[kind][record_id] = self._shared_counts.setdefault(shared, shared)
+        self._documents += 1
+        self.version += 1
+        self._refit_if_drifted()
+    
+    def remove(self, kind: str, record_id: str) -> None:
+        """Drop a record from the index"""
+        counts = self._term_counts[kind].pop(record_id, None)
+        if counts is None:
+            return
+        for term_id, _ in counts:
+            self._doc_freq[term_id] -= 1
+        self._documents -= 1
+        self.version += 1
+        self._refit_if_drifted()
+    
+    def drifted(self, version: int, tolerance: float) -> bool:
+        """Whether weights fitted at ``version`` may be off by more than ``tolerance``
+        
+        Counts documents added, removed or given new skills since then,
+        relative to the corpus size; at a tolerance of 0 any of them counts.
+        """
+        return abs(self.version - version) > tolerance * max(self._documents, 1)
+    
+    def _refit_if_drifted(self) -> None:
+        if self.drifted(self._weights.version, self.REFIT_TOLERANCE):
+            self._weights = SkillWeights(self._doc_freq, self._documents, self.version)
+    
+    def weights(self) -> SkillWeights:
+        """The IDF weights as of the last refit"""
+        return self._weights
+    
+    def term_counts(self, skills: Iterable[str]) -> TermCounts:
+        """Term counts of a skill list against the vocabulary, shared with indexed records where equal.
+        
+        Tokens outside the vocabulary are kept (keyed by the token itself) with
+        the IDF of an unseen term, so two unindexed lists still compare sensibly.
+        """
+        counts: Dict[Union[int, str], int] = {}
+        for token in self.tokens(skills):
+            term = self.vocabulary.get(token, token)
+            counts[term] = counts.get(term, 0) + 1
+        counts = tuple(counts.items())
+        return self._shared_counts.get(counts, counts)
+    
+    def transform(self, skills: List[str]) -> Dict[Union[int, str], float]:
+        """Vectorize an ad-hoc skill list against the fitted vocabulary"""
+        return self.weights().weigh(self.term_counts(skills))
+    
+    @staticmethod
+    def similarity(vec_a: Dict[Union[int, str], float],
+                   vec_b: Dict[Union[int, str], float]) -> float:
+        """Cosine similarity of two normalized sparse vectors"""
+        if len(vec_a) > len(vec_b):
+            vec_a, vec_b = vec_b, vec_a
+        return sum(w * vec_b.get(term, 0.0) for term, w in vec_a.items())
+
+skills_index = SkillsIndex()
+
+def _skills_listener(kind: str, skills_field: str):
+    """Keep the skills index in step with writes to a record table"""
+    def listener(old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        if new is None:
+            skills_index.remove(kind, old["id"])
+        elif old is None or old.get(skills_field) != new.get(skills_field):
+            skills_index.add(kind, new["id"], new.get(skills_field, []))
+    return listener
+
+candidates_db.subscribe(_skills_listener("candidate", "skills"))
+industries_db.subscribe(_skills_listener("industry", "required_skills"))
+
+# Counters behind /stats, adjusted on every write
+registry_stats = RegistryStats()
+candidates_db.subscribe(lambda old, new: registry_stats.candidate_changed(old, new))
+industries_db.subscribe(lambda old, new: registry_stats.industry_changed(old, new))
+
+def rebuild_derived_indexes() -> None:
+    """Rebuild in-process indexes from the store (startup, or when other workers' writes can't be replayed)"""
+    global skills_index, registry_stats, feature_cache, match_index
+    registry_stats = RegistryStats.recompute(candidates_db.values(), industries_db.values())
+    feature_cache = FeatureCache()
+    rebuilt = SkillsIndex()
+    for candidate in candidates_db.values():
+        rebuilt.add("candidate", candidate["id"], candidate.get("skills", []))
+    for industry in industries_db.values():
+        rebuilt.add("industry", industry["id"], industry.get("required_skills", []))
+    skills_index = rebuilt
+    match_cache.reset()
+    recommendations.reset()
+    component_matrices.reset()
+    semantic_index.reset()
+    match_index = MatchIndex()
+    for candidate in candidates_db.values():
+        match_index.candidate_changed(None, feature_cache.candidate_by_id(candidate["id"]))
+    for industry in industries_db.values():
+        match_index.industry_changed(None, feature_cache.industry_by_id(industry["id"]))
+    match_states.reset()
+
+def export_derived_indexes() -> Dict[str, Any]:
+    """The derived indexes as one picklable object, for snapshots"""
+    return {
+        "skills_index": skills_index, "registry_stats": registry_stats, "feature_cache": feature_cache,
+        "match_index": match_index, "interned_sets": _interned_sets,
+        # Compiled features hold qualification token ids in this process's numbering
+        "qualification_tokens": qualification_vocabulary.tokens
+    }
+
+def restore_derived_indexes(state: Dict[str, Any]) -> None:
+    """Install indexes saved by export_derived_indexes in place of a rebuild
+
+    Raises ValueError if qualification tokens were already numbered differently.
+    """
+    global skills_index, registry_stats, feature_cache, match_index
+    qualification_vocabulary.adopt(state["qualification_tokens"])
+    _interned_sets.update(state["interned_sets"])
+    skills_index = state["skills_index"]
+    registry_stats = state["registry_stats"]
+    feature_cache = state["feature_cache"]
+    match_index = state["match_index"]
+    match_states.reset()
+    match_cache.reset()
+    recommendations.reset()
+    component_matrices.reset()
+    semantic_index.reset()
+
+def new_candidate_record(candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """Stamp id, registration date and status onto validated candidate fields"""
+    candidate_data = dict(candidate)
+    candidate_data.update({
+        "id": str(uuid.uuid4()),
+        "registration_date": datetime.now().isoformat(),
+        "status": "active"
+    })
+    return candidate_data
+
+def new_industry_record(industry: Dict[str, Any]) -> Dict[str, Any]:
+    """Stamp id, registration date, status and fill count onto validated industry fields"""
+    industry_data = dict(industry)
+    industry_data.update({
+        "id": str(uuid.uuid4()),
+        "registration_date": datetime.now().isoformat(),
+        "status": "active",
+        "filled_positions": 0
+    })
+    return industry_data
 
 # Dummy data for testing
 def initialize_dummy_data():
@@ -207,54 +606,48 @@ def initialize_dummy_data():
     ]
     
     # Register dummy candidates
-    for candidate in dummy_candidates:
-        candidate_id = str(uuid.uuid4())
-        candidate_data = candidate.copy()
-        candidate_data.update({
-            "id": candidate_id,
-            "registration_date": datetime.now().isoformat(),
-            "status": "active"
-        })
-        candidates_db[candidate_id] = candidate_data
+    candidates_db.put_many(new_candidate_record(candidate) for candidate in dummy_candidates)
     
     # Register dummy industries
-    for industry in dummy_industries:
-        industry_id = str(uuid.uuid4())
-        industry_data = industry.copy()
-        industry_data.update({
-            "id": industry_id,
-            "registration_date": datetime.now().isoformat(),
-            "status": "active",
-            "filled_positions": 0
-        })
-        industries_db[industry_id] = industry_data
+    industries_db.put_many(new_industry_record(industry) for industry in dummy_industries)
 
 class MatchingEngine:
     """AI-powered matching engine for candidates and internships"""
     
+    # City -> the district, state, region and other areas containing it
+    REGION_MAPPING: Dict[str, List[str]] = location_hierarchy.areas
+    
     @staticmethod
-    def calculate_skills_similarity(candidate_skills: List[str], required_skills: List[str]) -> float:
-        """Calculate cosine similarity between candidate skills and required skills"""
+    def _jaccard_similarity(candidate_skills: List[str], required_skills: List[str]) -> float:
+        """Intersection-based similarity for skills that yield no TF-IDF tokens"""
+        candidate_set = set(skill.lower() for skill in candidate_skills)
+        required_set = set(skill.lower() for skill in required_skills)
+        intersection = len(candidate_set.intersection(required_set))
+        union = len(candidate_set.union(required_set))
+        return intersection / union if union > 0 else 0.0
+    
+    @classmethod
+    def calculate_skills_similarity(cls, candidate_skills: List[str], required_skills: List[str],
+                                    candidate_vector: Optional[Dict[Union[int, str], float]] = None,
+                                    required_vector: Optional[Dict[Union[int, str], float]] = None) -> float:
+        """Calculate cosine similarity between candidate skills and required skills
+        
+        Vectors come from the shared skills index; pass cached record vectors
+        to skip vectorizing the skill lists.
+        """
         if not candidate_skills or not required_skills:
             return 0.0
         
-        # Create skill documents
-        candidate_doc = " ".join(candidate_skills)
-        required_doc = " ".join(required_skills)
+        if candidate_vector is None:
+            candidate_vector = skills_index.transform(candidate_skills)
+        if required_vector is None:
+            required_vector = skills_index.transform(required_skills)
         
-        # Calculate TF-IDF and cosine similarity
-        vectorizer = TfidfVectorizer()
-        try:
-            tfidf_matrix = vectorizer.fit_transform([candidate_doc, required_doc])
-            similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-            return float(similarity)
-        except:
+        if not candidate_vector and not required_vector:
             # Fallback to simple intersection-based similarity
-            candidate_set = set(skill.lower() for skill in candidate_skills)
-            required_set = set(skill.lower() for skill in required_skills)
-            intersection = len(candidate_set.intersection(required_set))
-            union = len(candidate_set.union(required_set))
-            return intersection / union if union > 0 else 0.0
+            return cls._jaccard_similarity(candidate_skills, required_skills)
+        
+        return float(SkillsIndex.similarity(candidate_vector, required_vector))
     
     @staticmethod
     def calculate_location_preference_score(candidate_preferences: List[str], 
@@ -263,29 +656,8 @@ class MatchingEngine:
         if not candidate_preferences:
             return 0.5  # Neutral score if no preference specified
         
-        # Direct match
-        if industry_location in candidate_preferences:
-            return 1.0
-        
-        # Regional proximity (simplified)
-        region_mapping = {
-            "Delhi": ["NCR", "North India"],
-            "Mumbai": ["Maharashtra", "West India"], 
-            "Bangalore": ["Karnataka", "South India"],
-            "Hyderabad": ["Telangana", "South India"],
-            "Chennai": ["Tamil Nadu", "South India"],
-            "Kolkata": ["West Bengal", "East India"],
-            "Pune": ["Maharashtra", "West India"],
-            "Ahmedabad": ["Gujarat", "West India"],
-            "Patna": ["Bihar", "East India"]
-        }
-        
-        industry_region = region_mapping.get(industry_location, [])
-        for pref in candidate_preferences:
-            if pref in industry_region:
-                return 0.7
-        
-        return 0.2  # Low score for no regional match
+        # 1.0 for the place itself, 0.7 for an area containing it or a nearby city, else 0.2
+        return max(location_hierarchy.score(pref, industry_location) for pref in candidate_preferences)
     
     @staticmethod
     def calculate_affirmative_action_bonus(candidate: Dict[str, Any]) -> float:
@@ -319,67 +691,156 @@ class MatchingEngine:
     def calculate_qualification_match(candidate_qualifications: List[str], 
                                     preferred_qualifications: List[str]) -> float:
         """Calculate qualification match score"""
-        if not preferred_qualifications:
+        return MatchingEngine.qualification_score(MatchingEngine.qualification_keys(candidate_qualifications),
+                                                  MatchingEngine.qualification_keys(preferred_qualifications))
+    
+    @staticmethod
+    def qualification_key(qualification: str) -> Optional[Union[FrozenSet[int], str]]:
+        """What a qualification is compared by: its token id set, or with substring
+        matching the lowercased string. None for qualifications without tokens."""
+        if QUALIFICATION_MATCHING == "substring":
+            return qualification.lower()
+        return qualification_token_ids(qualification) or None
+    
+    @classmethod
+    def qualification_keys(cls, qualifications: Iterable[str]) -> FrozenSet[Union[FrozenSet[int], str]]:
+        return _intern_set(key for key in map(cls.qualification_key, qualifications) if key is not None)
+    
+    @classmethod
+    def qualification_score(cls, candidate_quals: FrozenSet[Union[FrozenSet[int], str]],
+                            preferred_quals: FrozenSet[Union[FrozenSet[int], str]]) -> float:
+        """Score two sets of qualification keys"""
+        if not preferred_quals:
             return 0.5  # Neutral if no preference
         
-        candidate_quals = set(qual.lower() for qual in candidate_qualifications)
-        preferred_quals = set(qual.lower() for qual in preferred_qualifications)
-        
         # Direct match
-        if candidate_quals.intersection(preferred_quals):
+        if candidate_quals & preferred_quals:
             return 1.0
         
-        # Partial match based on keywords
-        keywords_match = 0
-        for c_qual in candidate_quals:
-            for p_qual in preferred_quals:
-                if any(keyword in c_qual for keyword in p_qual.split()) or \
-                   any(keyword in p_qual for keyword in c_qual.split()):
-                    keywords_match += 1
-        
+        # Partial match based on keywords: pairs sharing a token
+        if QUALIFICATION_MATCHING == "tokens":
+            keywords_match = sum(1 for c_qual in candidate_quals for p_qual in preferred_quals
+                                 if not c_qual.isdisjoint(p_qual))
+        else:
+            keywords_match = sum(
+                1 for c_qual in candidate_quals for p_qual in preferred_quals
+                if cls.qualification_keywords_match(c_qual, p_qual)
+            )
         return min(keywords_match * 0.3, 0.8)
     
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def qualification_keywords_match(c_qual: str, p_qual: str) -> bool:
+        """Whether two lowercased qualifications share a keyword (substring match)"""
+        return any(keyword in c_qual for keyword in p_qual.split()) or \
+            any(keyword in p_qual for keyword in c_qual.split())
+    
     @classmethod
     def calculate_match_score(cls, candidate: Dict[str, Any], 
-                            industry: Dict[str, Any]) -> Dict[str, Any]:
+                            industry: Dict[str, Any], weights: Weights = DEFAULT_WEIGHTS,
+                            skills: Optional[SkillWeights] = None) -> Dict[str, Any]:
         """Calculate comprehensive match score between candidate and industry"""
+        return cls.score_features(feature_cache.candidate(candidate), feature_cache.industry(industry), weights,
+                                  skills)
+    
+    @classmethod
+    def score_features(cls, candidate: "CandidateFeatures", industry: "IndustryFeatures",
+                       weights: Weights = DEFAULT_WEIGHTS, skills: Optional[SkillWeights] = None) -> Dict[str, Any]:
+        """Score a pair from precompiled features; only true pair interactions are computed here
         
-        # Component scores
-        skills_score = cls.calculate_skills_similarity(
-            candidate.get("skills", []), 
-            industry.get("required_skills", [])
-        )
-        
-        location_score = cls.calculate_location_preference_score(
-            candidate.get("location_preference", []),
-            industry.get("location", "")
+        ``skills`` are the TF-IDF weights to score with, by default the
+        current ones; pass the weights pinned with a registry version to
+        score that version.
+        """
+        profile = current_profile.get()
+        if profile is not None:
+            return cls._score_features_timed(candidate, industry, profile, weights, skills)
+        return cls.assemble_score(
+            candidate,
+            cls.skills_component(candidate, industry, skills),
+            cls.location_component(candidate, industry),
+            cls.qualification_component(candidate, industry),
+            cls.sector_component(candidate, industry),
+            weights
         )
-        
-        qualification_score = cls.calculate_qualification_match(
-            candidate.get("qualifications", []),
-            industry.get("preferred_qualifications", [])
+    
+    @classmethod
+    def _score_features_timed(cls, candidate: "CandidateFeatures", industry: "IndustryFeatures",
+                              profile: RequestProfile, weights: Weights = DEFAULT_WEIGHTS,
+                              skills: Optional[SkillWeights] = None) -> Dict[str, Any]:
+        """score_features with each component timed into the request profile"""
+        clock = time.perf_counter
+        t0 = clock()
+        skills_score = cls.skills_component(candidate, industry, skills)
+        t1 = clock()
+        location_score = cls.location_component(candidate, industry)
+        t2 = clock()
+        qualification_score = cls.qualification_component(candidate, industry)
+        t3 = clock()
+        sector_score = cls.sector_component(candidate, industry)
+        t4 = clock()
+        details = cls.assemble_score(candidate, skills_score, location_score, qualification_score, sector_score,
+                                     weights)
+        t5 = clock()
+        profile.add_components((("skills", t1 - t0), ("location", t2 - t1), ("qualification", t3 - t2),
+                                ("sector", t4 - t3), ("assemble", t5 - t4)))
+        return details
+    
+    @classmethod
+    def skills_component(cls, candidate: "CandidateFeatures", industry: "IndustryFeatures",
+                         skills: Optional[SkillWeights] = None) -> float:
+        if skills is None:
+            skills = skills_index.weights()
+        return cls.calculate_skills_similarity(
+            candidate.skills,
+            industry.required_skills,
+            skills.vector(candidate.skill_terms),
+            skills.vector(industry.skill_terms)
         )
-        
-        affirmative_bonus = cls.calculate_affirmative_action_bonus(candidate)
-        
+    
+    @staticmethod
+    def location_component(candidate: "CandidateFeatures", industry: "IndustryFeatures") -> float:
+        if not candidate.location_preferences:
+            return 0.5  # Neutral score if no preference specified
+        if industry.location in candidate.location_preferences:
+            return 1.0
+        if candidate.location_preferences & industry.regions:
+            return 0.7
+        return 0.2
+    
+    @classmethod
+    def qualification_component(cls, candidate: "CandidateFeatures", industry: "IndustryFeatures") -> float:
+        return cls.qualification_score(candidate.qualifications, industry.qualifications)
+    
+    @staticmethod
+    def sector_component(candidate: "CandidateFeatures", industry: "IndustryFeatures") -> float:
         # Sector preference score
-        sector_score = 1.0 if industry.get("sector", "") in candidate.get("preferred_sectors", []) else 0.3
+        return 1.0 if industry.sector in candidate.preferred_sectors else 0.3
+    
+    @staticmethod
+    def assemble_score(candidate: "CandidateFeatures", skills_score: float, location_score: float,
+                       qualification_score: float, sector_score: float,
+                       weights: Weights = DEFAULT_WEIGHTS) -> Dict[str, Any]:
+        """Weighted overall score and the rounded per-component breakdown
         
-        # Experience penalty for over-qualification (if specified)
-        experience_penalty = 0.0
-        if candidate.get("experience_months", 0) > 24:  # More than 2 years
-            experience_penalty = 0.1
+        ``weights`` defaults to the standard policy (DEFAULT_WEIGHTS); the
+        breakdown always reports the unweighted components.
+        """
+        affirmative_bonus = candidate.affirmative_bonus
+        experience_penalty = candidate.experience_penalty
+        w_skills, w_location, w_qualification, w_sector, w_base, w_bonus, w_penalty = weights
         
-        # Weighted final score
+        # Weighted final score (by default 35% skills, 20% location, 15% each
+        # qualification and sector, plus a 15% base score)
         base_score = (
-            skills_score * 0.35 +           # 35% weight
-            location_score * 0.20 +         # 20% weight  
-            qualification_score * 0.15 +    # 15% weight
-            sector_score * 0.15 +           # 15% weight
-            0.15                            # 15% base score
+            skills_score * w_skills +
+            location_score * w_location +
+            qualification_score * w_qualification +
+            sector_score * w_sector +
+            w_base
         )
         
-        final_score = min(base_score + affirmative_bonus - experience_penalty, 1.0)
+        final_score = min(base_score + affirmative_bonus * w_bonus - experience_penalty * w_penalty, 1.0)
         
         return {
             "overall_score": round(final_score, 3),
@@ -391,37 +852,1208 @@ class MatchingEngine:
             "experience_penalty": round(experience_penalty, 3)
         }
 
-# API Endpoints
-@app.on_event("startup")
-async def startup_event():
-    """Initialize dummy data on startup"""
-    initialize_dummy_data()
-    logger.info(f"Initialized {len(candidates_db)} candidates and {len(industries_db)} industries")
+# Feature sets repeat across many records (same qualifications, places,
+# sectors), so compiled features share one copy of each distinct set
+_interned_sets: Dict[FrozenSet[str], FrozenSet[str]] = {}
+
+def _intern_set(values: Iterable[str]) -> FrozenSet[str]:
+    values = frozenset(values)
+    return _interned_sets.setdefault(values, values)
+
+@dataclass(frozen=True, slots=True)
+class CandidateFeatures:
+    """Candidate-only inputs to the scorer, compiled once per record version"""
+    id: str
+    skills: Tuple[str, ...]
+    skill_terms: TermCounts    # SkillsIndex.term_counts of the skills
+    qualifications: FrozenSet[Union[FrozenSet[int], str]]    # MatchingEngine.qualification_key
+    location_preferences: FrozenSet[str]
+    preferred_sectors: FrozenSet[str]
+    affirmative_bonus: float
+    experience_penalty: float
+    
+    @classmethod
+    def compile(cls, candidate: Dict[str, Any]) -> "CandidateFeatures":
+        return cls(
+            id=candidate.get("id", ""),
+            skills=tuple(candidate.get("skills", [])),
+            skill_terms=skills_index.term_counts(candidate.get("skills", [])),
+            qualifications=MatchingEngine.qualification_keys(candidate.get("qualifications", [])),
+            location_preferences=_intern_set(
+                map(location_hierarchy.canonical, candidate.get("location_preference", []))),
+            preferred_sectors=_intern_set(candidate.get("preferred_sectors", [])),
+            affirmative_bonus=MatchingEngine.calculate_affirmative_action_bonus(candidate),
+            # Experience penalty for over-qualification (more than 2 years)
+            experience_penalty=0.1 if candidate.get("experience_months", 0) > 24 else 0.0
+        )
+
+@dataclass(frozen=True, slots=True)
+class IndustryFeatures:
+    """Internship-only inputs to the scorer, compiled once per record version"""
+    id: str
+    required_skills: Tuple[str, ...]
+    skill_terms: TermCounts    # SkillsIndex.term_counts of the required skills
+    qualifications: FrozenSet[Union[FrozenSet[int], str]]    # keys of the preferred qualifications
+    location: str
+    regions: FrozenSet[str]
+    sector: str
+    has_open_seats: bool = True
+    
+    @classmethod
+    def compile(cls, industry: Dict[str, Any]) -> "IndustryFeatures":
+        location = location_hierarchy.canonical(industry.get("location", ""))
+        return cls(
+            id=industry.get("id", ""),
+            required_skills=tuple(industry.get("required_skills", [])),
+            skill_terms=skills_index.term_counts(industry.get("required_skills", [])),
+            qualifications=MatchingEngine.qualification_keys(industry.get("preferred_qualifications", [])),
+            location=location,
+            regions=location_hierarchy.nearby(location),
+            sector=industry.get("sector", ""),
+            has_open_seats=industry.get("filled_positions", 0) < industry.get("internship_capacity", 0)
+        )
+
+class FeatureCache:
+    """Compiled features of the stored records, by id
+    
+    Entries are built by table listeners at registration and replaced on
+    update, so lookups by id always see the current record version. Record
+    dicts are not kept: tables may build a fresh dict per read, and holding
+    them would undo the compact record layout. Features of a record dict,
+    which may be stale or ad hoc, are compiled on the spot. A frozen copy
+    answers for one pinned registry version and compiles misses from it.
+    """
+    
+    def __init__(self, registry: Optional[RegistryVersion] = None):
+        self._registry = registry
+        self._candidates: Dict[str, CandidateFeatures] = {}
+        self._industries: Dict[str, IndustryFeatures] = {}
+    
+    def frozen(self, registry: RegistryVersion) -> "FeatureCache":
+        """Copy of the cache as ``registry`` pinned it; call with the store lock held"""
+        frozen = FeatureCache(registry)
+        frozen._candidates, frozen._industries = dict(self._candidates), dict(self._industries)
+        return frozen
+    
+    @staticmethod
+    def candidate(record: Dict[str, Any]) -> CandidateFeatures:
+        return CandidateFeatures.compile(record)
+    
+    @staticmethod
+    def industry(record: Dict[str, Any]) -> IndustryFeatures:
+        return IndustryFeatures.compile(record)
+    
+    def candidate_by_id(self, candidate_id: str) -> CandidateFeatures:
+        features = self._candidates.get(candidate_id)
+        if features is None:
+            table = candidates_db if self._registry is None else self._registry.candidates
+            features = self._candidates[candidate_id] = CandidateFeatures.compile(table[candidate_id])
+        return features
+    
+    def industry_by_id(self, industry_id: str) -> IndustryFeatures:
+        features = self._industries.get(industry_id)
+        if features is None:
+            table = industries_db if self._registry is None else self._registry.industries
+            features = self._industries[industry_id] = IndustryFeatures.compile(table[industry_id])
+        return features
+    
+    def candidate_changed(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]
+                          ) -> Tuple[Optional[CandidateFeatures], Optional[CandidateFeatures]]:
+        """Recompile a written record; returns (features replaced, features now)"""
+        previous = None if old is None else self._candidates.pop(old["id"], None) or CandidateFeatures.compile(old)
+        if new is None:
+            return previous, None
+        features = self._candidates[new["id"]] = CandidateFeatures.compile(new)
+        return previous, features
+    
+    def industry_changed(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]
+                         ) -> Tuple[Optional[IndustryFeatures], Optional[IndustryFeatures]]:
+        previous = None if old is None else self._industries.pop(old["id"], None) or IndustryFeatures.compile(old)
+        if new is None:
+            return previous, None
+        features = self._industries[new["id"]] = IndustryFeatures.compile(new)
+        return previous, features
+
+# Kept current by the match index listener, which moves index entries from the replaced features
+feature_cache = FeatureCache()
+
+class _Postings:
+    """Inverted index from overlap keys to records, plus upper-bound buckets
+    
+    Records are numbered in registration order and both maps hold compact
+    int32 arrays of those sequence numbers, so pruned searches can break
+    score ties exactly like a scan of the table would. A record's previous
+    keys and bucket are derived from its previous version when it changes,
+    rather than stored. Frozen copies share the arrays, which are copied
+    on the first write after each freeze.
+    """
+    
+    def __init__(self):
+        self.postings: Dict[str, array] = {}
+        self.buckets: Dict[Any, array] = {}
+        self.seq: Dict[str, int] = {}
+        self.ids: List[Optional[str]] = []
+        # Keys of the arrays no frozen copy shares, which can be changed in place
+        self._owned_postings: set = set()
+        self._owned_buckets: set = set()
+    
+    def frozen(self) -> "_Postings":
+        """Copy as of now, for searching without the store lock; call with it held"""
+        frozen = _Postings()
+        frozen.postings, frozen.buckets = dict(self.postings), dict(self.buckets)
+        frozen.seq, frozen.ids = dict(self.seq), list(self.ids)
+        self._owned_postings.clear()
+        self._owned_buckets.clear()
+        return frozen
+    
+    @staticmethod
+    def _writable(table: Dict[Any, array], owned: set, key: Any) -> array:
+        """The array of ``key`` (a new one if there is none), copied first if a frozen copy may share it"""
+        members = table.get(key)
+        if members is None:
+            members = table[key] = array("i")
+        elif key not in owned:
+            members = table[key] = array("i", members)
+        owned.add(key)
+        return members
+    
+    @classmethod
+    def _discard(cls, table: Dict[Any, array], owned: set, key: Any, seq: int) -> None:
+        members = table.get(key)
+        if members is not None and seq in members:
+            members = cls._writable(table, owned, key)
+            members.remove(seq)
+            if not members:
+                del table[key]
+                owned.discard(key)
+    
+    def add(self, record_id: str, keys: FrozenSet[str], bucket: Any,
+            old_keys: FrozenSet[str] = frozenset(), old_bucket: Any = None) -> None:
+        """Index a new record, or move an existing one from its old keys and bucket"""
+        seq = self.seq.get(record_id)
+        if seq is None:
+            seq = self.seq[record_id] = len(self.ids)
+            self.ids.append(record_id)
+            old_keys, old_bucket = frozenset(), None
+        for key in old_keys - keys:
+            self._discard(self.postings, self._owned_postings, key, seq)
+        for key in keys - old_keys:
+            self._writable(self.postings, self._owned_postings, key).append(seq)
+        if old_bucket is None or old_bucket != bucket:
+            if old_bucket is not None:
+                self._discard(self.buckets, self._owned_buckets, old_bucket, seq)
+            self._writable(self.buckets, self._owned_buckets, bucket).append(seq)
+    
+    def remove(self, record_id: str, keys: FrozenSet[str], bucket: Any) -> None:
+        seq = self.seq.pop(record_id, None)
+        if seq is None:
+            return
+        for key in keys:
+            self._discard(self.postings, self._owned_postings, key, seq)
+        self._discard(self.buckets, self._owned_buckets, bucket, seq)
+        self.ids[seq] = None
+    
+    def lookup(self, keys: Iterable[str]) -> np.ndarray:
+        """Sequence numbers of records sharing at least one key, ascending"""
+        found = [np.frombuffer(self.postings[key], dtype=np.int32) for key in keys if key in self.postings]
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int32)
+
+class MatchIndex:
+    """Inverted indexes for pruned candidate- and internship-centric matching
+    
+    A pair can only score skills, location or sector above their floor if the
+    two records share a skill token (or, for token-less skills, a skill), a
+    place (location or region) or a sector. Pairs without any overlap are
+    bounded by the floors of those components, which depend only on a few
+    per-record properties, so records are also bucketed by those properties
+    and a whole bucket is skipped when its bound cannot reach the top-N.
+    
+    Writes update the index in place under the store lock; searches run on
+    a frozen copy (see MatchState) with the features and TF-IDF weights
+    pinned at the same moment.
+    """
+    
+    def __init__(self):
+        self.candidates = _Postings()
+        self.industries = _Postings()
+        # One shared tuple per distinct candidate bucket
+        self._buckets: Dict[Tuple[bool, float, float], Tuple[bool, float, float]] = {}
+    
+    def frozen(self) -> "MatchIndex":
+        """Copy as of now, for searching without the store lock; call with it held"""
+        frozen = MatchIndex()
+        frozen.candidates, frozen.industries = self.candidates.frozen(), self.industries.frozen()
+        frozen._buckets = self._buckets
+        return frozen
+    
+    @staticmethod
+    def _skill_keys(skills: Iterable[str]) -> set:
+        skills = list(skills)
+        return ({sys.intern(f"token:{t}") for t in skills_index.tokens(skills)} |
+                {sys.intern(f"skill:{skill.lower()}") for skill in skills})
+    
+    @classmethod
+    def candidate_keys(cls, features: CandidateFeatures) -> FrozenSet[str]:
+        return frozenset(cls._skill_keys(features.skills) |
+                         {sys.intern(f"place:{p}") for p in features.location_preferences} |
+                         {sys.intern(f"sector:{s}") for s in features.preferred_sectors})
+    
+    @classmethod
+    def industry_keys(cls, features: IndustryFeatures) -> FrozenSet[str]:
+        return frozenset(cls._skill_keys(features.required_skills) |
+                         {sys.intern(f"place:{p}") for p in features.regions | {features.location}} |
+                         {sys.intern(f"sector:{features.sector}")})
+    
+    def _candidate_entry(self, features: CandidateFeatures) -> Tuple[FrozenSet[str], Tuple[bool, float, float]]:
+        bucket = (bool(features.location_preferences), features.affirmative_bonus, features.experience_penalty)
+        return self.candidate_keys(features), self._buckets.setdefault(bucket, bucket)
+    
+    def _industry_entry(self, features: IndustryFeatures) -> Tuple[FrozenSet[str], bool]:
+        return self.industry_keys(features), bool(features.qualifications)
+    
+    def candidate_changed(self, old: Optional[CandidateFeatures], new: Optional[CandidateFeatures]) -> None:
+        """Move a candidate from the entry of its old features to that of its new ones"""
+        previous = self._candidate_entry(old) if old is not None else (frozenset(), None)
+        if new is None:
+            self.candidates.remove(old.id, *previous)
+            return
+        self.candidates.add(new.id, *self._candidate_entry(new), *previous)
+    
+    def industry_changed(self, old: Optional[IndustryFeatures], new: Optional[IndustryFeatures]) -> None:
+        previous = self._industry_entry(old) if old is not None else (frozenset(), None)
+        if new is None:
+            self.industries.remove(old.id, *previous)
+            return
+        self.industries.add(new.id, *self._industry_entry(new), *previous)
+    
+    @staticmethod
+    def no_overlap_bound(has_location_preferences: bool, has_preferred_qualifications: bool,
+                         affirmative_bonus: float, experience_penalty: float) -> float:
+        """Highest rounded overall score a pair without skill/place/sector overlap can reach
+        
+        Mirrors the arithmetic of MatchingEngine.score_features with skills at
+        0.0, sector at 0.3, location at its no-match value and qualification
+        at its maximum, so it is never below the real score.
+        """
+        location_score = 0.2 if has_location_preferences else 0.5
+        qualification_score = 1.0 if has_preferred_qualifications else 0.5
+        base_score = (
+            0.0 * 0.35 +
+            location_score * 0.20 +
+            qualification_score * 0.15 +
+            0.3 * 0.15 +
+            0.15
+        )
+        return round(min(base_score + affirmative_bonus - experience_penalty, 1.0), 3)
+    
+    @staticmethod
+    def _search(overlapping: np.ndarray, buckets: List[Tuple[float, array]],
+                ids: List[Optional[str]], score, top_n: int, min_score_threshold: float,
+                cancel: Optional[threading.Event] = None):
+        """Exact top-N over overlapping ids plus every bucket whose bound can still compete
+        
+        Returns ((score, match_details, id) best first, number of pairs scored).
+        Raises MatchCancelled once ``cancel`` is set.
+        """
+        heap: List[Tuple[float, int, str, Dict[str, Any]]] = []
+        scored = 0
+        
+        def offer(seq: int) -> None:
+            nonlocal scored
+            record_id = ids[seq]
+            details = score(record_id)
+            if details is None:
+                return
+            scored += 1
+            if cancel is not None and scored % 1024 == 0 and cancel.is_set():
+                raise MatchCancelled()
+            overall = details["overall_score"]
+            if overall < min_score_threshold:
+                return
+            entry = (overall, -seq, record_id, details)
+            if len(heap) < top_n:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+        
+        if top_n > 0:
+            for seq in overlapping.tolist():
+                offer(seq)
+            for bound, members in sorted(buckets, key=lambda b: b[0], reverse=True):
+                bar = max(min_score_threshold, heap[0][0]) if len(heap) == top_n else min_score_threshold
+                if bound < bar:
+                    break
+                members = np.frombuffer(members, dtype=np.int32)
+                for seq in members[~np.isin(members, overlapping)].tolist():
+                    offer(seq)
+        
+        with stage_timer("sort"):
+            heap.sort(reverse=True)
+        return [(entry[0], entry[3], entry[2]) for entry in heap], scored
+    
+    def match_industry(self, industry: Dict[str, Any], cache: FeatureCache, skills: SkillWeights,
+                       top_n: int, min_score_threshold: float, cancel: Optional[threading.Event] = None):
+        """Best candidates for an internship; same result as scoring every candidate
+        
+        Features come from ``cache`` and skills are scored with ``skills``,
+        which should be pinned together with this index.
+        """
+        features = cache.industry_by_id(industry["id"])
+        overlapping = self.candidates.lookup(self.industry_keys(features))
+        buckets = [
+            (self.no_overlap_bound(has_prefs, bool(features.qualifications), bonus, penalty), ids)
+            for (has_prefs, bonus, penalty), ids in self.candidates.buckets.items()
+        ]
+        
+        def score(candidate_id: str) -> Optional[Dict[str, Any]]:
+            return MatchingEngine.score_features(cache.candidate_by_id(candidate_id), features, skills=skills)
+        
+        return self._search(overlapping, buckets, self.candidates.ids, score, top_n, min_score_threshold, cancel)
+    
+    def match_candidate(self, candidate: Dict[str, Any], cache: FeatureCache, skills: SkillWeights,
+                        top_n: int, min_score_threshold: float, cancel: Optional[threading.Event] = None):
+        """Best open internships for a candidate; same result as scoring every internship
+        
+        Reads features and skills like match_industry.
+        """
+        features = cache.candidate_by_id(candidate["id"])
+        overlapping = self.industries.lookup(self.candidate_keys(features))
+        buckets = [
+            (self.no_overlap_bound(bool(features.location_preferences), has_quals,
+                                   features.affirmative_bonus, features.experience_penalty), ids)
+            for has_quals, ids in self.industries.buckets.items()
+        ]
+        
+        def score(industry_id: str) -> Optional[Dict[str, Any]]:
+            industry = cache.industry_by_id(industry_id)
+            if not industry.has_open_seats:
+                return None
+            return MatchingEngine.score_features(features, industry, skills=skills)
+        
+        return self._search(overlapping, buckets, self.industries.ids, score, top_n, min_score_threshold, cancel)
+
+match_index = MatchIndex()
+candidates_db.subscribe(lambda old, new: match_index.candidate_changed(*feature_cache.candidate_changed(old, new)))
+industries_db.subscribe(lambda old, new: match_index.industry_changed(*feature_cache.industry_changed(old, new)))
+
+class MatchState(NamedTuple):
+    """A registry version with the features, index and TF-IDF weights searched over it
+    
+    Nothing in it changes after it is pinned, so searches read it without
+    the store lock.
+    """
+    registry: RegistryVersion
+    features: FeatureCache
+    index: MatchIndex
+    skills: SkillWeights
+
+class MatchStatePins:
+    """The MatchState of the latest registry version, copied from the live indexes at most once per version"""
+    
+    def __init__(self):
+        self._state: Optional[MatchState] = None
+    
+    def reset(self) -> None:
+        """Copy again at the next pin, e.g. after the derived indexes were rebuilt"""
+        self._state = None
+    
+    @staticmethod
+    def _current(state: Optional[MatchState], version: RegistryVersion) -> bool:
+        return state is not None and state.registry.candidates is version.candidates and \
+            state.registry.industries is version.industries
+    
+    def pin(self) -> MatchState:
+        """The registry and its derived indexes as of now; only takes the store lock if the registry changed"""
+        state = self._state
+        if self._current(state, store.pin()):
+            return state
+        with store.lock:
+            version = store.pin()
+            state = self._state
+            if not self._current(state, version):
+                state = self._state = MatchState(version, feature_cache.frozen(version), match_index.frozen(),
+                                                 skills_index.weights())
+            return state
+
+match_states = MatchStatePins()
+
+class BatchMatchingEngine:
+    """Vectorized all-pairs scoring with the same rules and weights as MatchingEngine
+
+    Component scores are computed as candidate x internship matrices over
+    blocks of candidates, and only the running top-N pairs are kept between
+    blocks, so memory stays bounded for very large registries.
+    """
+    
+    # Upper bound on candidate x internship cells scored per block
+    BLOCK_CELLS = 2_000_000
+    
+    @staticmethod
+    def _membership(indptr: np.ndarray, codes: np.ndarray, width: int) -> "sparse.csr_matrix":
+        """Binary row x vocabulary matrix of which codes each row contains"""
+        from scipy import sparse
+        matrix = sparse.csr_matrix((np.ones(len(codes)), codes, indptr), shape=(len(indptr) - 1, width))
+        matrix.sum_duplicates()
+        matrix.data[:] = 1.0
+        return matrix
+    
+    @staticmethod
+    def _remap(codes: np.ndarray, values: List[str], vocabulary: Dict[str, int],
+               add: bool = True) -> np.ndarray:
+        """Translate codes into ``vocabulary`` codes by value; -1 for values not in it unless ``add``"""
+        table = np.array([vocabulary.setdefault(v, len(vocabulary)) if add else vocabulary.get(v, -1)
+                          for v in values], dtype=np.int64)
+        return table[codes] if len(codes) else codes
+    
+    @staticmethod
+    def _skill_matrices(candidates: RecordColumns, industries: RecordColumns,
+                        weights: SkillWeights) -> Tuple["sparse.csr_matrix", "sparse.csr_matrix"]:
+        """Normalized TF-IDF rows for both sides, sharing one column space
+        
+        Each distinct skill is tokenized once; a record's term counts are the
+        product of its skill memberships (with repeats) and those per-skill
+        counts, weighted by the IDF row and normalized per row.
+        """
+        from scipy import sparse
+        columns: Dict[Union[int, str], int] = {}
+        
+        def skill_terms(records: RecordColumns, skills_field: str):
+            indptr, codes, values = records.token_lists(skills_field)
+            rows: List[int] = []
+            cols: List[int] = []
+            counts: List[int] = []
+            for value_code, value in enumerate(values):
+                for term, count in skills_index.term_counts((value,)):
+                    rows.append(value_code)
+                    cols.append(columns.setdefault(term, len(columns)))
+                    counts.append(count)
+            return indptr, codes, len(values), (counts, (rows, cols))
+        
+        def weighted(records: RecordColumns, parts, idf: "sparse.dia_matrix") -> "sparse.csr_matrix":
+            indptr, codes, n_values, value_counts = parts
+            membership = sparse.csr_matrix((np.ones(len(codes)), codes, indptr),
+                                           shape=(len(records), n_values))
+            terms = sparse.csr_matrix(value_counts, shape=(n_values, idf.shape[0]), dtype=np.float64)
+            matrix = ((membership @ terms) @ idf).tocsr()
+            norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+            norms[norms == 0.0] = 1.0
+            matrix = (sparse.diags(1.0 / norms) @ matrix).tocsr()
+            matrix.eliminate_zeros()
+            return matrix
+        
+        c_parts = skill_terms(candidates, "skills")
+        i_parts = skill_terms(industries, "required_skills")
+        # An empty column space still gets one (all-zero) column
+        idf = sparse.diags(np.array([weights.idf_of(term) for term in columns] or [0.0], dtype=np.float64))
+        return weighted(candidates, c_parts, idf), weighted(industries, i_parts, idf)
+    
+    @classmethod
+    def _location_scores(cls, candidates: RecordColumns,
+                         industries: RecordColumns) -> Tuple[np.ndarray, np.ndarray]:
+        """Candidate x distinct-location scores plus each internship's location code"""
+        from scipy import sparse
+        location_codes, locations = industries.categories("location", "")
+        indptr, pref_codes, places = candidates.token_lists("location_preference")
+        prefs = cls._membership(indptr, pref_codes, len(places))
+        table = location_hierarchy.score_table(places, locations)
+        
+        is_direct = (prefs @ sparse.csr_matrix(table == 1.0)).toarray() > 0
+        is_regional = (prefs @ sparse.csr_matrix(table == 0.7)).toarray() > 0
+        scores = np.where(is_direct, 1.0, np.where(is_regional, 0.7, 0.2))
+        scores[np.diff(indptr) == 0] = 0.5
+        return scores, location_codes
+    
+    @classmethod
+    def _sector_scores(cls, candidates: RecordColumns,
+                       industries: RecordColumns) -> Tuple[np.ndarray, np.ndarray]:
+        """Candidate x distinct-sector scores plus each internship's sector code"""
+        sector_codes, sector_values = industries.categories("sector", "")
+        sectors: Dict[str, int] = {}
+        sector_codes = cls._remap(sector_codes, sector_values, sectors)
+        indptr, pref_codes, pref_values = candidates.token_lists("preferred_sectors")
+        pref_codes = cls._remap(pref_codes, pref_values, sectors, add=False)
+        counts = np.diff(indptr)
+        rows = np.repeat(np.arange(len(candidates)), counts)
+        known = pref_codes >= 0
+        preferred = np.zeros((len(candidates), len(sectors)), dtype=bool)
+        preferred[rows[known], pref_codes[known]] = True
+        return np.where(preferred, 1.0, 0.3), sector_codes
+    
+    @staticmethod
+    def _qualification_codes(indptr: np.ndarray, codes: np.ndarray, values: List[str],
+                             vocabulary: Dict[Union[FrozenSet[int], str], int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows of codes into ``vocabulary`` of qualification keys; qualifications without one are dropped"""
+        keys = [MatchingEngine.qualification_key(value) for value in values]
+        table = np.array([-1 if key is None else vocabulary.setdefault(key, len(vocabulary)) for key in keys],
+                         dtype=np.int64)
+        codes = table[codes] if len(codes) else codes
+        kept = codes >= 0
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        counts = np.bincount(rows[kept], minlength=len(indptr) - 1)
+        return np.concatenate([[0], np.cumsum(counts)]).astype(np.int64), codes[kept]
+    
+    @staticmethod
+    def _token_membership(token_sets: List[FrozenSet[int]]) -> "sparse.csr_matrix":
+        """Binary qualification x token matrix of token id sets"""
+        from scipy import sparse
+        indices = [sorted(token_ids) for token_ids in token_sets]
+        indptr = np.concatenate([[0], np.cumsum([len(ids) for ids in indices])]).astype(np.int64)
+        flat = np.fromiter((i for ids in indices for i in ids), dtype=np.int64, count=int(indptr[-1]))
+        width = int(flat.max()) + 1 if len(flat) else 1
+        return sparse.csr_matrix((np.ones(len(flat)), flat, indptr), shape=(len(token_sets), width))
+    
+    @classmethod
+    def _qualification_parts(cls, candidates: RecordColumns, industries: RecordColumns):
+        """Factor qualification matching through the distinct qualification keys
+        
+        Exact-match and keyword-match pair counts are sums over individual
+        (candidate qualification, preferred qualification) pairs, so they are
+        products of membership matrices with small key x key tables. With token
+        matching the keyword table is itself a product of token memberships.
+        """
+        c_vocab: Dict[Union[FrozenSet[int], str], int] = {}
+        p_vocab: Dict[Union[FrozenSet[int], str], int] = {}
+        c_indptr, c_codes = cls._qualification_codes(*candidates.token_lists("qualifications"), c_vocab)
+        c_quals = cls._membership(c_indptr, c_codes, len(c_vocab))
+        p_indptr, p_codes = cls._qualification_codes(*industries.token_lists("preferred_qualifications"), p_vocab)
+        p_quals = cls._membership(p_indptr, p_codes, len(p_vocab))
+        
+        exact = np.zeros((len(c_vocab), len(p_vocab)))
+        for c_qual, a in c_vocab.items():
+            b = p_vocab.get(c_qual)
+            if b is not None:
+                exact[a, b] = 1.0
+        if QUALIFICATION_MATCHING == "tokens":
+            c_tokens = cls._token_membership(list(c_vocab))
+            p_tokens = cls._token_membership(list(p_vocab))
+            width = max(c_tokens.shape[1], p_tokens.shape[1])
+            c_tokens.resize((c_tokens.shape[0], width))
+            p_tokens.resize((p_tokens.shape[0], width))
+            keyword = ((c_tokens @ p_tokens.T).toarray() > 0).astype(np.float64)
+        else:
+            keyword = np.zeros((len(c_vocab), len(p_vocab)))
+            for c_qual, a in c_vocab.items():
+                for p_qual, b in p_vocab.items():
+                    keyword[a, b] = MatchingEngine.qualification_keywords_match(c_qual, p_qual)
+        
+        p_quals_t = p_quals.T.toarray()
+        exact_by_industry = exact @ p_quals_t
+        keyword_by_industry = keyword @ p_quals_t
+        no_preference = np.diff(p_indptr) == 0
+        return c_quals, exact_by_industry, keyword_by_industry, no_preference
+    
+    @staticmethod
+    def _adjustments(candidates: RecordColumns) -> Tuple[np.ndarray, np.ndarray]:
+        """Affirmative bonus and experience penalty per candidate
+
+        The bonus depends only on category, district type and past
+        participation, so it is computed once per distinct combination.
+        """
+        category_codes, categories = candidates.categories("category", "General")
+        district_codes, districts = candidates.categories("district_type", "Urban")
+        past = candidates.numbers("past_participation", False).astype(bool)
+        combos, combo_codes = np.unique(np.stack([category_codes, district_codes, past.astype(np.int64)]),
+                                        axis=1, return_inverse=True)
+        bonus = np.array([
+            MatchingEngine.calculate_affirmative_action_bonus({
+                "category": categories[c], "district_type": districts[d], "past_participation": bool(p)
+            })
+            for c, d, p in combos.T.tolist()
+        ], dtype=np.float64)
+        # Experience penalty for over-qualification (more than 2 years), as in CandidateFeatures
+        penalty = np.where(candidates.numbers("experience_months", 0) > 24, 0.1, 0.0)
+        return bonus[combo_codes.reshape(-1)], penalty
+    
+    @staticmethod
+    def _fallback_positions(records: RecordColumns, field: str, skills: "sparse.csr_matrix") -> np.ndarray:
+        """Records with skills but no TF-IDF tokens, scored by Jaccard similarity instead"""
+        return np.flatnonzero((records.list_lengths(field) > 0) & (np.diff(skills.indptr) == 0))
+    
+    @classmethod
+    def prepare(cls, candidates: Union[List[Dict[str, Any]], RecordColumns],
+                industries: Union[List[Dict[str, Any]], RecordColumns],
+                skills: Optional[SkillWeights] = None) -> BatchInputs:
+        """Encode both sides into the arrays the scoring kernels consume
+
+        Takes record lists or, to read a columnar table without building
+        dicts, RecordColumns from RecordTable.columns(). Skills are weighed
+        with ``skills``, by default the current TF-IDF weights.
+        """
+        if not isinstance(candidates, RecordColumns):
+            candidates = DictColumns(candidates)
+        if not isinstance(industries, RecordColumns):
+            industries = DictColumns(industries)
+        c_skills, i_skills = cls._skill_matrices(candidates, industries, skills or skills_index.weights())
+        c_fallback = cls._fallback_positions(candidates, "skills", c_skills)
+        i_fallback = cls._fallback_positions(industries, "required_skills", i_skills)
+        fallback_industry_skills = [industries.record(j)["required_skills"] for j in i_fallback]
+        fallback_scores = np.array([
+            [MatchingEngine._jaccard_similarity(candidates.record(r)["skills"], required)
+             for required in fallback_industry_skills]
+            for r in c_fallback
+        ], dtype=np.float64).reshape(len(c_fallback), len(i_fallback))
+        location_scores, location_codes = cls._location_scores(candidates, industries)
+        sector_scores, sector_codes = cls._sector_scores(candidates, industries)
+        c_quals, exact_by_industry, keyword_by_industry, no_qual_pref = cls._qualification_parts(candidates, industries)
+        bonus, penalty = cls._adjustments(candidates)
+        
+        return BatchInputs(
+            c_skills=c_skills, location_scores=location_scores, sector_scores=sector_scores,
+            c_quals=c_quals, bonus=bonus, penalty=penalty, fallback_rows=c_fallback,
+            fallback_scores=fallback_scores, i_skills_t=i_skills.T.tocsr(), location_codes=location_codes,
+            sector_codes=sector_codes, exact_by_industry=exact_by_industry,
+            keyword_by_industry=keyword_by_industry, no_qual_pref=no_qual_pref, fallback_cols=i_fallback
+        )
+    
+    @classmethod
+    def top_pairs(cls, candidates: List[Dict[str, Any]], industries: List[Dict[str, Any]],
+                  top_n: int, min_score_threshold: float) -> List[Tuple[int, int]]:
+        """Positions of the best (candidate, industry) pairs, best first
+
+        Ranking and tie order match scoring every pair with
+        MatchingEngine.calculate_match_score in nested candidate/industry
+        order and stable-sorting by the rounded overall score.
+        """
+        if top_n <= 0 or not candidates or not industries:
+            return []
+        return cls.rank_pairs(cls.prepare(candidates, industries), top_n, min_score_threshold)
+    
+    # How often a request waiting on shards checks whether it was cancelled
+    CANCEL_POLL_SECONDS = 0.05
+    
+    @classmethod
+    def _shard_result(cls, future, cancel: Optional[threading.Event]):
+        """A shard's result, raising MatchCancelled as soon as ``cancel`` is set"""
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise MatchCancelled()
+            try:
+                return future.result(timeout=cls.CANCEL_POLL_SECONDS if cancel is not None else None)
+            except FutureTimeoutError:
+                continue
+    
+    @classmethod
+    def rank_pairs(cls, inputs: BatchInputs, top_n: int, min_score_threshold: float,
+                   executor: Optional[Executor] = None, shards: int = 1,
+                   cancel: Optional[threading.Event] = None,
+                   weights: Weights = DEFAULT_WEIGHTS) -> List[Tuple[int, int]]:
+        """top_pairs over prepared inputs, optionally under custom score weights
+
+        Given an executor, candidate rows are split into ``shards`` row ranges
+        scored in parallel, and their partial top-N lists are merged.
+        """
+        n, m = inputs.n_rows, inputs.n_cols
+        if top_n <= 0 or n == 0 or m == 0:
+            return []
+        
+        if executor is None or shards <= 1:
+            best_idx, best_scores = top_in_rows(inputs, top_n, min_score_threshold, cls.BLOCK_CELLS, cancel, weights)
+        else:
+            # Events can't be pickled: process shards poll a flag in shared memory, raised
+            # here once the request is cancelled
+            shard_cancel = cancel if isinstance(executor, ThreadPoolExecutor) else SharedCancelFlag()
+            bounds = np.linspace(0, n, min(shards, n) + 1).astype(np.int64)
+            futures = [
+                executor.submit(top_in_rows, inputs.rows(int(a), int(b)), top_n,
+                                min_score_threshold, cls.BLOCK_CELLS, shard_cancel, weights)
+                for a, b in zip(bounds[:-1], bounds[1:]) if b > a
+            ]
+            best_idx, best_scores = np.empty(0, dtype=np.int64), np.empty(0)
+            try:
+                # Shards cover ascending row ranges, so concatenation keeps indices ascending
+                for future in futures:
+                    idx, scores = cls._shard_result(future, cancel)
+                    best_idx, best_scores = select_top(
+                        np.concatenate([best_idx, idx]), np.concatenate([best_scores, scores]), top_n)
+            finally:
+                for future in futures:
+                    future.cancel()
+                if shard_cancel is not cancel:
+                    # Stops shards still running after a failure or cancellation
+                    shard_cancel.set()
+                    shard_cancel.close()
+        
+        order = np.lexsort((best_idx, -best_scores))
+        return [(int(k // m), int(k % m)) for k in best_idx[order]]
+    
+    @classmethod
+    def shortlists(cls, inputs: BatchInputs, size: int, min_score_threshold: float,
+                   cancel: Optional[threading.Event] = None,
+                   progress: Optional[Callable[[int], None]] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Each candidate's best ``size`` internships above the threshold
+
+        Returns parallel (candidate position, industry position, score) arrays.
+        ``progress`` is called with the number of pairs scored after each block.
+        """
+        c_parts, i_parts, s_parts = [], [], []
+        for start, overall in iter_score_blocks(inputs, cls.BLOCK_CELLS, cancel):
+            k = min(size, overall.shape[1])
+            if k <= 0:
+                break
+            cols = np.argpartition(-overall, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(overall, cols, axis=1)
+            rows = np.broadcast_to(np.arange(start, start + overall.shape[0])[:, None], cols.shape)
+            keep = scores >= min_score_threshold
+            c_parts.append(rows[keep])
+            i_parts.append(cols[keep])
+            s_parts.append(scores[keep])
+            if progress is not None:
+                progress(overall.size)
+        if not c_parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(c_parts), np.concatenate(i_parts), np.concatenate(s_parts)
+    
+allocation_engine = AllocationEngine(BatchMatchingEngine.shortlists)
+
+def build_match_entry(candidate: Dict[str, Any], industry: Dict[str, Any],
+                      match_details: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the response entry for a single candidate-internship match"""
+    return {
+        "candidate_id": candidate["id"],
+        "candidate_name": candidate.get("name"),
+        "industry_id": industry["id"],
+        "company_name": industry.get("company_name"),
+        "internship_title": industry.get("internship_title"),
+        "match_score": match_details,
+        "available_positions": industry.get("internship_capacity", 0) - industry.get("filled_positions", 0)
+    }
+
+SCORE_FIELDS = ("overall_score", "skills_score", "location_score", "qualification_score",
+                "sector_score", "affirmative_bonus", "experience_penalty")
+
+def shape_matches(matches: List[Dict[str, Any]], response_format: str,
+                  include_breakdown: bool) -> Dict[str, Any]:
+    """The match part of a /match_internships response in the requested format"""
+    score_fields = SCORE_FIELDS if include_breakdown else SCORE_FIELDS[:1]
+    if response_format == "full":
+        if not include_breakdown:
+            matches = [{**match, "match_score": {"overall_score": match["match_score"]["overall_score"]}}
+                       for match in matches]
+        return {"matches": matches}
+    
+    candidates: Dict[str, Dict[str, Any]] = {}
+    internships: Dict[str, Dict[str, Any]] = {}
+    rows = []
+    for match in matches:
+        if match["candidate_id"] not in candidates:
+            candidates[match["candidate_id"]] = {"name": match["candidate_name"]}
+        if match["industry_id"] not in internships:
+            internships[match["industry_id"]] = {
+                "company_name": match["company_name"],
+                "internship_title": match["internship_title"],
+                "available_positions": match["available_positions"]
+            }
+        score = match["match_score"]
+        rows.append([match["candidate_id"], match["industry_id"], *(score[field] for field in score_fields)])
+    return {
+        "match_fields": ["candidate_id", "industry_id", *score_fields],
+        "matches": rows,
+        "candidates": candidates,
+        "internships": internships
+    }
+
+# Results are served across TF-IDF refits only with PM_MATCH_CACHE_IDF_TOLERANCE > 0: until
+# that share of the skills index was written since they were scored (see result_cache)
+def score_pair(candidate: CandidateFeatures, industry: IndustryFeatures,
+               skills: Optional[SkillWeights]) -> Dict[str, Any]:
+    """MatchingEngine.score_features under the standard weights, for the result cache and kept lists"""
+    return MatchingEngine.score_features(candidate, industry, skills=skills)
+
+match_cache = MatchResultCache(
+    int(os.getenv("PM_MATCH_CACHE_SIZE", "1024")),
+    score_pair,
+    lambda version, tolerance: skills_index.drifted(version, tolerance),
+    float(os.getenv("PM_MATCH_CACHE_IDF_TOLERANCE", "0"))
+)
+candidates_db.subscribe(lambda old, new: match_cache.record_change("candidate", (new or old)["id"]))
+industries_db.subscribe(lambda old, new: match_cache.record_change("industry", (new or old)["id"]))
 
+# Stored top-K lists per candidate and internship (PM_RECOMMENDATIONS_K, 0 disables):
+# candidate- and internship-centric matches with top_n <= K are read from them
+def recommendation_lists(k: int) -> Recommendations:
+    """Top-K lists over this process's registry and derived indexes"""
+    return Recommendations(k, store.lock, match_states.pin, lambda: match_index, lambda: feature_cache,
+                           score_pair, match_cache.skills_current)
+
+recommendations = recommendation_lists(int(os.getenv("PM_RECOMMENDATIONS_K", "0")))
+candidates_db.subscribe(lambda old, new: recommendations.record_change("candidate", (new or old)["id"]))
+industries_db.subscribe(lambda old, new: recommendations.record_change("industry", (new or old)["id"]))
+
+# Component score matrices for /match_internships with custom weights, kept for
+# registries of up to PM_COMPONENT_MATRICES_MAX_CELLS pairs (0 always rescores)
+component_matrices = ComponentMatrices(
+    int(os.getenv("PM_COMPONENT_MATRICES_MAX_CELLS", "10000000")), store.lock, lambda: pin_scoring(),
+    BatchMatchingEngine.prepare, BatchMatchingEngine.BLOCK_CELLS
+)
+candidates_db.subscribe(lambda old, new: component_matrices.record_change("candidate", old, new))
+industries_db.subscribe(lambda old, new: component_matrices.record_change("industry", old, new))
+
+class SemanticIndex:
+    """Semantic retrieval stage for candidate- and internship-centric matching
+
+    Embeds candidates by their skills, qualifications and preferred sectors
+    and internships by their title, skills, qualifications, sector,
+    description and preferred candidate profile, with an LSA model trained
+    on the registry, and keeps each side in an IVF index (see semantic.py).
+    A request with retrieval="semantic" takes the ``retrieval_k`` records
+    on the other side nearest to its subject and reranks only those with
+    the exact scorer, so its cost grows with about the square root of the
+    registry instead of linearly.
+
+    Writes are queued by table listeners and embedded with the trained
+    model at the next read. The model and indexes are retrained once the
+    registry has grown or shrunk RETRAIN_GROWTH times since training.
+    """
+    
+    RETRAIN_GROWTH = 2.0
+    
+    def __init__(self, retrieval_k: int, dimensions: int, nprobe: int):
+        self.retrieval_k = retrieval_k
+        self.dimensions = dimensions
+        self.nprobe = nprobe
+        # Held while the indexes are refreshed or searched; taken before the store lock
+        self._lock = threading.Lock()
+        self._pending: deque = deque()
+        self._stale = True
+        self.trained = False
+        self.embedding: Optional[TextEmbedding] = None
+        self.indexes: Dict[str, VectorIndex] = {}
+        self._trained_size = 0
+        self.trainings = 0
+    
+    @staticmethod
+    def candidate_text(candidate: Dict[str, Any]) -> str:
+        return " ".join([*candidate.get("skills", []), *candidate.get("qualifications", []),
+                         *candidate.get("preferred_sectors", [])])
+    
+    @staticmethod
+    def industry_text(industry: Dict[str, Any]) -> str:
+        return " ".join([industry.get("internship_title", ""), *industry.get("required_skills", []),
+                         *industry.get("preferred_qualifications", []), industry.get("sector", ""),
+                         industry.get("internship_description", ""), industry.get("preferred_candidate_profile", "")])
+    
+    def text(self, kind: str, record: Dict[str, Any]) -> str:
+        return self.candidate_text(record) if kind == "candidate" else self.industry_text(record)
+    
+    def reset(self) -> None:
+        """Retrain at the next read, e.g. after the derived indexes were rebuilt"""
+        self._stale = True
+        self._pending.clear()
+    
+    def record_change(self, kind: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """Table listener body: queue records whose text changed"""
+        if not self.trained:
+            return
+        if old is not None and new is not None and self.text(kind, old) == self.text(kind, new):
+            return
+        self._pending.append((kind, (new or old)["id"]))
+    
+    def _refresh(self) -> RegistryVersion:
+        """Train or update the indexes; returns the registry version they now reflect"""
+        with store.lock:
+            version = store.pin()
+            tables = {"candidate": version.candidates, "industry": version.industries}
+            size = len(version.candidates) + len(version.industries)
+            retrain = self._stale or not self.trained or \
+                not self._trained_size / self.RETRAIN_GROWTH <= size <= self._trained_size * self.RETRAIN_GROWTH
+            if retrain:
+                self._pending.clear()
+                self._stale = False
+                self.trained = True
+                self._trained_size = max(size, 1)
+            else:
+                changed: Dict[str, Dict[str, None]] = {"candidate": {}, "industry": {}}
+                while self._pending:
+                    kind, record_id = self._pending.popleft()
+                    changed[kind][record_id] = None
+        
+        # Versions are immutable, so embedding needs no store lock
+        if retrain:
+            self.trainings += 1
+            records = {kind: list(table.values()) for kind, table in tables.items()}
+            texts = {kind: [self.text(kind, record) for record in records[kind]] for kind in records}
+            self.embedding = TextEmbedding.train(texts["candidate"] + texts["industry"], self.dimensions)
+            self.indexes = {}
+            if self.embedding is not None:
+                for kind in records:
+                    vectors = self.embedding.transform(texts[kind]) if texts[kind] else \
+                        np.zeros((0, self.embedding.dimensions), dtype=np.float32)
+                    self.indexes[kind] = VectorIndex([record["id"] for record in records[kind]], vectors, self.nprobe)
+        elif self.embedding is not None:
+            for kind, record_ids in changed.items():
+                written = [record for record in map(tables[kind].get, record_ids) if record is not None]
+                for record_id in record_ids:
+                    if record_id not in tables[kind]:
+                        self.indexes[kind].remove(record_id)
+                if written:
+                    vectors = self.embedding.transform([self.text(kind, record) for record in written])
+                    for record, vector in zip(written, vectors):
+                        self.indexes[kind].add(record["id"], vector)
+        return version
+    
+    def retrieve(self, kind: str, record_id: str) -> Optional[Tuple[RegistryVersion, List[str], int]]:
+        """Ids of up to retrieval_k records on the other side nearest to a candidate (open
+        internships) or an internship (candidates), nearest first, with the registry
+        version they were found in and how many vectors were compared; None if the
+        registry is too small to embed
+        """
+        with self._lock:
+            version = self._refresh()
+            if self.embedding is None:
+                return None
+            query = self.indexes[kind].vector(record_id)
+            if kind == "candidate":
+                others = self.indexes["industry"]
+    
+                def accept(industry_id: str) -> bool:
+                    industry = version.industries[industry_id]
+                    return industry.get("filled_positions", 0) < industry.get("internship_capacity", 0)
+            else:
+                others, accept = self.indexes["candidate"], None
+            found, compared = others.search(query, self.retrieval_k, accept)
+            return version, [other_id for other_id, _ in found], compared
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retrieval_k": self.retrieval_k,
+            "trained": self.embedding is not None,
+            "dimensions": self.embedding.dimensions if self.embedding is not None else 0,
+            "candidates": len(self.indexes["candidate"]) if self.indexes else 0,
+            "internships": len(self.indexes["industry"]) if self.indexes else 0,
+            "lists": len(self.indexes["candidate"].centroids) if self.indexes else 0,
+            "trainings": self.trainings,
+            "pending_writes": len(self._pending)
+        }
+    
+# Semantic retrieval for /match_internships with retrieval="semantic":
+# PM_SEMANTIC_RETRIEVAL_K records are reranked per request, found by probing
+# PM_SEMANTIC_NPROBE lists of a PM_SEMANTIC_DIMENSIONS-dimensional LSA index
+semantic_index = SemanticIndex(int(os.getenv("PM_SEMANTIC_RETRIEVAL_K", "100")),
+                               int(os.getenv("PM_SEMANTIC_DIMENSIONS", "64")),
+                               int(os.getenv("PM_SEMANTIC_NPROBE", "8")))
+candidates_db.subscribe(lambda old, new: semantic_index.record_change("candidate", old, new))
+industries_db.subscribe(lambda old, new: semantic_index.record_change("industry", old, new))
+
+class MatchWorkers:
+    """Executors that keep CPU-bound matching off the event loop
+    
+    Each matching request runs on a thread from ``requests``. Large all-pairs
+    runs are further split into candidate-row shards scored on ``shards``:
+    threads by default (the sparse/dense NumPy kernels release the GIL), or
+    worker processes with PM_MATCH_EXECUTOR=process. A request that exceeds
+    its timeout, or whose client goes away, sets a cancel event that the
+    scoring loops check between blocks, so the work actually stops; process
+    shards poll a shared-memory copy of it.
+    """
+    
+    EXECUTORS = ("thread", "process")
+    # Below this many candidate x internship cells, sharding costs more than it saves
+    MIN_SHARD_CELLS = 1_000_000
+    
+    def __init__(self, executor: str = "thread", workers: Optional[int] = None):
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Unknown match executor: {executor}")
+        self.executor = executor
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        # Created when the app starts; until then requests run unsharded on the loop's default executor
+        self.requests: Optional[ThreadPoolExecutor] = None
+        self.shards: Optional[Executor] = None
+    
+    def start(self) -> None:
+        if self.requests is not None:
+            return
+        self.requests = ThreadPoolExecutor(self.workers, thread_name_prefix="match")
+        if self.executor == "process":
+            # spawn, not fork: the parent has live threads and an open SQLite connection
+            self.shards = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self.shards = ThreadPoolExecutor(self.workers, thread_name_prefix="match-shard")
+    
+    def shard_count(self, inputs: BatchInputs) -> int:
+        cells = inputs.n_rows * inputs.n_cols
+        return max(1, min(self.workers, cells // self.MIN_SHARD_CELLS))
+    
+    async def run(self, fn, *args, timeout: Optional[float] = None):
+        """Await ``fn(*args, cancel)`` on a worker thread; cancels it on timeout or disconnect"""
+        cancel = threading.Event()
+        # Run in a copy of the caller's context so stage timers find the request profile
+        context = contextvars.copy_context()
+        future = asyncio.get_running_loop().run_in_executor(self.requests, context.run, fn, *args, cancel)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except BaseException:
+            cancel.set()
+            raise
+    
+    def shutdown(self) -> None:
+        if self.requests is not None:
+            self.requests.shutdown(wait=False, cancel_futures=True)
+            self.shards.shutdown(wait=False, cancel_futures=True)
+            self.requests = self.shards = None
+
+MATCH_TIMEOUT_SECONDS = float(os.getenv("PM_MATCH_TIMEOUT_SECONDS", "60"))
+match_workers = MatchWorkers(os.getenv("PM_MATCH_EXECUTOR", "thread"),
+                             int(os.getenv("PM_MATCH_WORKERS", "0")) or None)
+
+job_manager = JobManager(store.jobs, lambda pairs: pairs_scored_total.inc(pairs, "job"))
+
+# Warm starts: with PM_SNAPSHOT_DIR set, the registry and derived indexes are
+# snapshotted there every PM_SNAPSHOT_INTERVAL_SECONDS (when they changed) and
+# at shutdown, and restored on boot. With the memory backend, writes since the
+# last snapshot are replayed from a write-ahead log in the same directory.
+SNAPSHOT_DIR = os.getenv("PM_SNAPSHOT_DIR")
+SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("PM_SNAPSHOT_INTERVAL_SECONDS", "300"))
+snapshots = SnapshotManager(
+    SNAPSHOT_DIR, store, export_derived_indexes, restore_derived_indexes,
+    {"qualification_matching": QUALIFICATION_MATCHING, "qualification_keys": "token_id_sets",
+     "locations": location_hierarchy.fingerprint},
+    SNAPSHOT_INTERVAL_SECONDS
+) if SNAPSHOT_DIR else None
+
+# Startup: importing this module opens the store; the rest of what a worker
+# needs before it can match (snapshot restore or index rebuild, log replay, job
+# recovery) runs in warm_up(), on a background thread unless
+# PM_BACKGROUND_WARMUP=0, so /, /health and /ready answer right away and other
+# requests wait for it. scipy is imported on first use, not here. An empty
+# store is seeded with sample records only with PM_SEED_DUMMY_DATA=1 (demos).
+# Startup taking more than PM_STARTUP_BUDGET_SECONDS is logged as a warning.
+BACKGROUND_WARMUP = os.getenv("PM_BACKGROUND_WARMUP", "1") == "1"
+SEED_DUMMY_DATA = os.getenv("PM_SEED_DUMMY_DATA", "0") == "1"
+STARTUP_BUDGET_SECONDS = float(os.getenv("PM_STARTUP_BUDGET_SECONDS", "10"))
+UNGATED_PATHS = frozenset({"/", "/health", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json"})
+
+class Readiness:
+    """Whether warm-up has finished, shared by the warm-up thread and request handlers"""
+    
+    def __init__(self):
+        self.finished = threading.Event()
+        self.error: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+    
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Called on the event loop before warm-up starts"""
+        self.finished.clear()
+        self.error = None
+        self._loop = loop
+        self._event = asyncio.Event()
+    
+    def finish(self, error: Optional[str] = None) -> None:
+        self.error = error
+        self.finished.set()
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._event.set)
+            except RuntimeError:
+                # The loop has already closed
+                pass
+    
+    async def wait(self) -> None:
+        """Until warm-up has finished; returns at once if it never started"""
+        if self._event is not None and not self.finished.is_set():
+            await self._event.wait()
+    
+readiness = Readiness()
+metrics.gauge("pm_startup_phase_seconds", "Duration of each startup phase",
+              lambda: [((phase,), seconds) for phase, seconds in startup_profile.phases.items()], ("phase",))
+metrics.gauge("pm_ready", "1 once warm-up has finished", lambda: [((), int(readiness.finished.is_set()))])
+
+def warm_up(preload: bool = False) -> None:
+    """Initialize everything matching needs, checkpointing each phase in startup_profile
+    
+    With ``preload``, modules that only the first allocation or semantic
+    request would import are imported after the worker is ready.
+    """
+    try:
+        restored = snapshots is not None and snapshots.load()
+        if not restored:
+            rebuild_derived_indexes()
+        startup_profile.checkpoint("load_snapshot" if restored else "rebuild_indexes")
+        if snapshots is not None:
+            snapshots.replay_log()
+            snapshots.start()
+            startup_profile.checkpoint("replay_log")
+        job_manager.recover()
+        startup_profile.checkpoint("recover_jobs")
+        if SEED_DUMMY_DATA and len(candidates_db) == 0 and len(industries_db) == 0:
+            initialize_dummy_data()
+            startup_profile.checkpoint("seed_dummy_data")
+    except Exception as e:
+        logger.exception("Warm-up failed")
+        readiness.finish(str(e))
+        return
+    
+    ready_after = startup_profile.mark_ready()
+    readiness.finish()
+    log = logger.warning if ready_after > STARTUP_BUDGET_SECONDS else logger.info
+    log(f"Ready in {ready_after:.3f}s ({startup_profile.summary()}) with "
+        f"{len(candidates_db)} candidates and {len(industries_db)} industries")
+    if preload:
+        import scipy.sparse.csgraph  # noqa: F401
+        preload_semantic()
+        startup_profile.checkpoint("preload_modules")
+
+async def start_up() -> None:
+    """Start the worker pools, then warm-up, in the background unless PM_BACKGROUND_WARMUP=0"""
+    startup_profile.checkpoint("server_start")
+    readiness.bind(asyncio.get_running_loop())
+    match_workers.start()
+    job_manager.start()
+    recommendations.start()
+    if BACKGROUND_WARMUP:
+        threading.Thread(target=warm_up, args=(True,), name="warm-up", daemon=True).start()
+    else:
+        warm_up()
+
+def shut_down() -> None:
+    job_manager.shutdown()
+    match_workers.shutdown()
+    recommendations.stop()
+    if snapshots is not None:
+        snapshots.stop()
+
+# API Endpoints
 @app.get("/")
 async def root():
-    """Health check endpoint"""
+    """Health check endpoint; counts are left out until warm-up has loaded the registry"""
+    ready = readiness.finished.is_set()
     return {
         "message": "PM Internship Scheme - Smart Matching API",
-        "status": "active",
-        "candidates_count": len(candidates_db),
-        "industries_count": len(industries_db),
+        "status": "active" if ready else "starting",
+        "candidates_count": len(candidates_db) if ready else None,
+        "industries_count": len(industries_db) if ready else None,
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/health")
+async def health():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "alive", "timestamp": datetime.now().isoformat()}
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once warm-up has finished, 503 before or if it failed, with the startup report"""
+    if readiness.error is not None:
+        status = "failed"
+    else:
+        status = "ready" if readiness.finished.is_set() else "starting"
+    return FastJSONResponse({
+        "status": status,
+        "error": readiness.error,
+        "startup": startup_profile.report(),
+        "startup_budget_seconds": STARTUP_BUDGET_SECONDS,
+        "timestamp": datetime.now().isoformat()
+    }, status_code=200 if status == "ready" else 503)
+
 @app.post("/register_candidate")
 async def register_candidate(candidate: CandidateRegistration):
     """Register a new candidate"""
     try:
-        candidate_id = str(uuid.uuid4())
-        candidate_data = candidate.dict()
-        candidate_data.update({
-            "id": candidate_id,
-            "registration_date": datetime.now().isoformat(),
-            "status": "active"
-        })
+        candidate_data = new_candidate_record(candidate.model_dump())
+        candidate_id = candidate_data["id"]
         
-        candidates_db[candidate_id] = candidate_data
+        # The write takes the store lock and commits: keep it off the event loop
+        await run_in_threadpool(candidates_db.put, candidate_data)
         
         logger.info(f"Registered candidate: {candidate.name} (ID: {candidate_id})")
         
@@ -440,16 +2072,10 @@ async def register_candidate(candidate: CandidateRegistration):
 async def register_industry(industry: IndustryRegistration):
     """Register a new industry/internship provider"""
     try:
-        industry_id = str(uuid.uuid4())
-        industry_data = industry.dict()
-        industry_data.update({
-            "id": industry_id,
-            "registration_date": datetime.now().isoformat(),
-            "status": "active",
-            "filled_positions": 0
-        })
+        industry_data = new_industry_record(industry.model_dump())
+        industry_id = industry_data["id"]
         
-        industries_db[industry_id] = industry_data
+        await run_in_threadpool(industries_db.put, industry_data)
         
         logger.info(f"Registered industry: {industry.company_name} (ID: {industry_id})")
         
@@ -464,107 +2090,582 @@ async def register_industry(industry: IndustryRegistration):
         logger.error(f"Error registering industry: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
 
+# Bulk uploads are validated and written in batches of this many rows
+BULK_BATCH_SIZE = 1000
+# Per-row errors beyond this many are counted but not returned
+BULK_MAX_REPORTED_ERRORS = 1000
+
+CSV_LIST_FIELDS = frozenset({
+    "skills", "qualifications", "location_preference", "preferred_sectors", "languages",
+    "required_skills", "preferred_qualifications"
+})
+
+async def bulk_register(request: Request, upload_format: Optional[str], model, make_record,
+                        table: RecordTable, label: str) -> Dict[str, Any]:
+    """Stream-parse a JSON Lines or CSV body, validate in batches and write each batch at once"""
+    upload_format = upload_format or (
+        "csv" if "csv" in request.headers.get("content-type", "") else "jsonl"
+    )
+    if upload_format == "csv":
+        rows = iter_csv_rows(request.stream(), CSV_LIST_FIELDS)
+    elif upload_format == "jsonl":
+        rows = iter_jsonl_rows(request.stream())
+    else:
+        raise HTTPException(status_code=400, detail=f"Unsupported upload format: {upload_format}")
+    
+    registered = 0
+    failed = 0
+    errors: List[Dict[str, Any]] = []
+    batch: List[ParsedRow] = []
+    
+    def write_batch(rows: List[ParsedRow]) -> Tuple[int, List[Tuple[int, Any]]]:
+        """Validate parsed rows, write the valid ones at once; returns how many and the rejected rows"""
+        records, rejected = [], []
+        for row_number, row in rows:
+            if isinstance(row, str):
+                rejected.append((row_number, row))
+                continue
+            try:
+                records.append(make_record(model.model_validate(row).model_dump()))
+            except ValidationError as e:
+                rejected.append((row_number, [{"field": ".".join(str(part) for part in err["loc"]),
+                                               "message": err["msg"]} for err in e.errors()]))
+        table.put_many(records)
+        return len(records), rejected
+    
+    async def flush() -> None:
+        nonlocal registered, failed
+        # Validation and the batch write, which runs every table listener and commits, stay off the event loop
+        written, rejected = await run_in_threadpool(write_batch, list(batch))
+        batch.clear()
+        registered += written
+        failed += len(rejected)
+        errors.extend({"row": row_number, "errors": error}
+                      for row_number, error in rejected[:BULK_MAX_REPORTED_ERRORS - len(errors)])
+    
+    async for parsed in rows:
+        batch.append(parsed)
+        if len(batch) >= BULK_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    
+    logger.info(f"Bulk registered {registered} {label} ({failed} rows rejected)")
+    
+    return {
+        "status": "success",
+        "registered": registered,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/register_candidates/bulk")
+async def register_candidates_bulk(request: Request, format: Optional[str] = None):
+    """Register candidates from a JSON Lines or CSV upload (format=jsonl|csv)"""
+    return await bulk_register(request, format, CandidateRegistration, new_candidate_record,
+                               candidates_db, "candidates")
+
+@app.post("/register_industries/bulk")
+async def register_industries_bulk(request: Request, format: Optional[str] = None):
+    """Register internships from a JSON Lines or CSV upload (format=jsonl|csv)"""
+    return await bulk_register(request, format, IndustryRegistration, new_industry_record,
+                               industries_db, "industries")
+
+def pin_scoring() -> Tuple[RegistryVersion, SkillWeights]:
+    """The registry and the TF-IDF weights as of the same moment, to score without the store lock"""
+    with store.lock:
+        return store.pin(), skills_index.weights()
+
+def snapshot_match_inputs() -> Tuple[RecordColumns, RecordColumns, Optional[BatchInputs], SkillWeights]:
+    """All candidates, open internships, their prepared scoring inputs and the TF-IDF weights used
+    
+    Reads a pinned registry version column-wise, so records are only built
+    as dicts for the pairs that make it into a response, and those reads
+    need no lock and see exactly the records that were scored.
+    """
+    version, skills = pin_scoring()
+    candidates = version.candidates.columns()
+    industries = version.industries.columns()
+    industries = industries.subset(
+        industries.numbers("filled_positions", 0) < industries.numbers("internship_capacity", 0))
+    if not len(candidates) or not len(industries):
+        return candidates, industries, None, skills
+    return candidates, industries, BatchMatchingEngine.prepare(candidates, industries, skills), skills
+
+def compute_matches(request: MatchRequest, cancel: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+    """Run the matcher for a request and build the response entries
+    
+    Runs on a match worker thread. Records, the search index, features and
+    TF-IDF weights are read from a MatchState (or for all pairs a registry
+    version) pinned for the whole run, so registrations never change them
+    midway and none of it holds the store lock.
+    """
+    if request.retrieval == "semantic":
+        return compute_semantic_matches(request, cancel)
+    if request.weights is not None:
+        return compute_weighted_matches(request, cancel)
+    
+    # If specific candidate ID provided, match only that candidate
+    if request.candidate_id:
+        with stage_timer("search", match_stage_duration, "candidate"):
+            found = recommendations.top("candidate", request.candidate_id, request.top_n, request.min_score_threshold)
+            state, top = found if found is not None else (match_states.pin(), None)
+            candidate = state.registry.candidates[request.candidate_id]
+            scored = None
+            if top is None:
+                top, scored = state.index.match_candidate(
+                    candidate, state.features, state.skills, request.top_n, request.min_score_threshold, cancel
+                )
+        if scored is not None:
+            count_pairs("candidate", scored, len(state.index.industries.seq) - scored)
+        with stage_timer("build_entries", match_stage_duration, "candidate"):
+            return [build_match_entry(candidate, state.registry.industries[industry_id], details)
+                    for _, details, industry_id in top]
+    
+    # If specific industry ID provided, find candidates for that industry
+    if request.industry_id:
+        with stage_timer("search", match_stage_duration, "industry"):
+            found = recommendations.top("industry", request.industry_id, request.top_n, request.min_score_threshold)
+            state, top = found if found is not None else (match_states.pin(), None)
+            industry = state.registry.industries[request.industry_id]
+            scored = None
+            if top is None:
+                top, scored = state.index.match_industry(
+                    industry, state.features, state.skills, request.top_n, request.min_score_threshold, cancel
+                )
+        if scored is not None:
+            count_pairs("industry", scored, len(state.index.candidates.seq) - scored)
+        with stage_timer("build_entries", match_stage_duration, "industry"):
+            return [build_match_entry(state.registry.candidates[candidate_id], industry, details)
+                    for _, details, candidate_id in top]
+    
+    # General matching - all candidates to all industries (vectorized)
+    with stage_timer("prepare", match_stage_duration, "all"):
+        candidates, industries, inputs, skills = snapshot_match_inputs()
+    if inputs is None:
+        return []
+    
+    with stage_timer("score", match_stage_duration, "all"):
+        top_pairs = BatchMatchingEngine.rank_pairs(
+            inputs, request.top_n, request.min_score_threshold,
+            match_workers.shards, match_workers.shard_count(inputs), cancel
+        )
+    count_pairs("all", inputs.n_rows * inputs.n_cols, 0)
+    with stage_timer("build_entries", match_stage_duration, "all"):
+        return [
+            build_match_entry(candidate, industry,
+                              MatchingEngine.calculate_match_score(candidate, industry, skills=skills))
+            for candidate, industry in ((candidates.record(c_pos), industries.record(i_pos))
+                                        for c_pos, i_pos in top_pairs)
+        ]
+
+def cached_matches(request: MatchRequest,
+                   cancel: Optional[threading.Event] = None) -> Tuple[List[Dict[str, Any]], bool]:
+    """compute_matches through the match result cache, and whether it was a hit
+    
+    Runs on a match worker: revalidating an entry rescores changed records,
+    which must not run on the event loop. It reads a pinned MatchState, so
+    the store lock is only held to pin it with its change log position.
+    """
+    with stage_timer("cache_lookup"):
+        cache_key = match_cache.key(request)
+        with store.lock:
+            state = match_states.pin()
+            checkpoint = match_cache.checkpoint()
+        matches = match_cache.get(cache_key, state, checkpoint)
+    if matches is not None:
+        return matches, True
+    matches = compute_matches(request, cancel)
+    match_cache.put(cache_key, request, matches, state, checkpoint)
+    return matches, False
+
+def compute_weighted_matches(request: MatchRequest, cancel: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+    """compute_matches under custom score weights
+    
+    Ranked from the component matrices, or by rescoring with the batch
+    scorer when the registry is too large to keep them. Entries report the
+    unweighted components and the overall score under the given weights.
+    """
+    weights = request.weights.as_tuple()
+    with stage_timer("score", match_stage_duration, "weighted"):
+        ranked = component_matrices.rank(weights, request.top_n, request.min_score_threshold,
+                                         request.candidate_id, request.industry_id, cancel)
+        if ranked is None:
+            ranked = rescore_weighted(request, weights, cancel)
+    # Entries are scored with the TF-IDF weights the pairs were ranked with
+    version, skills, top_pairs = ranked
+    with stage_timer("build_entries", match_stage_duration, "weighted"):
+        return [
+            build_match_entry(candidate, industry,
+                              MatchingEngine.calculate_match_score(candidate, industry, weights, skills))
+            for candidate, industry in ((version.candidates[c_id], version.industries[i_id])
+                                        for c_id, i_id in top_pairs)
+        ]
+
+def compute_semantic_matches(request: MatchRequest,
+                             cancel: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+    """compute_matches for a candidate or internship, reranking only semantically near records
+    
+    Falls back to the exact search while the registry is too small to embed.
+    """
+    kind, subject_id = ("candidate", request.candidate_id) if request.candidate_id else ("industry", request.industry_id)
+    with stage_timer("retrieve", match_stage_duration, "semantic"):
+        retrieved = semantic_index.retrieve(kind, subject_id)
+    if retrieved is None:
+        return compute_matches(request.model_copy(update={"retrieval": "exact"}), cancel)
+    version, other_ids, compared = retrieved
+    weights = request.weights.as_tuple() if request.weights is not None else DEFAULT_WEIGHTS
+    skills = skills_index.weights()
+    
+    with stage_timer("rerank", match_stage_duration, "semantic"):
+        if kind == "candidate":
+            subject = version.candidates[subject_id]
+            pairs = [(subject, version.industries[other_id]) for other_id in other_ids]
+        else:
+            subject = version.industries[subject_id]
+            pairs = [(version.candidates[other_id], subject) for other_id in other_ids]
+        scored = []
+        for candidate, industry in pairs:
+            if cancel is not None and cancel.is_set():
+                raise MatchCancelled()
+            details = MatchingEngine.calculate_match_score(candidate, industry, weights, skills)
+            if details["overall_score"] >= request.min_score_threshold:
+                scored.append((candidate, industry, details))
+    others = len(version.industries) if kind == "candidate" else len(version.candidates)
+    count_pairs("semantic", len(pairs), others - len(pairs))
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add_count("vectors_compared", compared)
+    # Stable: equal scores stay in order of semantic similarity
+    scored.sort(key=lambda entry: -entry[2]["overall_score"])
+    return [build_match_entry(candidate, industry, details) for candidate, industry, details in scored[:request.top_n]]
+
+def rescore_weighted(request: MatchRequest, weights: Weights,
+                     cancel: Optional[threading.Event] = None
+                     ) -> Tuple[RegistryVersion, SkillWeights, List[Tuple[str, str]]]:
+    """ComponentMatrices.rank by batch-scoring the request's pairs"""
+    version, skills = pin_scoring()
+    candidates, industries = version.candidates.columns(), version.industries.columns()
+    if request.candidate_id:
+        candidates = [version.candidates[request.candidate_id]] if request.candidate_id in version.candidates else []
+    elif request.industry_id:
+        industries = [version.industries[request.industry_id]] if request.industry_id in version.industries else []
+    if not isinstance(industries, list):
+        industries = industries.subset(
+            industries.numbers("filled_positions", 0) < industries.numbers("internship_capacity", 0))
+    if not len(candidates) or not len(industries):
+        return version, skills, []
+    inputs = BatchMatchingEngine.prepare(candidates, industries, skills)
+    top_pairs = BatchMatchingEngine.rank_pairs(
+        inputs, request.top_n, request.min_score_threshold,
+        match_workers.shards, match_workers.shard_count(inputs), cancel, weights
+    )
+    count_pairs("weighted", inputs.n_rows * inputs.n_cols, 0)
+    candidate_ids = [c["id"] for c in candidates] if isinstance(candidates, list) else candidates.ids
+    industry_ids = [i["id"] for i in industries] if isinstance(industries, list) else industries.ids
+    return version, skills, [(candidate_ids[c_pos], industry_ids[i_pos]) for c_pos, i_pos in top_pairs]
+
+def count_pairs(mode: str, scored: int, pruned: int) -> None:
+    """Record pairs scored and skipped by pruning in the metrics and the request profile"""
+    pairs_scored_total.inc(scored, mode)
+    pairs_pruned_total.inc(pruned, mode)
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add_count("pairs_scored", scored)
+        profile.add_count("pairs_pruned", pruned)
+
 @app.post("/match_internships")
 async def match_internships(request: MatchRequest):
     """AI-powered internship matching endpoint"""
     try:
-        matches = []
-        
-        # If specific candidate ID provided, match only that candidate
-        if request.candidate_id:
-            if request.candidate_id not in candidates_db:
-                raise HTTPException(status_code=404, detail="Candidate not found")
-            
-            candidate = candidates_db[request.candidate_id]
-            
-            for industry_id, industry in industries_db.items():
-                if industry.get("filled_positions", 0) < industry.get("internship_capacity", 0):
-                    match_details = MatchingEngine.calculate_match_score(candidate, industry)
-                    
-                    if match_details["overall_score"] >= request.min_score_threshold:
-                        matches.append({
-                            "candidate_id": request.candidate_id,
-                            "candidate_name": candidate.get("name"),
-                            "industry_id": industry_id,
-                            "company_name": industry.get("company_name"),
-                            "internship_title": industry.get("internship_title"),
-                            "match_score": match_details,
-                            "available_positions": industry.get("internship_capacity", 0) - industry.get("filled_positions", 0)
-                        })
-        
-        # If specific industry ID provided, find candidates for that industry
-        elif request.industry_id:
-            if request.industry_id not in industries_db:
-                raise HTTPException(status_code=404, detail="Industry not found")
-            
-            industry = industries_db[request.industry_id]
-            
-            for candidate_id, candidate in candidates_db.items():
-                match_details = MatchingEngine.calculate_match_score(candidate, industry)
-                
-                if match_details["overall_score"] >= request.min_score_threshold:
-                    matches.append({
-                        "candidate_id": candidate_id,
-                        "candidate_name": candidate.get("name"),
-                        "industry_id": request.industry_id,
-                        "company_name": industry.get("company_name"),
-                        "internship_title": industry.get("internship_title"),
-                        "match_score": match_details,
-                        "available_positions": industry.get("internship_capacity", 0) - industry.get("filled_positions", 0)
-                    })
-        
-        # General matching - all candidates to all industries
+        if request.candidate_id and request.candidate_id not in candidates_db:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+        if request.industry_id and request.industry_id not in industries_db:
+            raise HTTPException(status_code=404, detail="Industry not found")
+        
+        if request.weights is not None and not all(math.isfinite(w) for w in request.weights.as_tuple()):
+            raise HTTPException(status_code=400, detail="Score weights must be finite numbers")
+        if request.retrieval not in ("exact", "semantic"):
+            raise HTTPException(status_code=400, detail=f"Unknown retrieval: {request.retrieval}")
+        if request.retrieval == "semantic" and not request.candidate_id and not request.industry_id:
+            raise HTTPException(status_code=400, detail="Semantic retrieval needs a candidate_id or industry_id")
+        if request.response_format not in ("full", "compact"):
+            raise HTTPException(status_code=400, detail=f"Unknown response_format: {request.response_format}")
+        
+        if request.weights is not None or request.retrieval == "semantic":
+            # What-if and approximate rankings are cheap to recompute and are not cached
+            matches = await match_workers.run(compute_matches, request, timeout=MATCH_TIMEOUT_SECONDS)
+            cache_hit = False
         else:
-            for candidate_id, candidate in candidates_db.items():
-                for industry_id, industry in industries_db.items():
-                    if industry.get("filled_positions", 0) < industry.get("internship_capacity", 0):
-                        match_details = MatchingEngine.calculate_match_score(candidate, industry)
-                        
-                        if match_details["overall_score"] >= request.min_score_threshold:
-                            matches.append({
-                                "candidate_id": candidate_id,
-                                "candidate_name": candidate.get("name"),
-                                "industry_id": industry_id,
-                                "company_name": industry.get("company_name"),
-                                "internship_title": industry.get("internship_title"),
-                                "match_score": match_details,
-                                "available_positions": industry.get("internship_capacity", 0) - industry.get("filled_positions", 0)
-                            })
-        
-        # Sort by match score (descending) and limit results
-        matches.sort(key=lambda x: x["match_score"]["overall_score"], reverse=True)
-        matches = matches[:request.top_n]
-        
-        logger.info(f"Generated {len(matches)} matches")
+            matches, cache_hit = await match_workers.run(cached_matches, request, timeout=MATCH_TIMEOUT_SECONDS)
         
-        return {
+        logger.info(f"Generated {len(matches)} matches" + (" (cached)" if cache_hit else ""))
+        
+        # Returned as a response so the entries skip FastAPI's generic encoding pass
+        return FastJSONResponse({
             "status": "success",
             "total_matches": len(matches),
-            "matches": matches,
+            **shape_matches(matches, request.response_format, request.include_breakdown),
+            "cache_hit": cache_hit,
             "matching_criteria": {
                 "min_score_threshold": request.min_score_threshold,
                 "top_n": request.top_n,
                 "candidate_id": request.candidate_id,
-                "industry_id": request.industry_id
+                "industry_id": request.industry_id,
+                "weights": request.weights.model_dump() if request.weights is not None else None,
+                "retrieval": request.retrieval,
+                "response_format": request.response_format,
+                "include_breakdown": request.include_breakdown
             },
             "timestamp": datetime.now().isoformat()
-        }
+        })
     
     except HTTPException:
         raise
+    except asyncio.TimeoutError:
+        logger.warning(f"Matching cancelled after {MATCH_TIMEOUT_SECONDS}s")
+        raise HTTPException(status_code=504, detail=f"Matching timed out after {MATCH_TIMEOUT_SECONDS} seconds")
     except Exception as e:
         logger.error(f"Error in matching: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Matching failed: {str(e)}")
 
-@app.get("/candidates")
-async def get_candidates():
-    """Get all registered candidates"""
+@app.get("/match_cache/stats")
+async def get_match_cache_stats():
+    """Hit/miss counters of the match result cache and the stored top-K lists"""
+    return {
+        "status": "success",
+        "match_cache": match_cache.stats(),
+        "recommendations": recommendations.stats(),
+        "component_matrices": component_matrices.stats(),
+        "semantic_index": semantic_index.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+def snapshot_allocation_inputs():
+    """Active candidates, open internships and their prepared scoring inputs
+    
+    Reads a pinned registry version with the TF-IDF weights of the same
+    moment, so preparing the inputs holds no lock.
+    """
+    version, skills = pin_scoring()
+    candidates = list(version.candidates.find(status="active"))
+    industries = [
+        industry for industry in version.industries.find(status="active")
+        if industry.get("filled_positions", 0) < industry.get("internship_capacity", 0)
+    ]
+    inputs = BatchMatchingEngine.prepare(candidates, industries, skills) if candidates and industries else None
+    return candidates, industries, inputs
+
+def run_allocation(request: AllocationRequest, cancel: Optional[threading.Event] = None):
+    """Snapshot the active registry and allocate it; runs on a match worker thread"""
+    candidates, industries, inputs = snapshot_allocation_inputs()
+    assignment = allocation_engine.allocate(
+        candidates, industries, inputs, request.method, request.min_score_threshold,
+        request.shortlist_size, request.reservation_quotas, cancel
+    )
+    return candidates, industries, assignment
+
+def validate_allocation_request(request: AllocationRequest) -> None:
+    if request.method not in AllocationEngine.METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown allocation method: {request.method}")
+    for field, shares in request.reservation_quotas.items():
+        if field not in ("category", "district_type"):
+            raise HTTPException(status_code=400, detail=f"Quotas are supported on category and district_type, not {field}")
+        if any(share < 0 for share in shares.values()):
+            raise HTTPException(status_code=400, detail="Reservation quotas must be non-negative")
+    if sum(sum(shares.values()) for shares in request.reservation_quotas.values()) > 1.0:
+        raise HTTPException(status_code=400, detail="Reservation quotas add up to more than 100% of seats")
+
+def allocation_entry(candidate: Dict[str, Any], industry: Dict[str, Any], score: float,
+                     seat_type: str) -> Dict[str, Any]:
+    return {
+        "candidate_id": candidate["id"],
+        "candidate_name": candidate.get("name"),
+        "industry_id": industry["id"],
+        "company_name": industry.get("company_name"),
+        "internship_title": industry.get("internship_title"),
+        "overall_score": score,
+        "seat_type": seat_type
+    }
+
+def apply_allocation(candidates: List[Dict[str, Any]], industries: List[Dict[str, Any]],
+                     assignment: Dict[int, Tuple[int, float, str]], commit: bool) -> List[Dict[str, Any]]:
+    """Build allocation entries and, with commit, mark candidates allocated and fill seats
+    
+    When committing a snapshot taken a while ago (background jobs), candidates
+    and seats taken since are skipped. The checks and both batched writes
+    happen under one hold of the store lock, so no other write lands between them.
+    """
+    if not commit:
+        return [allocation_entry(candidates[c_pos], industries[i_pos], score, seat_type)
+                for c_pos, (i_pos, score, seat_type) in sorted(assignment.items())]
+    
+    allocations = []
+    allocated: Dict[str, Dict[str, Any]] = {}
+    filled: Dict[str, int] = {}
+    with store.lock:
+        for c_pos, (i_pos, score, seat_type) in sorted(assignment.items()):
+            candidate, industry = candidates[c_pos], industries[i_pos]
+            current = industries_db.get(industry["id"])
+            if candidates_db.get(candidate["id"], {}).get("status") != "active" or current is None:
+                continue
+            seats = filled.get(industry["id"], current.get("filled_positions", 0))
+            if seats >= current.get("internship_capacity", 0):
+                continue
+            filled[industry["id"]] = seats + 1
+            allocated[candidate["id"]] = {"status": "allocated", "allocated_industry_id": industry["id"]}
+            allocations.append(allocation_entry(candidate, industry, score, seat_type))
+        candidates_db.update_many(allocated)
+        industries_db.update_many({industry_id: {"filled_positions": seats} for industry_id, seats in filled.items()})
+    return allocations
+
+# One allocation at a time, so committed runs never hand out the same seat twice
+allocation_lock = asyncio.Lock()
+
+@app.post("/allocate")
+async def allocate_internships(request: AllocationRequest):
+    """Assign candidates to internship seats in one pass, respecting capacity and quotas"""
+    validate_allocation_request(request)
+    
+    try:
+        started = datetime.now()
+        async with allocation_lock:
+            candidates, industries, assignment = await match_workers.run(
+                run_allocation, request, timeout=MATCH_TIMEOUT_SECONDS
+            )
+            # Committing writes every allocated candidate and internship: keep it off the event loop
+            allocations = await run_in_threadpool(apply_allocation, candidates, industries, assignment,
+                                                  request.commit)
+        
+        logger.info(f"Allocated {len(allocations)} of {len(candidates)} candidates ({request.method})")
+        
+        return {
+            "status": "success",
+            "method": request.method,
+            "committed": request.commit,
+            "total_allocated": len(allocations),
+            "unallocated_candidates": len(candidates) - len(allocations),
+            "total_score": round(sum(a["overall_score"] for a in allocations), 3),
+            "allocations": allocations,
+            "elapsed_seconds": round((datetime.now() - started).total_seconds(), 3),
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    except asyncio.TimeoutError:
+        logger.warning(f"Allocation cancelled after {MATCH_TIMEOUT_SECONDS}s")
+        raise HTTPException(status_code=504, detail=f"Allocation timed out after {MATCH_TIMEOUT_SECONDS} seconds")
+    except Exception as e:
+        logger.error(f"Error in allocation: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Allocation failed: {str(e)}")
+
+# Listing pagination
+LIST_DEFAULT_LIMIT = 100
+LIST_MAX_LIMIT = 1000
+EXPORT_PAGE_SIZE = 1000
+
+def parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Decode the opaque next_cursor token returned by a previous page"""
+    if not cursor:
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated field projection, e.g. "id,name,status" """
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+def project(record: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+def candidate_filters(category: Optional[str], district_type: Optional[str], location: Optional[str],
+                      sector: Optional[str], status: Optional[str]):
+    """Equality filters plus a predicate for the list-valued preferred_sectors"""
+    where = (lambda c: sector in c.get("preferred_sectors", [])) if sector else None
+    return where, {"category": category, "district_type": district_type,
+                   "current_location": location, "status": status}
+
+def industry_filters(location: Optional[str], sector: Optional[str], status: Optional[str]):
+    return None, {"location": location, "sector": sector, "status": status}
+
+def list_page(table: RecordTable, label: str, cursor: Optional[str], limit: int,
+              fields: Optional[str], where, filters: Dict[str, Any]) -> Dict[str, Any]:
+    """One page of records plus ``count`` (records on this page) and, on the first
+    page only, ``total`` (all that match; null on later pages)
+    
+    Counting may scan every matching record, so clients walking the pages
+    pay for it once. Runs on a worker thread (see get_candidates).
+    """
+    position = parse_cursor(cursor)
+    records, next_position = table.page(position, limit, where, **filters)
+    projection = parse_fields(fields)
+    total = None
+    if position is None:
+        if where is None:
+            total = table.count(**filters)
+        else:
+            total = sum(1 for record in table.find(**filters) if where(record))
     return {
         "status": "success",
-        "count": len(candidates_db),
-        "candidates": list(candidates_db.values())
+        "total": total,
+        "count": len(records),
+        label: [project(record, projection) for record in records],
+        "next_cursor": None if next_position is None else str(next_position)
     }
 
+def export_ndjson(table: RecordTable, fields: Optional[str], where, filters: Dict[str, Any]) -> StreamingResponse:
+    """Stream every matching record as NDJSON, one page in memory at a time
+    
+    Pages are read from the table as of the request, so registrations
+    during a long export neither tear records nor shift pages.
+    """
+    projection = parse_fields(fields)
+    table = table.frozen()
+    
+    def lines() -> Iterator[bytes]:
+        position: Optional[int] = None
+        while True:
+            records, position = table.page(position, EXPORT_PAGE_SIZE, where, **filters)
+            if records:
+                yield "".join(json.dumps(project(record, projection)) + "\n" for record in records).encode()
+            if position is None:
+                return
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/candidates")
+async def get_candidates(request: Request, cursor: Optional[str] = None,
+                         limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+                         fields: Optional[str] = None, category: Optional[str] = None,
+                         district_type: Optional[str] = None, location: Optional[str] = None,
+                         sector: Optional[str] = None, status: Optional[str] = None):
+    """Get registered candidates, one page at a time
+    
+    Pass next_cursor from the previous page as ``cursor`` to continue; it is
+    null on the last page. ``count`` is the number of candidates on this page;
+    the first page also reports ``total``, the number matching the filters.
+    Pages carry an ETag; an unchanged page costs a 304 with If-None-Match.
+    """
+    where, filters = candidate_filters(category, district_type, location, sector, status)
+    # Filtered pages scan records: keep them off the event loop
+    page = await run_in_threadpool(list_page, candidates_db, "candidates", cursor, limit, fields, where, filters)
+    return conditional_json(request, page)
+
+@app.get("/candidates/export")
+async def export_candidates(fields: Optional[str] = None, category: Optional[str] = None,
+                            district_type: Optional[str] = None, location: Optional[str] = None,
+                            sector: Optional[str] = None, status: Optional[str] = None):
+    """Stream all matching candidates as NDJSON"""
+    where, filters = candidate_filters(category, district_type, location, sector, status)
+    return export_ndjson(candidates_db, fields, where, filters)
+
 @app.get("/candidates/{candidate_id}")
 async def get_candidate(candidate_id: str):
     """Get specific candidate details"""
@@ -577,13 +2678,21 @@ async def get_candidate(candidate_id: str):
     }
 
 @app.get("/industries") 
-async def get_industries():
-    """Get all registered industries"""
-    return {
-        "status": "success",
-        "count": len(industries_db),
-        "industries": list(industries_db.values())
-    }
+async def get_industries(request: Request, cursor: Optional[str] = None,
+                         limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+                         fields: Optional[str] = None, location: Optional[str] = None,
+                         sector: Optional[str] = None, status: Optional[str] = None):
+    """Get registered industries, one page at a time (with an ETag, like /candidates)"""
+    where, filters = industry_filters(location, sector, status)
+    page = await run_in_threadpool(list_page, industries_db, "industries", cursor, limit, fields, where, filters)
+    return conditional_json(request, page)
+
+@app.get("/industries/export")
+async def export_industries(fields: Optional[str] = None, location: Optional[str] = None,
+                            sector: Optional[str] = None, status: Optional[str] = None):
+    """Stream all matching industries as NDJSON"""
+    where, filters = industry_filters(location, sector, status)
+    return export_ndjson(industries_db, fields, where, filters)
 
 @app.get("/industries/{industry_id}")
 async def get_industry(industry_id: str):
@@ -596,52 +2705,240 @@ async def get_industry(industry_id: str):
         "industry": industries_db[industry_id]
     }
 
-@app.get("/stats")
-async def get_system_stats():
-    """Get system statistics"""
-    active_candidates = sum(1 for c in candidates_db.values() if c.get("status") == "active")
-    active_industries = sum(1 for i in industries_db.values() if i.get("status") == "active")
-    total_capacity = sum(i.get("internship_capacity", 0) for i in industries_db.values())
-    filled_positions = sum(i.get("filled_positions", 0) for i in industries_db.values())
-    
-    # Category distribution
-    category_dist = {}
-    district_dist = {}
-    sector_dist = {}
+# Background jobs
+def candidate_shortlist_rows(inputs: BatchInputs, candidates: RecordColumns, industries: RecordColumns,
+                             size: int, min_score_threshold: float,
+                             cancel: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+    """Result rows listing each candidate's best internships, best first"""
+    c_idx, i_idx, scores = BatchMatchingEngine.shortlists(inputs, size, min_score_threshold, cancel)
+    order = np.lexsort((i_idx, -scores, c_idx))
+    rows: List[Dict[str, Any]] = []
+    industry_records: Dict[int, Dict[str, Any]] = {}
+    last_pos = None
+    for c_pos, i_pos, score in zip(c_idx[order].tolist(), i_idx[order].tolist(), scores[order].tolist()):
+        if c_pos != last_pos:
+            candidate = candidates.record(c_pos)
+            rows.append({"candidate_id": candidate["id"], "candidate_name": candidate.get("name"), "matches": []})
+            last_pos = c_pos
+        industry = industry_records.get(i_pos)
+        if industry is None:
+            industry = industry_records[i_pos] = industries.record(i_pos)
+        rows[-1]["matches"].append({
+            "industry_id": industry["id"],
+            "company_name": industry.get("company_name"),
+            "internship_title": industry.get("internship_title"),
+            "overall_score": score
+        })
+    return rows
+
+def run_match_job(request: MatchJobRequest, context: JobContext) -> Dict[str, Any]:
+    """All-pairs matching in candidate chunks
     
-    for candidate in candidates_db.values():
-        category = candidate.get("category", "Unknown")
-        district = candidate.get("district_type", "Unknown")
-        category_dist[category] = category_dist.get(category, 0) + 1
-        district_dist[district] = district_dist.get(district, 0) + 1
+    Produces the overall top_n pairs (same entries as /match_internships),
+    or with per_candidate one row per candidate written as each chunk finishes.
+    """
+    candidates, industries, inputs, skills = snapshot_match_inputs()
+    n, m = len(candidates), len(industries)
+    context.set_total(n * m)
+    summary = {"candidates": n, "internships": m}
+    if inputs is None:
+        return summary
     
-    for industry in industries_db.values():
-        sector = industry.get("sector", "Unknown")
-        sector_dist[sector] = sector_dist.get(sector, 0) + 1
+    chunk = max(1, JobManager.CHUNK_CELLS // m)
+    best_idx, best_scores = np.empty(0, dtype=np.int64), np.empty(0)
+    for start in range(0, n, chunk):
+        part = inputs.rows(start, min(start + chunk, n))
+        if request.per_candidate:
+            context.write(candidate_shortlist_rows(part, candidates, industries, request.per_candidate,
+                                                   request.min_score_threshold, context.cancel))
+        else:
+            idx, scores = top_in_rows(part, request.top_n, request.min_score_threshold,
+                                      BatchMatchingEngine.BLOCK_CELLS, context.cancel)
+            best_idx, best_scores = select_top(
+                np.concatenate([best_idx, idx]), np.concatenate([best_scores, scores]), request.top_n)
+        context.advance(part.n_rows * m)
     
+    if not request.per_candidate:
+        order = np.lexsort((best_idx, -best_scores))
+        entries = [
+            build_match_entry(candidate, industry,
+                              MatchingEngine.calculate_match_score(candidate, industry, skills=skills))
+            for candidate, industry in ((candidates.record(k // m), industries.record(k % m))
+                                        for k in best_idx[order].tolist())
+        ]
+        context.write(entries)
+    return summary
+
+async def commit_allocation(candidates, industries, assignment, commit: bool) -> List[Dict[str, Any]]:
+    """apply_allocation under the allocation lock, which lives on the event loop; the writes run off it"""
+    async with allocation_lock:
+        return await run_in_threadpool(apply_allocation, candidates, industries, assignment, commit)
+
+def run_allocation_job(request: AllocationRequest, context: JobContext) -> Dict[str, Any]:
+    """Allocation with progress over the shortlist scoring; commits take the allocation lock on the event loop"""
+    candidates, industries, inputs = snapshot_allocation_inputs()
+    context.set_total(len(candidates) * len(industries))
+    assignment = allocation_engine.allocate(
+        candidates, industries, inputs, request.method, request.min_score_threshold, request.shortlist_size,
+        request.reservation_quotas, context.cancel, context.advance
+    )
+    allocations = context.on_loop(commit_allocation, candidates, industries, assignment, request.commit)
+    context.write(allocations)
+    return {
+        "method": request.method,
+        "committed": request.commit,
+        "total_allocated": len(allocations),
+        "unallocated_candidates": len(candidates) - len(allocations),
+        "total_score": round(sum(a["overall_score"] for a in allocations), 3)
+    }
+
+@app.post("/jobs/match", status_code=202)
+async def submit_match_job(request: MatchJobRequest):
+    """Queue an all-pairs matching job; poll /jobs/{job_id} and page through its results"""
+    if request.top_n <= 0 or (request.per_candidate is not None and request.per_candidate <= 0):
+        raise HTTPException(status_code=400, detail="top_n and per_candidate must be positive")
+    job = job_manager.submit("match", request.model_dump(), lambda context: run_match_job(request, context))
+    return {"status": "success", "job": job, "timestamp": datetime.now().isoformat()}
+
+@app.post("/jobs/allocate", status_code=202)
+async def submit_allocation_job(request: AllocationRequest):
+    """Queue an allocation run; committed allocations are written when the job finishes"""
+    validate_allocation_request(request)
+    job = job_manager.submit("allocation", request.model_dump(), lambda context: run_allocation_job(request, context))
+    return {"status": "success", "job": job, "timestamp": datetime.now().isoformat()}
+
+@app.get("/jobs")
+async def list_jobs(limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT)):
+    """Most recent jobs first"""
+    jobs = job_manager.table.recent(limit)
+    return {"status": "success", "count": len(jobs), "jobs": jobs, "timestamp": datetime.now().isoformat()}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, progress (pairs scored, ETA) and summary"""
+    job = job_manager.table.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "job": job, "timestamp": datetime.now().isoformat()}
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str, cursor: Optional[str] = None,
+                          limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT)):
+    """Page through a job's stored results; rows written so far are readable while it runs"""
+    job = job_manager.table.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    results, next_position = job_manager.table.results(job_id, parse_cursor(cursor), limit)
     return {
         "status": "success",
-        "system_stats": {
-            "candidates": {
-                "total": len(candidates_db),
-                "active": active_candidates,
-                "category_distribution": category_dist,
-                "district_distribution": district_dist
-            },
-            "industries": {
-                "total": len(industries_db),
-                "active": active_industries,
-                "sector_distribution": sector_dist
-            },
-            "internships": {
-                "total_capacity": total_capacity,
-                "filled_positions": filled_positions,
-                "available_positions": total_capacity - filled_positions,
-                "utilization_rate": round((filled_positions / total_capacity) * 100, 2) if total_capacity > 0 else 0
-            }
-        },
+        "job_status": job["status"],
+        "count": len(results),
+        "results": results,
+        "next_cursor": None if next_position is None else str(next_position)
+    }
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Ask a queued or running job to stop; it finishes as cancelled after its current block"""
+    job = job_manager.table.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] in ("queued", "running"):
+        job = job_manager.cancel(job_id)
+    return {"status": "success", "job": job, "timestamp": datetime.now().isoformat()}
+
+@app.get("/stats")
+async def get_system_stats(request: Request, verify: bool = False):
+    """Get system statistics
+    
+    Counters are maintained on write; ``verify=true`` recomputes them from the
+    store and reports (and repairs) any drift. The ETag covers everything but
+    the timestamp, so polling unchanged statistics costs a 304.
+    """
+    response = {
+        "status": "success",
+        "system_stats": registry_stats.snapshot(),
         "timestamp": datetime.now().isoformat()
     }
+    
+    if verify:
+        response["system_stats"], consistent = await run_in_threadpool(verify_registry_stats)
+        response["verification"] = {"consistent": consistent}
+    
+    return conditional_json(request, response)
+
+def verify_registry_stats() -> Tuple[Dict[str, Any], bool]:
+    """Recompute the statistics from the store and replace the counters if they drifted
+    
+    Holds the store lock throughout, so no write can land between reading the
+    counters and replacing them. Returns the statistics and whether they matched.
+    """
+    global registry_stats
+    with store.lock:
+        kept = registry_stats.snapshot()
+        recomputed = RegistryStats.recompute(candidates_db.values(), industries_db.values())
+        consistent = recomputed.snapshot() == kept
+        if not consistent:
+            logger.warning("Incremental statistics drifted from the store; resetting counters")
+            registry_stats = recomputed
+        return registry_stats.snapshot(), consistent
+
+@app.get("/metrics")
+async def get_metrics():
+    """Request, matching pipeline and cache metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def sync_with_store() -> None:
+    """Apply other workers' writes; the table listeners update the derived indexes as they go"""
+    with store.lock:
+        if store.sync():
+            # The change log didn't reach back far enough to apply them one by one
+            rebuild_derived_indexes()
+
+@app.middleware("http")
+async def sync_store(request, call_next):
+    """Pick up records written by other workers before serving a request
+    
+    Health checks and the like are served as they are. Skipped during
+    warm-up, which reads the latest records itself; the first sync after it
+    catches up with anything committed meanwhile. The sync runs on a worker
+    thread, so the event loop keeps serving while it applies the changes.
+    """
+    if request.url.path not in UNGATED_PATHS and readiness.finished.is_set() and store.changed_elsewhere():
+        await run_in_threadpool(sync_with_store)
+    return await call_next(request)
+
+@app.middleware("http")
+async def observe_requests(request, call_next):
+    """Record request latency per route; X-Profile: 1 adds a Server-Timing breakdown"""
+    profiled = request.headers.get(PROFILE_HEADER, "").lower() in ("1", "true")
+    profile = RequestProfile() if profiled or METRICS_COMPONENT_TIMERS else None
+    token = current_profile.set(profile)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_profile.reset(token)
+    elapsed = time.perf_counter() - started
+    route = request.scope.get("route")
+    request_duration.observe(elapsed, request.method, getattr(route, "path", "unmatched"), str(response.status_code))
+    if profile is not None:
+        for component, seconds in profile.components.items():
+            match_component_seconds.inc(seconds, component)
+        if profiled:
+            response.headers["Server-Timing"] = profile.server_timing(elapsed)
+    return response
+
+@app.middleware("http")
+async def wait_for_warm_up(request, call_next):
+    """Hold requests other than health checks until warm-up has finished"""
+    if request.url.path not in UNGATED_PATHS:
+        await readiness.wait()
+        if readiness.error is not None:
+            return FastJSONResponse({"detail": "Service failed to start"}, status_code=503)
+    return await call_next(request)
+
+startup_profile.checkpoint("module_init")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,233 @@
+"""Request and matching-pipeline metrics in the Prometheus text format.
+
+Metrics are kept in process, with no client library: counters and
+histograms with optional labels, plus gauges read from a callback at
+scrape time. RequestProfile collects one request's per-stage timings for
+the opt-in profiling header. The active profile is carried in a context
+variable, so stage timers anywhere in the pipeline find it, including on
+match worker threads that run with a copy of the request's context.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+INF_BUCKET = 'le="+Inf"'
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[str]:
+        return ()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_number(value)}"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, sum, count)
+        self._series: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            counts, total, count = self._series.get(label_values) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._series[label_values] = (counts, total + value, count + 1)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            series = sorted((labels, (list(c), s, n)) for labels, (c, s, n) in self._series.items())
+        for label_values, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_number(float(bound))}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(self.labels, label_values, INF_BUCKET)} {count}"
+            yield f"{self.name}_sum{_format_labels(self.labels, label_values)} {_number(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, label_values)} {count}"
+
+
+class CallbackGauge(Metric):
+    """Gauge (or counter, with kind="counter") whose samples are read at scrape time"""
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], Iterable[Tuple[LabelValues, float]]],
+                 labels: Sequence[str] = (), kind: str = "gauge"):
+        super().__init__(name, help_text, labels)
+        self.kind = kind
+        self._read = read
+
+    def samples(self) -> Iterable[str]:
+        for label_values, value in self._read():
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_number(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name: str, help_text: str, read, labels: Sequence[str] = (), kind: str = "gauge") -> CallbackGauge:
+        return self.register(CallbackGauge(name, help_text, read, labels, kind))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class RequestProfile:
+    """Stage timings, score component timings and counters for one profiled request"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, float] = {}
+        self.components: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_components(self, timings: Iterable[Tuple[str, float]]) -> None:
+        """Add the per-component times of one scored pair"""
+        with self._lock:
+            for component, seconds in timings:
+                self.components[component] = self.components.get(component, 0.0) + seconds
+
+    def add_count(self, name: str, amount: int) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def server_timing(self, total_seconds: Optional[float] = None) -> str:
+        """Server-Timing header value: stage durations in ms, counts as descriptions"""
+        entries = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.stages.items()]
+        entries += [f"score_{component};dur={seconds * 1000:.3f}" for component, seconds in self.components.items()]
+        entries += [f'{name};desc="{count}"' for name, count in self.counts.items()]
+        if total_seconds is not None:
+            entries.append(f"total;dur={total_seconds * 1000:.3f}")
+        return ", ".join(entries)
+
+
+class StartupProfile:
+    """Wall time from the start of the import to taking traffic, split into phases
+
+    Each checkpoint closes a phase that began at the previous one, so the
+    phases add up to the time to ready. Phases after ready (background
+    preloading) are kept apart.
+    """
+
+    def __init__(self, started: float):
+        self.started = started
+        self._last = started
+        self.phases: Dict[str, float] = {}
+        self.after_ready: Dict[str, float] = {}
+        self.ready_after: Optional[float] = None
+
+    def checkpoint(self, phase: str) -> float:
+        """End a phase now; returns its duration"""
+        now = time.perf_counter()
+        seconds, self._last = now - self._last, now
+        (self.phases if self.ready_after is None else self.after_ready)[phase] = seconds
+        return seconds
+
+    def mark_ready(self) -> float:
+        self.ready_after = time.perf_counter() - self.started
+        self._last = time.perf_counter()
+        return self.ready_after
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "phases": {phase: round(seconds, 4) for phase, seconds in self.phases.items()},
+            "ready_after_seconds": None if self.ready_after is None else round(self.ready_after, 4),
+            "after_ready": {phase: round(seconds, 4) for phase, seconds in self.after_ready.items()}
+        }
+
+    def summary(self) -> str:
+        return ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in self.phases.items())
+
+
+current_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+
+@contextmanager
+def stage_timer(stage: str, histogram: Optional[Histogram] = None, *label_values: str) -> Iterator[None]:
+    """Time a pipeline stage into the active profile and, if given, a histogram"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        profile = current_profile.get()
+        if profile is not None:
+            profile.add_time(stage, elapsed)
+        if histogram is not None:
+            histogram.observe(elapsed, stage, *label_values)
@@ -0,0 +1,95 @@
+"""Qualification normalization for the matcher.
+
+A qualification is reduced once to its set of canonical tokens: lowercased,
+degree abbreviations folded ("B.Tech", "B. Tech", "B Tech", "b-tech" and
+"Bachelor of Technology" all become "btech") and stop words such as "in" and
+"of" dropped. Tokens get interned ids and each qualification is kept as the
+frozenset of its token ids, so two qualifications are the same when their
+sets are equal and share a keyword when the sets intersect.
+"""
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Tuple
+
+STOP_WORDS = frozenset({"a", "an", "and", "at", "for", "in", "of", "on", "or", "the", "with"})
+
+# Spelled-out degrees and their abbreviations, matched on whole words after dots are removed
+DEGREE_ALIASES = {
+    "bachelor of technology": "btech",
+    "master of technology": "mtech",
+    "bachelor of engineering": "be",
+    "master of engineering": "me",
+    "bachelor of science": "bsc",
+    "master of science": "msc",
+    "bachelor of commerce": "bcom",
+    "master of commerce": "mcom",
+    "bachelor of arts": "ba",
+    "master of arts": "ma",
+    "bachelor of design": "bdes",
+    "master of design": "mdes",
+    "bachelor of fine arts": "bfa",
+    "bachelor of pharmacy": "bpharm",
+    "bachelor of business administration": "bba",
+    "master of business administration": "mba",
+    "bachelor of computer applications": "bca",
+    "master of computer applications": "mca",
+    "chartered accountant": "ca",
+    "doctor of philosophy": "phd"
+}
+
+# Second halves of degree abbreviations written with a space, as in "b tech" or "m sc"
+DEGREE_SUFFIXES = ("tech", "sc", "com", "a", "e", "des", "fa", "pharm", "ed", "arch", "phil", "voc", "ca")
+
+# "b. tech", "b-tech", "m. sc", "b tech", "m com" -> "btech", "mtech", "msc", "btech", "mcom";
+# separated by spaces alone only before a known suffix, so "grade b in maths" is left alone
+_SPLIT_DEGREE = re.compile(r"\b([bm])(?:\s*[.\-]\s*(?=[a-z])|\s+(?=(?:" + "|".join(DEGREE_SUFFIXES) + r")\b))")
+_ALIASES = re.compile(r"\b(" + "|".join(re.escape(phrase) for phrase in DEGREE_ALIASES) + r")\b")
+_TOKEN = re.compile(r"[a-z0-9+#]+")
+
+
+def qualification_tokens(qualification: str) -> Tuple[str, ...]:
+    """Canonical tokens of a qualification, in order of first appearance"""
+    text = _SPLIT_DEGREE.sub(r"\1", qualification.lower()).replace(".", "")
+    text = _ALIASES.sub(lambda match: DEGREE_ALIASES[match.group(1)], text)
+    return tuple(dict.fromkeys(token for token in _TOKEN.findall(text) if token not in STOP_WORDS))
+
+
+class TokenVocabulary:
+    """Interned ids of qualification tokens; ids are never reused"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ids: Dict[str, int] = {}
+        self.tokens: List[str] = []
+
+    def id(self, token: str) -> int:
+        token_id = self.ids.get(token)
+        if token_id is None:
+            with self._lock:
+                token_id = self.ids.get(token)
+                if token_id is None:
+                    token_id = self.ids[token] = len(self.tokens)
+                    self.tokens.append(token)
+        return token_id
+
+    def adopt(self, tokens: List[str]) -> None:
+        """Continue a saved numbering (e.g. from a snapshot) so its masks stay valid here
+
+        Raises ValueError if tokens were already numbered differently.
+        """
+        with self._lock:
+            if tokens[:len(self.tokens)] != self.tokens[:len(tokens)]:
+                raise ValueError("Qualification tokens are already numbered differently")
+            for token in tokens[len(self.tokens):]:
+                self.ids[token] = len(self.tokens)
+                self.tokens.append(token)
+
+
+vocabulary = TokenVocabulary()
+
+
+@lru_cache(maxsize=65536)
+def qualification_token_ids(qualification: str) -> FrozenSet[int]:
+    """Ids of a qualification's tokens; empty if it has none"""
+    return frozenset(vocabulary.id(token) for token in qualification_tokens(qualification))
@@ -0,0 +1,251 @@
+"""Per-candidate and per-internship top-K lists, maintained as records are written.
+
+A list is computed by the pruned search the first time its subject is
+matched, then kept current: a registration or update is scored only against
+the stored lists it could enter (those that are not full, or whose K-th
+score is below the pair's upper bound), so a lookup reads at most K stored
+entries. Lists that involve a changed or deleted record are dropped and
+recomputed when next read, as are lists whose TF-IDF weights have been refit
+since (see MatchResultCache.skills_current).
+
+Writes only queue the changed ids; a background thread applies them, and
+reads apply whatever is still queued first, so a lookup always reflects
+every write before it.
+"""
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from main import FeatureCache, MatchIndex, MatchState, SkillWeights
+    from result_cache import ScorePair
+
+# (score, -seq, other id, match details), best first
+ListEntry = Tuple[float, int, str, Dict[str, Any]]
+
+
+class Recommendations:
+    """Top-K lists kept per subject, read in place of the pruned search"""
+
+    KINDS = ("candidate", "industry")
+
+    def __init__(self, k: int, lock: threading.RLock, pin: Callable[[], "MatchState"],
+                 index: Callable[[], "MatchIndex"], features: Callable[[], "FeatureCache"],
+                 score_pair: "ScorePair", skills_current: Callable[["SkillWeights", "SkillWeights"], bool]):
+        self.k = k
+        # The store lock; the index and feature cache are read through getters since rebuilds replace them
+        self.lock = lock
+        self.pin = pin
+        self.index = index
+        self.features = features
+        self.score_pair = score_pair
+        self.skills_current = skills_current
+        # kind -> subject id -> list entries
+        self._lists: Dict[str, Dict[str, List[ListEntry]]] = {}
+        # kind -> subject id -> TF-IDF weights the list was computed with
+        self._skills: Dict[str, Dict[str, "SkillWeights"]] = {}
+        # kind -> other id -> subjects whose list holds it
+        self._listed_in: Dict[str, Dict[str, set]] = {}
+        # kind -> K-th (score, -seq) by subject seq; +inf where no list is kept, -inf where not full
+        self._kth: Dict[str, np.ndarray] = {}
+        self._pending: deque = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Bumped whenever lists change with the registry, so a list computed meanwhile is not stored
+        self._generation = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop every list, e.g. after the derived indexes were rebuilt"""
+        self._generation += 1
+        for kind in self.KINDS:
+            self._lists[kind] = {}
+            self._skills[kind] = {}
+            self._listed_in[kind] = {}
+            self._kth[kind] = np.full(1024, np.inf)
+        self._pending.clear()
+
+    def record_change(self, kind: str, record_id: str) -> None:
+        """Table listener body: queue a written record"""
+        if self.k > 0:
+            self._pending.append((kind, record_id))
+            self._wake.set()
+
+    # Stored lists
+    @staticmethod
+    def _other(kind: str) -> str:
+        return "industry" if kind == "candidate" else "candidate"
+
+    def _postings(self, kind: str):
+        index = self.index()
+        return index.candidates if kind == "candidate" else index.industries
+
+    def _kth_by_seq(self, kind: str) -> np.ndarray:
+        """K-th scores covering every sequence number issued so far"""
+        size = len(self._postings(kind).ids)
+        kth = self._kth[kind]
+        if size > len(kth):
+            grown = np.full(max(size, len(kth) * 2), np.inf)
+            grown[:len(kth)] = kth
+            kth = self._kth[kind] = grown
+        return kth
+
+    def _set_kth(self, kind: str, subject_id: str, value: float) -> None:
+        seq = self._postings(kind).seq.get(subject_id)
+        if seq is not None:
+            self._kth_by_seq(kind)[seq] = value
+
+    def _store(self, kind: str, subject_id: str, entries: List[ListEntry]) -> None:
+        listed_in = self._listed_in[self._other(kind)]
+        kept = {entry[2] for entry in entries}
+        for entry in self._lists[kind].get(subject_id, ()):
+            if entry[2] not in kept:
+                holders = listed_in.get(entry[2])
+                if holders is not None:
+                    holders.discard(subject_id)
+                    if not holders:
+                        del listed_in[entry[2]]
+        for entry in entries:
+            listed_in.setdefault(entry[2], set()).add(subject_id)
+        self._lists[kind][subject_id] = entries
+        self._set_kth(kind, subject_id, entries[-1][0] if len(entries) >= self.k else -np.inf)
+
+    def _drop(self, kind: str, subject_id: str) -> None:
+        if subject_id in self._lists[kind]:
+            self._store(kind, subject_id, [])
+            del self._lists[kind][subject_id]
+            del self._skills[kind][subject_id]
+        self._set_kth(kind, subject_id, np.inf)
+
+    def _compute(self, kind: str, record: Dict[str, Any], state: "MatchState") -> List[ListEntry]:
+        if kind == "candidate":
+            top, _ = state.index.match_candidate(record, state.features, state.skills, self.k, 0.0)
+            seqs = state.index.industries.seq
+        else:
+            top, _ = state.index.match_industry(record, state.features, state.skills, self.k, 0.0)
+            seqs = state.index.candidates.seq
+        return [(score, -seqs[other_id], other_id, details) for score, details, other_id in top]
+
+    # Applying writes
+    def _offer(self, kind: str, record_id: str) -> None:
+        """Score a written record against the opposite lists it could enter"""
+        subject_kind = self._other(kind)
+        subjects = self._postings(subject_kind)
+        kth = self._kth_by_seq(subject_kind)
+        if not (kth < np.inf).any():
+            return
+        index, cache = self.index(), self.features()
+        seq = self._postings(kind).seq[record_id]
+        if kind == "industry":
+            features = cache.industry_by_id(record_id)
+            if not features.has_open_seats:
+                return
+            overlapping = subjects.lookup(index.industry_keys(features))
+            bounds = [
+                (index.no_overlap_bound(has_prefs, bool(features.qualifications), bonus, penalty), members)
+                for (has_prefs, bonus, penalty), members in subjects.buckets.items()
+            ]
+        else:
+            features = cache.candidate_by_id(record_id)
+            overlapping = subjects.lookup(index.candidate_keys(features))
+            bounds = [
+                (index.no_overlap_bound(bool(features.location_preferences), has_quals,
+                                        features.affirmative_bonus, features.experience_penalty), members)
+                for has_quals, members in subjects.buckets.items()
+            ]
+
+        # Overlapping pairs can score up to 1.0; the others up to their bucket's bound
+        reachable = [overlapping[kth[overlapping] <= 1.0]]
+        for bound, members in bounds:
+            members = np.frombuffer(members, dtype=np.int32)
+            members = members[kth[members] <= bound]
+            reachable.append(members[~np.isin(members, overlapping)])
+        for subject_seq in np.concatenate(reachable).tolist():
+            subject_id = subjects.ids[subject_seq]
+            if kind == "industry":
+                details = self.score_pair(cache.candidate_by_id(subject_id), features, None)
+            else:
+                details = self.score_pair(features, cache.industry_by_id(subject_id), None)
+            entry = (details["overall_score"], -seq, record_id, details)
+            entries = self._lists[subject_kind][subject_id]
+            if len(entries) < self.k or entry[:2] > entries[-1][:2]:
+                self._store(subject_kind, subject_id, sorted(entries + [entry], key=lambda e: e[:2],
+                                                             reverse=True)[:self.k])
+
+    def _apply(self, kind: str, record_id: str) -> None:
+        self._generation += 1
+        self._drop(kind, record_id)
+        for subject_id in list(self._listed_in[kind].get(record_id, ())):
+            self._drop(self._other(kind), subject_id)
+        if record_id in self._postings(kind).seq:
+            self._offer(kind, record_id)
+
+    def _apply_pending(self) -> None:
+        while self._pending:
+            kind, record_id = self._pending.popleft()
+            self._apply(kind, record_id)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            while self._pending and not self._stop.is_set():
+                with self.lock:
+                    if self._pending:
+                        self._apply(*self._pending.popleft())
+
+    def start(self) -> None:
+        """Apply queued writes on a background thread from now on; nothing to do while disabled"""
+        if self.k > 0 and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="recommendations", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # Reads
+    def top(self, kind: str, subject_id: str, top_n: int, min_score_threshold: float
+            ) -> Optional[Tuple["MatchState", List[Tuple[float, Dict[str, Any], str]]]]:
+        """The match state the list reflects and its (score, match details, other id) best
+        first, or None if the lists can't answer (top_n is 0 or exceeds K, or the lists
+        are disabled)
+
+        Same result as MatchIndex.match_candidate / match_industry on that
+        state. The store lock is taken to apply queued writes and to read
+        or store the list; a missing list is computed without it.
+        """
+        if self.k <= 0 or top_n <= 0 or top_n > self.k:
+            return None
+        with self.lock:
+            self._apply_pending()
+            state = self.pin()
+            generation = self._generation
+            entries = self._lists[kind].get(subject_id)
+            if entries is not None and not self.skills_current(self._skills[kind][subject_id], state.skills):
+                entries = None
+        if entries is None:
+            table = state.registry.candidates if kind == "candidate" else state.registry.industries
+            entries = self._compute(kind, table[subject_id], state)
+            with self.lock:
+                # A write applied meanwhile would be missing from it: compute it again next time instead
+                if self._generation == generation:
+                    self._store(kind, subject_id, entries)
+                    self._skills[kind][subject_id] = state.skills
+        return state, [(score, details, other_id) for score, _, other_id, details in entries
+                       if score >= min_score_threshold][:top_n]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "k": self.k,
+            "candidate_lists": len(self._lists["candidate"]),
+            "industry_lists": len(self._lists["industry"]),
+            "pending_writes": len(self._pending)
+        }
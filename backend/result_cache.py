@@ -0,0 +1,204 @@
+"""Bounded LRU of /match_internships results with lazy, targeted invalidation.
+
+Writes only append (kind, id) to a change log. When an entry is read, the
+changes since it was computed are checked against it:
+
+- any change invalidates all-pairs entries;
+- a change to the subject record, or to a record listed in the result
+  (e.g. its filled_positions), invalidates the entry;
+- any other changed record is scored against the subject and invalidates
+  the entry only if it would now enter the top-N.
+
+Rescoring gives up, as a miss, past MAX_REVALIDATED_CHANGES changed records
+or REVALIDATION_BUDGET_SECONDS. It reads a pinned MatchState and the changes
+logged up to it, so it runs without the store lock.
+
+An entry is only served while the TF-IDF weights it was scored with are the
+current ones, so hits equal recomputing. A drift tolerance opts into also
+serving entries across refits until that share of the skills index has been
+written since their weights were fitted. Keys carry an epoch that is bumped
+when the derived indexes are rebuilt.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from main import CandidateFeatures, IndustryFeatures, MatchRequest, MatchState, SkillWeights
+
+# Scores a pair of compiled features with the given TF-IDF weights (None: the current ones),
+# as MatchingEngine.score_features
+ScorePair = Callable[["CandidateFeatures", "IndustryFeatures", Optional["SkillWeights"]], Dict[str, Any]]
+
+
+@dataclass
+class CachedMatches:
+    """A cached /match_internships result and what it depends on"""
+    matches: List[Dict[str, Any]]
+    kind: str                       # "candidate", "industry" or "all"
+    subject_id: Optional[str]
+    top_n: int
+    min_score_threshold: float
+    member_ids: FrozenSet[str]      # ids on the other side of the subject
+    kth: Optional[Tuple[float, int]]  # (score, -seq) of the last match when the list is full
+    change_seq: int                 # change log position the entry is valid up to
+    skills: "SkillWeights"          # TF-IDF weights it was scored with
+
+
+class MatchResultCache:
+    """Match results by request, checked against the writes since they were computed"""
+
+    # Beyond this many changed records, or this long spent rescoring them, it is cheaper to recompute
+    MAX_REVALIDATED_CHANGES = 512
+    REVALIDATION_BUDGET_SECONDS = 0.005
+
+    def __init__(self, capacity: int, score_pair: ScorePair, drifted: Callable[[int, float], bool],
+                 idf_drift_tolerance: float = 0.0, log_size: int = 8192):
+        self.capacity = capacity
+        self.score_pair = score_pair
+        # drifted(version, tolerance): whether that share of the skills index was written since ``version``
+        self.drifted = drifted
+        self.idf_drift_tolerance = idf_drift_tolerance
+        self._entries: "OrderedDict[Tuple, CachedMatches]" = OrderedDict()
+        self._changes: deque = deque(maxlen=log_size)
+        self._change_seq = 0
+        # Guards the entries and the change log, which match workers and writers share
+        self._lock = threading.Lock()
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def key(self, request: "MatchRequest") -> Tuple:
+        return (self.epoch, request.candidate_id, request.industry_id,
+                request.top_n, request.min_score_threshold)
+
+    def record_change(self, kind: str, record_id: str) -> None:
+        with self._lock:
+            self._change_seq += 1
+            self._changes.append((self._change_seq, kind, record_id))
+
+    def checkpoint(self) -> int:
+        """Change log position of the registry as of now; call with the store lock held"""
+        return self._change_seq
+
+    def reset(self) -> None:
+        """Drop everything, e.g. after the store was reloaded"""
+        with self._lock:
+            self.epoch += 1
+            self._entries.clear()
+
+    def skills_current(self, fitted: "SkillWeights", current: "SkillWeights") -> bool:
+        """Whether results scored with ``fitted`` TF-IDF weights stand while ``current`` are in use"""
+        return fitted is current or (self.idf_drift_tolerance > 0 and
+                                     not self.drifted(fitted.version, self.idf_drift_tolerance))
+
+    @staticmethod
+    def _could_enter(entry: CachedMatches, score: float, seq: int) -> bool:
+        if score < entry.min_score_threshold:
+            return False
+        return len(entry.member_ids) < entry.top_n or (score, -seq) > entry.kth
+
+    def _affected_by(self, entry: CachedMatches, kind: str, record_id: str, state: "MatchState") -> bool:
+        if entry.kind == "all" or record_id == entry.subject_id or record_id in entry.member_ids:
+            return True
+        if entry.kind == "candidate" and kind == "industry":
+            industry = state.registry.industries.get(record_id)
+            if industry is None or industry.get("filled_positions", 0) >= industry.get("internship_capacity", 0):
+                return False
+            score = self.score_pair(state.features.candidate_by_id(entry.subject_id),
+                                    state.features.industry_by_id(record_id), state.skills)
+            return self._could_enter(entry, score["overall_score"], state.index.industries.seq[record_id])
+        if entry.kind == "industry" and kind == "candidate":
+            if record_id not in state.registry.candidates:
+                return False
+            score = self.score_pair(state.features.candidate_by_id(record_id),
+                                    state.features.industry_by_id(entry.subject_id), state.skills)
+            return self._could_enter(entry, score["overall_score"], state.index.candidates.seq[record_id])
+        return False
+
+    def _changes_since(self, entry: CachedMatches, change_seq: int) -> Optional[set]:
+        """Records changed after the entry up to ``change_seq``, or None if the log no longer reaches back"""
+        if entry.change_seq >= change_seq:
+            return set()
+        if not self._changes or self._changes[0][0] > entry.change_seq + 1:
+            return None
+        return {(kind, record_id) for seq, kind, record_id in self._changes if entry.change_seq < seq <= change_seq}
+
+    def _still_valid(self, entry: CachedMatches, changed: Optional[set], state: "MatchState") -> bool:
+        if not self.skills_current(entry.skills, state.skills):
+            return False
+        if changed is None or len(changed) > self.MAX_REVALIDATED_CHANGES:
+            return False
+        deadline = time.perf_counter() + self.REVALIDATION_BUDGET_SECONDS
+        for kind, record_id in changed:
+            if self._affected_by(entry, kind, record_id, state) or time.perf_counter() > deadline:
+                return False
+        return True
+
+    def get(self, key: Tuple, state: "MatchState", change_seq: int) -> Optional[List[Dict[str, Any]]]:
+        """The cached result if it still holds on ``state``, pinned at change log position ``change_seq``"""
+        with self._lock:
+            entry = self._entries.get(key)
+            changed = None if entry is None else self._changes_since(entry, change_seq)
+        valid = entry is not None and self._still_valid(entry, changed, state)
+        with self._lock:
+            if not valid:
+                if entry is not None:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+                    self.invalidations += 1
+                self.misses += 1
+                return None
+            entry.change_seq = max(entry.change_seq, change_seq)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.matches
+
+    def put(self, key: Tuple, request: "MatchRequest", matches: List[Dict[str, Any]],
+            state: "MatchState", change_seq: int) -> None:
+        """Cache a result scored on ``state``, pinned at change log position ``change_seq`` or later"""
+        if self.capacity <= 0 or key[0] != self.epoch:
+            return
+        index = state.index
+        if request.candidate_id:
+            kind, subject_id, other_key, seqs = "candidate", request.candidate_id, "industry_id", index.industries.seq
+        elif request.industry_id:
+            kind, subject_id, other_key, seqs = "industry", request.industry_id, "candidate_id", index.candidates.seq
+        else:
+            kind, subject_id, other_key, seqs = "all", None, None, {}
+        member_ids = frozenset(m[other_key] for m in matches) if other_key else frozenset()
+        kth = None
+        if other_key and matches and len(matches) >= request.top_n:
+            last = matches[-1]
+            kth = (last["match_score"]["overall_score"], -seqs.get(last[other_key], 0))
+
+        entry = CachedMatches(
+            matches=matches, kind=kind, subject_id=subject_id, top_n=request.top_n,
+            min_score_threshold=request.min_score_threshold, member_ids=member_ids, kth=kth,
+            change_seq=change_seq, skills=state.skills
+        )
+        with self._lock:
+            if key[0] != self.epoch:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions
+        }
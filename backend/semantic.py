@@ -0,0 +1,146 @@
+"""Semantic retrieval: an offline text embedding and an approximate-nearest-neighbour index.
+
+TextEmbedding is latent semantic analysis trained locally on the registry:
+TF-IDF over the texts of both sides, reduced by a truncated SVD to a few
+dozen dimensions and L2-normalized, so the dot product of two vectors is
+their cosine similarity. Texts added after training are projected with
+the trained vocabulary and components.
+
+VectorIndex is an inverted-file (IVF) index: vectors are clustered by
+k-means into about sqrt(n) lists, and a query only scans the lists of the
+``nprobe`` centroids closest to it, so a search reads about
+nprobe * sqrt(n) vectors instead of n. Vectors are added to and removed
+from their lists in place; the centroids stay those of the last training.
+
+scikit-learn takes about a second to import, so it is only imported on
+first use (or by preload(), from a background warm-up).
+"""
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def preload() -> None:
+    """Import scikit-learn ahead of the first semantic request"""
+    import sklearn.cluster  # noqa: F401
+    import sklearn.decomposition  # noqa: F401
+    import sklearn.feature_extraction.text  # noqa: F401
+
+
+class TextEmbedding:
+    """LSA text vectors, trained once on a corpus"""
+
+    def __init__(self, texts: Sequence[str], dimensions: int = 64):
+        from sklearn.decomposition import TruncatedSVD
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.vectorizer = TfidfVectorizer(sublinear_tf=True, stop_words="english", min_df=1)
+        tfidf = self.vectorizer.fit_transform(texts)
+        # An SVD needs fewer components than terms and documents
+        self.dimensions = max(min(dimensions, tfidf.shape[1] - 1, tfidf.shape[0] - 1), 1)
+        self.svd = TruncatedSVD(n_components=self.dimensions, random_state=0)
+        self.svd.fit(tfidf)
+
+    @classmethod
+    def train(cls, texts: Sequence[str], dimensions: int = 64) -> Optional["TextEmbedding"]:
+        """None if the texts have too few distinct terms to embed"""
+        try:
+            return cls(texts, dimensions)
+        except ValueError:
+            # Empty vocabulary, or a single term or document
+            return None
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        """Unit vectors (float32) of texts; zero for texts with no known terms"""
+        vectors = self.svd.transform(self.vectorizer.transform(texts)).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+
+class VectorIndex:
+    """Inverted-file index of unit vectors keyed by record id"""
+
+    def __init__(self, ids: Sequence[str], vectors: np.ndarray, nprobe: int = 8):
+        self.nprobe = nprobe
+        self.dimensions = vectors.shape[1]
+        self._row_of: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._vectors = np.zeros((max(len(ids), 16), self.dimensions), dtype=np.float32)
+        self._list_of = np.zeros(len(self._vectors), dtype=np.int64)
+        n_lists = max(1, min(int(math.sqrt(len(ids))), len(ids)))
+        if len(ids) > n_lists:
+            from sklearn.cluster import KMeans
+
+            kmeans = KMeans(n_clusters=n_lists, n_init=1, max_iter=20, random_state=0).fit(vectors)
+            self.centroids = kmeans.cluster_centers_.astype(np.float32)
+        else:
+            self.centroids = vectors[:n_lists].astype(np.float32).reshape(-1, self.dimensions)
+        if not len(self.centroids):
+            self.centroids = np.zeros((1, self.dimensions), dtype=np.float32)
+        # Centroids aren't unit vectors: the nearest maximizes c.q - |c|^2 / 2
+        self._centroid_offsets = -0.5 * (self.centroids ** 2).sum(axis=1)
+        # Rows per list, as dicts for insertion order and O(1) removal
+        self._lists: List[Dict[int, None]] = [{} for _ in range(len(self.centroids))]
+        for record_id, vector in zip(ids, vectors):
+            self.add(record_id, vector)
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self._row_of
+
+    def add(self, record_id: str, vector: np.ndarray) -> None:
+        """Insert or replace the vector of a record"""
+        row = self._row_of.get(record_id)
+        if row is not None:
+            del self._lists[self._list_of[row]][row]
+        else:
+            row = self._row_of[record_id] = len(self._ids)
+            self._ids.append(record_id)
+            if row == len(self._vectors):
+                self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+                self._list_of = np.concatenate([self._list_of, np.zeros_like(self._list_of)])
+        self._vectors[row] = vector
+        nearest = int(np.argmax(self._centroid_distances(vector)))
+        self._list_of[row] = nearest
+        self._lists[nearest][row] = None
+
+    def vector(self, record_id: str) -> Optional[np.ndarray]:
+        row = self._row_of.get(record_id)
+        return self._vectors[row] if row is not None else None
+
+    def _centroid_distances(self, vector: np.ndarray) -> np.ndarray:
+        """Negated squared distances to the centroids, up to a constant"""
+        return self.centroids @ vector + self._centroid_offsets
+
+    def remove(self, record_id: str) -> None:
+        row = self._row_of.pop(record_id, None)
+        if row is not None:
+            del self._lists[self._list_of[row]][row]
+            self._ids[row] = None
+
+    def search(self, query: np.ndarray, k: int,
+               accept: Optional[Callable[[str], bool]] = None) -> Tuple[List[Tuple[str, float]], int]:
+        """Up to k (id, cosine similarity) nearest to a unit query vector, best first, and
+        how many vectors were compared
+
+        ``accept`` filters ids; rejected ones don't count towards k.
+        """
+        probes = np.argsort(-self._centroid_distances(query), kind="stable")[:self.nprobe]
+        rows = np.fromiter((row for probe in probes.tolist() for row in self._lists[probe]), dtype=np.int64)
+        if not len(rows):
+            return [], 0
+        similarities = self._vectors[rows] @ query
+        order = np.argsort(-similarities, kind="stable")
+        if accept is None and len(order) > k:
+            order = order[:k]
+        found = []
+        for position in order.tolist():
+            record_id = self._ids[rows[position]]
+            if accept is None or accept(record_id):
+                found.append((record_id, float(similarities[position])))
+                if len(found) == k:
+                    break
+        return found, len(rows)
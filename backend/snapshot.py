@@ -0,0 +1,359 @@
+"""Snapshots of the registry and derived indexes, for warm starts.
+
+A snapshot is a directory holding every table's column arrays as .npy files,
+a pickle of the rest of the table state plus the derived indexes, and a
+manifest. It is written to a temporary directory, fsynced and renamed into
+place, then published by atomically replacing the CURRENT file, so a crash
+mid-write leaves the previous snapshot in charge. On boot the arrays are
+memory-mapped copy-on-write rather than read, so only the pages actually
+touched are loaded.
+
+With the in-process store, writes since the last snapshot are appended to a
+write-ahead log of JSON lines and replayed on boot. The SQLite store is
+durable on its own: its snapshot only stands in for the record caches and
+derived indexes, and is used when its registry generation is still current.
+"""
+import fcntl
+import json
+import logging
+import os
+import pickle
+import shutil
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from storage import MemoryStore, Record, RecordTable
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 3
+# Snapshots kept on disk; the one before the newest may still be mapped by a worker that just booted
+SNAPSHOTS_KEPT = 2
+
+
+def _fsync_directory(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class WriteAheadLog:
+    """Registry writes as JSON lines in numbered segment files
+
+    Lines are {"table": name, "put": record} or {"table": name, "delete": id}.
+    Each line is flushed to the OS as it is written but not fsynced, so a
+    process crash loses nothing and a power loss at most the last moments.
+    Snapshots start a new segment; segments a snapshot covers are pruned.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._file = None
+        self.segment = max(self.segments(), default=0)
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"wal-{segment:08d}.jsonl")
+
+    def segments(self) -> List[int]:
+        return sorted(int(name[4:-6]) for name in os.listdir(self.directory)
+                      if name.startswith("wal-") and name.endswith(".jsonl"))
+
+    def replay(self, tables: Dict[str, RecordTable], first_segment: int) -> int:
+        """Apply the logged writes from ``first_segment`` on; returns how many were applied
+
+        Consecutive puts to a table are applied as one batch. A torn last
+        line, left by a crash mid-write, is skipped.
+        """
+        applied = 0
+        pending: List[Record] = []
+        pending_table: Optional[str] = None
+
+        def flush() -> None:
+            if pending:
+                tables[pending_table].put_many(pending)
+                pending.clear()
+
+        for segment in self.segments():
+            if segment < first_segment:
+                continue
+            with open(self._path(segment), encoding="utf-8") as log:
+                lines = log.read().split("\n")
+            for number, line in enumerate(lines):
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    if number == len(lines) - 1:
+                        logger.warning(f"Skipping torn last line of write-ahead log segment {segment}")
+                        continue
+                    raise
+                if "put" in entry and entry["table"] == pending_table:
+                    pending.append(entry["put"])
+                elif "put" in entry:
+                    flush()
+                    pending_table = entry["table"]
+                    pending.append(entry["put"])
+                else:
+                    flush()
+                    tables[entry["table"]].delete(entry["delete"])
+                applied += 1
+        flush()
+        return applied
+
+    def rotate(self) -> int:
+        """Start a new segment for the writes that follow; returns its number"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.segment += 1
+            return self.segment
+
+    def append(self, table: str, old: Optional[Record], new: Optional[Record]) -> None:
+        """Table listener body: log one write"""
+        entry = {"table": table, "put": new} if new is not None else {"table": table, "delete": old["id"]}
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self._path(self.segment), "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+
+    def prune(self, before: int) -> None:
+        """Delete the segments older than ``before``"""
+        for segment in self.segments():
+            if segment < before:
+                os.remove(self._path(segment))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SnapshotManager:
+    """Writes snapshots of a store and its derived indexes, and restores the newest one
+
+    ``export_derived`` returns a picklable object capturing the derived
+    indexes; ``restore_derived`` installs one. ``settings`` are the
+    options the derived indexes depend on: if they differ at load time the
+    records are still restored but the derived indexes must be rebuilt.
+    """
+
+    def __init__(self, directory: str, store, export_derived: Callable[[], Any],
+                 restore_derived: Callable[[Any], None], settings: Dict[str, Any],
+                 interval: float = 300.0):
+        self.directory = directory
+        self.store = store
+        self.tables: Dict[str, RecordTable] = {"candidates": store.candidates, "industries": store.industries}
+        self.export_derived = export_derived
+        self.restore_derived = restore_derived
+        self.settings = settings
+        self.interval = interval
+        os.makedirs(directory, exist_ok=True)
+        self.wal = None if store.persistent else WriteAheadLog(directory)
+        self._replay_from = 0
+        self._dirty = False
+        self._saved_generation: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Loading
+    def _current(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, "CURRENT"), encoding="utf-8") as current:
+                return os.path.join(self.directory, current.read().strip())
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _load_array(path: str) -> np.ndarray:
+        try:
+            return np.load(path, mmap_mode="c")
+        except ValueError:
+            # Empty arrays can't be mapped
+            return np.load(path)
+
+    def _restore_tables(self, path: str, manifest: Dict[str, Any], states: Dict[str, Any],
+                        tables: Dict[str, RecordTable]) -> None:
+        for name, table in tables.items():
+            arrays = {key: self._load_array(os.path.join(path, f"{name}.{key}.npy"))
+                      for key in manifest["arrays"][name]}
+            table.restore_state(arrays, states[name])
+
+    def load(self) -> bool:
+        """Restore the newest usable snapshot; returns whether the derived indexes were restored
+
+        Call before anything else writes to the store. An unusable snapshot
+        (another format, record layout or backend, or for SQLite an outdated
+        generation) is skipped with a warning; the write-ahead log is then
+        replayed in full by replay_log().
+        """
+        path = self._current()
+        if path is None:
+            return False
+        started = time.perf_counter()
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if self.wal is not None and manifest.get("wal_segment"):
+            # The snapshot pruned the segments before its own, maybe all of them: never number
+            # new segments below it, or replay_log() would skip their writes
+            self.wal.segment = max(self.wal.segment, manifest["wal_segment"])
+        if manifest["format"] != SNAPSHOT_FORMAT or manifest["persistent"] != self.store.persistent:
+            logger.warning(f"Ignoring snapshot {path}: written by an incompatible version or storage backend")
+            return False
+        if self.store.persistent and manifest["generation"] != self.store.generation():
+            logger.info(f"Ignoring snapshot {path}: the database has changed since it was written")
+            return False
+        with open(os.path.join(path, "state.pickle"), "rb") as f:
+            states, derived = pickle.load(f)
+
+        # In another record layout, SQLite caches just reload from the database; in-process
+        # records are read in the layout they were saved in and copied over
+        if manifest["layout"] == self.store.layout:
+            self._restore_tables(path, manifest, states, self.tables)
+        elif not self.store.persistent:
+            source = MemoryStore(manifest["layout"])
+            source_tables = {"candidates": source.candidates, "industries": source.industries}
+            self._restore_tables(path, manifest, states, source_tables)
+            for name, table in self.tables.items():
+                table.put_many(source_tables[name].values())
+            derived = None
+
+        restored = False
+        if derived is not None and manifest["settings"] == self.settings:
+            try:
+                self.restore_derived(derived)
+                restored = True
+            except ValueError as exc:
+                logger.warning(f"Rebuilding derived indexes instead of restoring them: {exc}")
+        self._replay_from = manifest["wal_segment"] or 0
+        self._saved_generation = manifest["generation"]
+        logger.info(f"Loaded snapshot {os.path.basename(path)} in {time.perf_counter() - started:.2f}s")
+        return restored
+
+    def replay_log(self) -> int:
+        """Re-apply writes logged since the loaded snapshot (in-process store only)"""
+        if self.wal is None:
+            return 0
+        applied = self.wal.replay(self.tables, self._replay_from)
+        if applied:
+            self._dirty = True
+            logger.info(f"Replayed {applied} logged writes")
+        # Never append to a segment that may end in a torn line
+        self.wal.rotate()
+        return applied
+
+    # Writing
+    def _listener(self, table: str):
+        def listener(old: Optional[Record], new: Optional[Record]) -> None:
+            self._dirty = True
+            if self.wal is not None:
+                self.wal.append(table, old, new)
+        return listener
+
+    def _capture(self) -> Optional[Tuple[Dict[str, np.ndarray], Dict[str, Any], bytes]]:
+        """Copy the current state under the store lock; None if it can't be captured consistently"""
+        with self.store.lock:
+            generation = self.store.generation()
+            if generation is None:
+                return None
+            arrays: Dict[str, np.ndarray] = {}
+            keys: Dict[str, List[str]] = {}
+            states: Dict[str, Any] = {}
+            for name, table in self.tables.items():
+                table_arrays, states[name] = table.export_state()
+                keys[name] = sorted(table_arrays)
+                arrays.update({f"{name}.{key}": np.array(array) for key, array in table_arrays.items()})
+            payload = pickle.dumps((states, self.export_derived()), protocol=pickle.HIGHEST_PROTOCOL)
+            self._dirty = False
+            manifest = {
+                "format": SNAPSHOT_FORMAT, "created_at": time.time(), "layout": self.store.layout,
+                "persistent": self.store.persistent, "generation": generation,
+                "settings": self.settings, "arrays": keys,
+                "wal_segment": self.wal.rotate() if self.wal is not None else None
+            }
+        return arrays, manifest, payload
+
+    def _snapshot_names(self) -> Iterator[str]:
+        return (name for name in os.listdir(self.directory) if name.startswith("snapshot-"))
+
+    def save(self, force: bool = False) -> bool:
+        """Write a snapshot if anything changed since the last one; returns whether one was written"""
+        lock_file = open(os.path.join(self.directory, ".lock"), "w")
+        try:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False    # another worker is writing one
+            if not force and not self._dirty and self.store.generation() == self._saved_generation:
+                return False
+            started = time.perf_counter()
+            captured = self._capture()
+            if captured is None:
+                return False
+            arrays, manifest, payload = captured
+            name = f"snapshot-{time.time_ns():020d}"
+            temporary = os.path.join(self.directory, f".tmp-{name}")
+            os.makedirs(temporary)
+            for key, array in arrays.items():
+                with open(os.path.join(temporary, f"{key}.npy"), "wb") as f:
+                    np.save(f, array)
+                    os.fsync(f.fileno())
+            for filename, data in (("state.pickle", payload), ("manifest.json", json.dumps(manifest).encode())):
+                with open(os.path.join(temporary, filename), "wb") as f:
+                    f.write(data)
+                    os.fsync(f.fileno())
+            _fsync_directory(temporary)
+            os.rename(temporary, os.path.join(self.directory, name))
+            with open(os.path.join(self.directory, "CURRENT.tmp"), "w", encoding="utf-8") as f:
+                f.write(name)
+                os.fsync(f.fileno())
+            os.replace(os.path.join(self.directory, "CURRENT.tmp"), os.path.join(self.directory, "CURRENT"))
+            _fsync_directory(self.directory)
+            self._saved_generation = manifest["generation"]
+
+            for old in sorted(self._snapshot_names())[:-SNAPSHOTS_KEPT]:
+                shutil.rmtree(os.path.join(self.directory, old), ignore_errors=True)
+            for leftover in os.listdir(self.directory):
+                if leftover.startswith(".tmp-"):
+                    shutil.rmtree(os.path.join(self.directory, leftover), ignore_errors=True)
+            if self.wal is not None:
+                self.wal.prune(manifest["wal_segment"])
+            logger.info(f"Wrote snapshot {name} in {time.perf_counter() - started:.2f}s")
+            return True
+        finally:
+            lock_file.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.save()
+            except Exception:
+                logger.exception("Periodic snapshot failed")
+
+    def start(self) -> None:
+        """Log and track writes from now on, and snapshot every ``interval`` seconds"""
+        for name, table in self.tables.items():
+            table.subscribe(self._listener(name))
+        self._thread = threading.Thread(target=self._run, name="snapshots", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the periodic thread and write a final snapshot"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        try:
+            self.save()
+        finally:
+            if self.wal is not None:
+                self.wal.close()
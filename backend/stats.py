@@ -0,0 +1,109 @@
+"""Registry statistics maintained incrementally at write time.
+
+RegistryStats subscribes to the candidate and industry tables and adjusts its
+counters on every insert, update and delete, so reading the statistics is
+O(1) instead of several passes over the registry.
+"""
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+Record = Dict[str, Any]
+
+
+def _bump(counts: Dict[Any, int], key: Any, delta: int) -> None:
+    value = counts.get(key, 0) + delta
+    if value:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+class RegistryStats:
+    """Running totals and distributions behind /stats"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.candidates_total = 0
+        self.candidates_active = 0
+        self.category_distribution: Dict[Any, int] = {}
+        self.district_distribution: Dict[Any, int] = {}
+        self.industries_total = 0
+        self.industries_active = 0
+        self.sector_distribution: Dict[Any, int] = {}
+        self.total_capacity = 0
+        self.filled_positions = 0
+
+    def _count_candidate(self, candidate: Record, sign: int) -> None:
+        self.candidates_total += sign
+        if candidate.get("status") == "active":
+            self.candidates_active += sign
+        _bump(self.category_distribution, candidate.get("category", "Unknown"), sign)
+        _bump(self.district_distribution, candidate.get("district_type", "Unknown"), sign)
+
+    def _count_industry(self, industry: Record, sign: int) -> None:
+        self.industries_total += sign
+        if industry.get("status") == "active":
+            self.industries_active += sign
+        _bump(self.sector_distribution, industry.get("sector", "Unknown"), sign)
+        self.total_capacity += sign * industry.get("internship_capacity", 0)
+        self.filled_positions += sign * industry.get("filled_positions", 0)
+
+    def candidate_changed(self, old: Optional[Record], new: Optional[Record]) -> None:
+        """Table listener for candidate writes"""
+        with self._lock:
+            if old is not None:
+                self._count_candidate(old, -1)
+            if new is not None:
+                self._count_candidate(new, 1)
+
+    def industry_changed(self, old: Optional[Record], new: Optional[Record]) -> None:
+        """Table listener for industry writes"""
+        with self._lock:
+            if old is not None:
+                self._count_industry(old, -1)
+            if new is not None:
+                self._count_industry(new, 1)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(vars(self))
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        vars(self).update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def recompute(cls, candidates: Iterable[Record], industries: Iterable[Record]) -> "RegistryStats":
+        """Build the counters from scratch with a full pass over both tables"""
+        stats = cls()
+        for candidate in candidates:
+            stats._count_candidate(candidate, 1)
+        for industry in industries:
+            stats._count_industry(industry, 1)
+        return stats
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The system_stats payload of /stats"""
+        with self._lock:
+            total_capacity = self.total_capacity
+            filled_positions = self.filled_positions
+            return {
+                "candidates": {
+                    "total": self.candidates_total,
+                    "active": self.candidates_active,
+                    "category_distribution": dict(self.category_distribution),
+                    "district_distribution": dict(self.district_distribution)
+                },
+                "industries": {
+                    "total": self.industries_total,
+                    "active": self.industries_active,
+                    "sector_distribution": dict(self.sector_distribution)
+                },
+                "internships": {
+                    "total_capacity": total_capacity,
+                    "filled_positions": filled_positions,
+                    "available_positions": total_capacity - filled_positions,
+                    "utilization_rate": round((filled_positions / total_capacity) * 100, 2) if total_capacity > 0 else 0
+                }
+            }
@@ -0,0 +1,1000 @@
+"""Pluggable record storage for candidates and internships.
+
+Both backends expose the same dict-like RecordTable interface, so the API and
+matching code read through it without caring where records live:
+
+- MemoryStore keeps records in process (used in tests)
+- SQLiteStore persists to a local file shared by every uvicorn worker, with
+  indexed columns for the fields we filter and aggregate on. Every write
+  also appends the ids it touched to a change log, so the other workers can
+  apply it to their caches (and, through the table listeners, to their
+  derived indexes) instead of reloading everything
+
+Writes take the store lock; readers that must not see a table change
+under them (matching runs, exports) pin a RegistryVersion instead:
+read-only copies of both tables as of one moment, taken without copying the
+records (copy-on-write in the columnar layout) and shared by every reader
+until the next write.
+
+Tables can export their in-process state as NumPy arrays plus a picklable
+remainder and restore it later without replaying the writes; snapshot.py
+builds warm starts on this.
+
+In process, records are held in the compact columnar layout of columnar.py
+(the default) or, with layout="dict", as one plain dict per record.
+
+Each store also has a JobTable for background matching jobs and their results.
+"""
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from columnar import MISSING, CategoryColumn, ColumnStore, DictColumns, IntColumn, RecordColumns, StoreColumns, Vocabulary
+
+Record = Dict[str, Any]
+# (arrays, picklable remainder) of a table's in-process state
+TableState = Tuple[Dict[str, np.ndarray], Any]
+# Called with (old, new) after every write; old is None on insert, new is None on delete
+Listener = Callable[[Optional[Record], Optional[Record]], None]
+
+CANDIDATE_INDEXES = ("status", "current_location", "category", "district_type")
+INDUSTRY_INDEXES = ("status", "location", "sector")
+INDUSTRY_NUMERIC_COLUMNS = ("internship_capacity", "filled_positions")
+# Change log entries kept; a worker further behind than this reloads everything
+CHANGE_LOG_KEPT = 100_000
+
+# Columnar layout, in the field order records are created with
+CANDIDATE_SCHEMA = (
+    ("name", "text"), ("email", "text"), ("phone", "text"), ("skills", "tokens"),
+    ("qualifications", "tokens"), ("location_preference", "tokens"), ("current_location", "category"),
+    ("category", "category"), ("district_type", "category"), ("past_participation", "bool"),
+    ("experience_months", "int"), ("preferred_sectors", "tokens"), ("languages", "tokens"),
+    ("id", "id"), ("registration_date", "timestamp"), ("status", "category"),
+    ("allocated_industry_id", "text")
+)
+INDUSTRY_SCHEMA = (
+    ("company_name", "text"), ("contact_email", "text"), ("contact_phone", "text"),
+    ("internship_title", "text"), ("internship_description", "text"), ("required_skills", "tokens"),
+    ("preferred_qualifications", "tokens"), ("location", "category"), ("sector", "category"),
+    ("internship_capacity", "int"), ("duration_months", "int"), ("stipend_range", "category"),
+    ("remote_allowed", "bool"), ("preferred_candidate_profile", "text"),
+    ("id", "id"), ("registration_date", "timestamp"), ("status", "category"), ("filled_positions", "int")
+)
+LAYOUTS = ("columnar", "dict")
+
+
+class RecordTable(ABC):
+    """Dict-like table of records keyed by their "id" field"""
+
+    def __init__(self, name: str, indexed_fields: Tuple[str, ...], lock: Optional[threading.RLock] = None):
+        self.name = name
+        self.indexed_fields = indexed_fields
+        self._listeners: List[Listener] = []
+        # Held for each write and its listeners; readers outside the event loop take it too
+        self.lock = lock or threading.RLock()
+        # Bumped by every change to the contents
+        self.version = 0
+        self._frozen: Optional[RecordTable] = None
+
+    # Backend primitives
+    @abstractmethod
+    def get(self, record_id: str, default: Optional[Record] = None) -> Optional[Record]:
+        ...
+
+    @abstractmethod
+    def _write(self, records: List[Record]) -> None:
+        ...
+
+    @abstractmethod
+    def _remove(self, record_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def _find_indexed(self, filters: Dict[str, Any]) -> Iterable[Record]:
+        """Records matching equality filters on indexed fields only"""
+
+    @abstractmethod
+    def _iter_after(self, position: int, filters: Dict[str, Any]) -> Iterator[Tuple[int, Record]]:
+        """(position, record) in registration order after a position, matching indexed filters"""
+
+    @abstractmethod
+    def values(self) -> Iterable[Record]:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def export_state(self) -> TableState:
+        """The records as arrays plus a picklable rest; arrays may be views of live data"""
+
+    @abstractmethod
+    def restore_state(self, arrays: Dict[str, np.ndarray], state: Any) -> None:
+        """Replace the contents with an exported state, without notifying listeners"""
+
+    def _freeze(self) -> "RecordTable":
+        """Read-only copy of the current contents"""
+        return FrozenTable(self.name, self.indexed_fields, {record["id"]: record for record in self.values()})
+
+    def frozen(self) -> "RecordTable":
+        """Read-only copy of the table as of now, built at most once per version
+
+        It can be read without the lock and never sees later writes.
+        """
+        frozen = self._frozen
+        if frozen is None or frozen.version != self.version:
+            with self.lock:
+                frozen = self._frozen
+                if frozen is None or frozen.version != self.version:
+                    frozen = self._freeze()
+                    frozen.version = self.version
+                    self._frozen = frozen
+        return frozen
+
+    # Mapping interface
+    def __getitem__(self, record_id: str) -> Record:
+        record = self.get(record_id)
+        if record is None:
+            raise KeyError(record_id)
+        return record
+
+    def __contains__(self, record_id: object) -> bool:
+        return isinstance(record_id, str) and self.get(record_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (record["id"] for record in self.values())
+
+    def keys(self) -> Iterator[str]:
+        return iter(self)
+
+    def items(self) -> Iterator[Tuple[str, Record]]:
+        return ((record["id"], record) for record in self.values())
+
+    # Writes
+    def subscribe(self, listener: Listener) -> None:
+        """Register a callback run after every put, update and delete"""
+        self._listeners.append(listener)
+
+    def _notify(self, old: Optional[Record], new: Optional[Record]) -> None:
+        for listener in self._listeners:
+            listener(old, new)
+
+    def put(self, record: Record) -> None:
+        """Insert or replace a single record"""
+        self.put_many([record])
+
+    def put_many(self, records: Iterable[Record]) -> None:
+        """Insert or replace records in one batched write"""
+        records = list(records)
+        if not records:
+            return
+        with self.lock:
+            previous = [self.get(record["id"]) for record in records]
+            self._write(records)
+            self.version += 1
+            for old, new in zip(previous, records):
+                self._notify(old, new)
+
+    def update(self, record_id: str, changes: Dict[str, Any]) -> Record:
+        """Apply field changes to a record and return the new version"""
+        with self.lock:
+            old = self[record_id]
+            new = {**old, **changes}
+            self._write([new])
+            self.version += 1
+            self._notify(old, new)
+            return new
+
+    def update_many(self, changes: Dict[str, Dict[str, Any]]) -> List[Record]:
+        """Apply field changes to several records in one batched write; returns the new versions"""
+        if not changes:
+            return []
+        with self.lock:
+            previous = [self[record_id] for record_id in changes]
+            records = [{**old, **changes[old["id"]]} for old in previous]
+            self._write(records)
+            self.version += 1
+            for old, new in zip(previous, records):
+                self._notify(old, new)
+            return records
+
+    def delete(self, record_id: str) -> None:
+        with self.lock:
+            old = self.get(record_id)
+            if old is None:
+                return
+            self._remove(record_id)
+            self.version += 1
+            self._notify(old, None)
+
+    # Queries
+    def find(self, **filters: Any) -> Iterator[Record]:
+        """Records equal to every given filter; indexed fields are looked up, the rest scanned"""
+        filters = {field: value for field, value in filters.items() if value is not None}
+        indexed = {f: v for f, v in filters.items() if f in self.indexed_fields}
+        scanned = {f: v for f, v in filters.items() if f not in self.indexed_fields}
+        records = self._find_indexed(indexed) if indexed else self.values()
+        for record in records:
+            if all(record.get(field) == value for field, value in scanned.items()):
+                yield record
+
+    def count(self, **filters: Any) -> int:
+        return sum(1 for _ in self.find(**filters))
+
+    def page(self, after: Optional[int], limit: int, where: Optional[Callable[[Record], bool]] = None,
+             **filters: Any) -> Tuple[List[Record], Optional[int]]:
+        """Keyset pagination in registration order
+
+        Returns up to ``limit`` records after the ``after`` position plus the
+        position to resume from, or None when there are no more records.
+        ``where`` is an extra predicate for conditions equality filters can't express.
+        """
+        filters = {field: value for field, value in filters.items() if value is not None}
+        indexed = {f: v for f, v in filters.items() if f in self.indexed_fields}
+        scanned = {f: v for f, v in filters.items() if f not in self.indexed_fields}
+        records: List[Record] = []
+        last = -1 if after is None else after
+        for position, record in self._iter_after(last, indexed):
+            if not all(record.get(field) == value for field, value in scanned.items()):
+                continue
+            if where is not None and not where(record):
+                continue
+            if len(records) == limit:
+                return records, last
+            records.append(record)
+            last = position
+        return records, None
+
+    def group_counts(self, field: str, default: Any = "Unknown") -> Dict[Any, int]:
+        """Number of records per value of a field"""
+        counts: Dict[Any, int] = {}
+        for record in self.values():
+            value = record.get(field, default)
+            counts[value] = counts.get(value, 0) + 1
+        return counts
+
+    def total(self, field: str) -> float:
+        """Sum of a numeric field over all records"""
+        return sum(record.get(field, 0) for record in self.values())
+
+    def columns(self) -> RecordColumns:
+        """All records in registration order, for column-wise reads by the batch scorer"""
+        return DictColumns(list(self.values()))
+
+
+class InMemoryTable(RecordTable):
+    """Plain dict of records with hash indexes on the indexed fields"""
+
+    def __init__(self, name: str, indexed_fields: Tuple[str, ...], lock: Optional[threading.RLock] = None):
+        super().__init__(name, indexed_fields, lock)
+        self._records: Dict[str, Record] = {}
+        # Registration order for pagination; deleted ids leave stale slots behind
+        self._order: List[str] = []
+        self._position: Dict[str, int] = {}
+        # field -> value -> ids, kept as dicts so lookups preserve insertion order
+        self._indexes: Dict[str, Dict[Any, Dict[str, None]]] = {field: {} for field in indexed_fields}
+
+    def get(self, record_id: str, default: Optional[Record] = None) -> Optional[Record]:
+        return self._records.get(record_id, default)
+
+    def _unindex(self, record: Record) -> None:
+        for field, index in self._indexes.items():
+            ids = index.get(record.get(field))
+            if ids is not None:
+                ids.pop(record["id"], None)
+                if not ids:
+                    del index[record.get(field)]
+
+    def _write(self, records: List[Record]) -> None:
+        for record in records:
+            old = self._records.get(record["id"])
+            if old is not None:
+                self._unindex(old)
+            else:
+                self._position[record["id"]] = len(self._order)
+                self._order.append(record["id"])
+            self._records[record["id"]] = record
+            for field, index in self._indexes.items():
+                index.setdefault(record.get(field), {})[record["id"]] = None
+
+    def _remove(self, record_id: str) -> None:
+        self._unindex(self._records.pop(record_id))
+        del self._position[record_id]
+
+    def _iter_after(self, position: int, filters: Dict[str, Any]) -> Iterator[Tuple[int, Record]]:
+        for index in range(position + 1, len(self._order)):
+            record_id = self._order[index]
+            if self._position.get(record_id) != index:
+                continue
+            record = self._records[record_id]
+            if all(record.get(field) == value for field, value in filters.items()):
+                yield index, record
+
+    def _find_indexed(self, filters: Dict[str, Any]) -> Iterable[Record]:
+        id_sets = sorted((self._indexes[f].get(v, {}) for f, v in filters.items()), key=len)
+        smallest, others = id_sets[0], id_sets[1:]
+        return [self._records[record_id] for record_id in smallest
+                if all(record_id in ids for ids in others)]
+
+    def values(self) -> Iterable[Record]:
+        return self._records.values()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def count(self, **filters: Any) -> int:
+        filters = {field: value for field, value in filters.items() if value is not None}
+        if len(filters) == 1:
+            field, value = next(iter(filters.items()))
+            if field in self._indexes:
+                return len(self._indexes[field].get(value, ()))
+        return super().count(**filters)
+
+    def group_counts(self, field: str, default: Any = "Unknown") -> Dict[Any, int]:
+        if field not in self._indexes:
+            return super().group_counts(field, default)
+        return {(default if value is None else value): len(ids) for value, ids in self._indexes[field].items()}
+
+    def export_state(self) -> TableState:
+        return {}, (self._records, self._order, self._position, self._indexes)
+
+    def restore_state(self, arrays: Dict[str, np.ndarray], state: Any) -> None:
+        self._records, self._order, self._position, self._indexes = state
+        self.version += 1
+
+    def _freeze(self) -> RecordTable:
+        return FrozenTable(self.name, self.indexed_fields, dict(self._records))
+
+
+class FrozenTable(RecordTable):
+    """Read-only table over a dict of records in registration order"""
+
+    def __init__(self, name: str, indexed_fields: Tuple[str, ...], records: Dict[str, Record]):
+        super().__init__(name, indexed_fields)
+        self._records = records
+        self._order: Optional[List[Record]] = None
+
+    def get(self, record_id: str, default: Optional[Record] = None) -> Optional[Record]:
+        return self._records.get(record_id, default)
+
+    def _write(self, records: List[Record]) -> None:
+        raise TypeError("Frozen table is read-only")
+
+    def _remove(self, record_id: str) -> None:
+        raise TypeError("Frozen table is read-only")
+
+    def _find_indexed(self, filters: Dict[str, Any]) -> Iterable[Record]:
+        return [record for record in self._records.values()
+                if all(record.get(field) == value for field, value in filters.items())]
+
+    def _iter_after(self, position: int, filters: Dict[str, Any]) -> Iterator[Tuple[int, Record]]:
+        if self._order is None:
+            self._order = list(self._records.values())
+        for index in range(position + 1, len(self._order)):
+            record = self._order[index]
+            if all(record.get(field) == value for field, value in filters.items()):
+                yield index, record
+
+    def values(self) -> Iterable[Record]:
+        return self._records.values()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def export_state(self) -> TableState:
+        return {}, self._records
+
+    def restore_state(self, arrays: Dict[str, np.ndarray], state: Any) -> None:
+        raise TypeError("Frozen table is read-only")
+
+    def _freeze(self) -> RecordTable:
+        return self
+
+
+class ColumnarTable(RecordTable):
+    """Records in a ColumnStore; indexed fields are filtered on their category codes
+
+    A record's row number doubles as its registration-order position.
+    """
+
+    # Rows examined per step when paging through a filtered table
+    SCAN_CHUNK = 4096
+
+    def __init__(self, name: str, indexed_fields: Tuple[str, ...], schema, vocabulary: Vocabulary,
+                 lock: Optional[threading.RLock] = None, records: Optional[ColumnStore] = None):
+        super().__init__(name, indexed_fields, lock)
+        self.records = ColumnStore(schema, vocabulary) if records is None else records
+        for field in indexed_fields:
+            if not isinstance(self.records.columns.get(field), CategoryColumn):
+                raise ValueError(f"Indexed field {field} must be a category column")
+
+    def get(self, record_id: str, default: Optional[Record] = None) -> Optional[Record]:
+        return self.records.get(record_id, default)
+
+    def _write(self, records: List[Record]) -> None:
+        for record in records:
+            self.records.put(record)
+
+    def _remove(self, record_id: str) -> None:
+        self.records.remove(record_id)
+
+    def _mask(self, filters: Dict[str, Any], start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Live rows in [start, stop) equal to every indexed filter"""
+        mask = self.records.live.view()[start:stop].copy()
+        for field, value in filters.items():
+            column = self.records.columns[field]
+            mask &= column.codes.view()[start:stop] == column.code_of(value)
+        return mask
+
+    def _find_indexed(self, filters: Dict[str, Any]) -> Iterable[Record]:
+        return [self.records.record(row) for row in np.flatnonzero(self._mask(filters)).tolist()]
+
+    def _iter_after(self, position: int, filters: Dict[str, Any]) -> Iterator[Tuple[int, Record]]:
+        start = position + 1
+        while start < len(self.records.ids):
+            stop = start + self.SCAN_CHUNK
+            for row in (np.flatnonzero(self._mask(filters, start, stop)) + start).tolist():
+                yield row, self.records.record(row)
+            start = stop
+
+    def values(self) -> Iterable[Record]:
+        return self.records.values()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def count(self, **filters: Any) -> int:
+        filters = {field: value for field, value in filters.items() if value is not None}
+        if all(field in self.indexed_fields for field in filters):
+            return int(self._mask(filters).sum())
+        return super().count(**filters)
+
+    def group_counts(self, field: str, default: Any = "Unknown") -> Dict[Any, int]:
+        column = self.records.columns.get(field)
+        if not isinstance(column, CategoryColumn) or column.overflow:
+            return super().group_counts(field, default)
+        codes = column.codes.view()[self.records.live.view()]
+        counts: Dict[Any, int] = {}
+        for code, count in enumerate(np.bincount(codes, minlength=len(column.values)).tolist()):
+            if count:
+                value = column.values[code]
+                value = default if value is None or value is MISSING else value
+                counts[value] = counts.get(value, 0) + count
+        return counts
+
+    def total(self, field: str) -> float:
+        column = self.records.columns.get(field)
+        if not isinstance(column, IntColumn) or column.overflow:
+            return super().total(field)
+        return int(column.data.view()[self.records.live.view()].sum())
+
+    def columns(self) -> RecordColumns:
+        return StoreColumns(self.records, self.records.live_rows())
+
+    def export_state(self) -> TableState:
+        return self.records.export()
+
+    def restore_state(self, arrays: Dict[str, np.ndarray], state: Any) -> None:
+        self.records = ColumnStore.restore(arrays, state)
+        self.version += 1
+
+    def _freeze(self) -> RecordTable:
+        return frozen_columnar_table(self.name, self.indexed_fields, self.records)
+
+
+def frozen_columnar_table(name: str, indexed_fields: Tuple[str, ...], records: ColumnStore) -> ColumnarTable:
+    """Read-only ColumnarTable over a frozen copy of a ColumnStore"""
+    return ColumnarTable(name, indexed_fields, records.schema, records.vocabulary, records=records.frozen())
+
+
+class SQLiteTable(RecordTable):
+    """Records stored as JSON with the indexed/numeric fields mirrored into columns
+
+    Decoded records are cached in process after the first full read and kept
+    up to date by this process's writes; SQLiteStore.sync() applies the
+    writes of other connections, or drops the cache if it can't tell which
+    records they touched. Given a schema, the cache is a ColumnStore rather
+    than a dict of records.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock, name: str,
+                 indexed_fields: Tuple[str, ...], numeric_columns: Tuple[str, ...] = (),
+                 schema=None, vocabulary: Optional[Vocabulary] = None,
+                 committed: Optional[Callable[[], None]] = None):
+        super().__init__(name, indexed_fields, lock)
+        # Called after each of this table's write transactions
+        self._committed = committed
+        self._conn = conn
+        self._lock = lock
+        self._columns = indexed_fields + numeric_columns
+        self._schema = schema
+        self._vocabulary = vocabulary or Vocabulary()
+        self._cache: Optional[Union[Dict[str, Record], ColumnStore]] = None
+
+        column_defs = "".join(f", {column}" for column in self._columns)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} (id TEXT PRIMARY KEY, data TEXT NOT NULL{column_defs})"
+            )
+            for field in indexed_fields:
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{name}_{field} ON {name} ({field})")
+
+    def _rows(self) -> Union[Dict[str, Record], ColumnStore]:
+        with self._lock:
+            if self._cache is None:
+                rows = self._conn.execute(f"SELECT data FROM {self.name} ORDER BY rowid").fetchall()
+                cache = {} if self._schema is None else ColumnStore(self._schema, self._vocabulary)
+                for (data,) in rows:
+                    record = json.loads(data)
+                    cache[record["id"]] = record
+                self._cache = cache
+            return self._cache
+
+    def invalidate_cache(self) -> None:
+        with self._lock:
+            self._cache = None
+            self.version += 1
+
+    def get(self, record_id: str, default: Optional[Record] = None) -> Optional[Record]:
+        return self._rows().get(record_id, default)
+
+    def _bump_generation(self, record_ids: Iterable[str]) -> None:
+        """Count a write and log the ids it touched, inside its transaction"""
+        self._conn.execute("UPDATE registry_meta SET value = value + 1 WHERE key = 'generation'")
+        self._conn.executemany("INSERT INTO registry_changes (table_name, record_id) VALUES (?, ?)",
+                               [(self.name, record_id) for record_id in record_ids])
+        self._conn.execute("DELETE FROM registry_changes WHERE seq <= (SELECT MAX(seq) FROM registry_changes) - ?",
+                           (CHANGE_LOG_KEPT,))
+
+    def _write(self, records: List[Record]) -> None:
+        placeholders = ", ".join("?" * (len(self._columns) + 2))
+        # Upsert rather than REPLACE so updated rows keep their rowid (registration order)
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in ("data",) + self._columns)
+        rows = [
+            (record["id"], json.dumps(record), *(record.get(column) for column in self._columns))
+            for record in records
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT INTO {self.name} VALUES ({placeholders}) "
+                    f"ON CONFLICT(id) DO UPDATE SET {assignments}",
+                    rows
+                )
+                self._bump_generation(record["id"] for record in records)
+            if self._committed is not None:
+                self._committed()
+            cache = self._rows()
+            for record in records:
+                cache[record["id"]] = record
+
+    def _remove(self, record_id: str) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute(f"DELETE FROM {self.name} WHERE id = ?", (record_id,))
+                self._bump_generation([record_id])
+            if self._committed is not None:
+                self._committed()
+            self._rows().pop(record_id, None)
+
+    def apply_changes(self, record_ids: Iterable[str]) -> None:
+        """Bring cached records in line with rows another connection wrote, notifying
+        listeners of each one that differs"""
+        record_ids = list(dict.fromkeys(record_ids))
+        with self._lock:
+            if self._cache is None:
+                return    # the next read loads every row as it is now
+            current: Dict[str, Record] = {}
+            for start in range(0, len(record_ids), 500):
+                batch = record_ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT id, data FROM {self.name} WHERE id IN ({', '.join('?' * len(batch))})", batch
+                ).fetchall()
+                current.update((record_id, json.loads(data)) for record_id, data in rows)
+            for record_id in record_ids:
+                old, new = self._cache.get(record_id), current.get(record_id)
+                if old == new:
+                    continue    # e.g. this process's own write
+                if new is None:
+                    self._cache.pop(record_id, None)
+                else:
+                    self._cache[record_id] = new
+                self.version += 1
+                self._notify(old, new)
+
+    def _where(self, filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        clause = " AND ".join(f"{field} = ?" for field in filters)
+        return (f" WHERE {clause}" if clause else ""), list(filters.values())
+
+    def _find_indexed(self, filters: Dict[str, Any]) -> Iterable[Record]:
+        where, params = self._where(filters)
+        with self._lock:
+            ids = self._conn.execute(f"SELECT id FROM {self.name}{where} ORDER BY rowid", params).fetchall()
+            cache = self._rows()
+            return [cache[record_id] for (record_id,) in ids if record_id in cache]
+
+    def _iter_after(self, position: int, filters: Dict[str, Any],
+                    batch_size: int = 500) -> Iterator[Tuple[int, Record]]:
+        where, params = self._where(filters)
+        where = f"{where} AND rowid > ?" if where else " WHERE rowid > ?"
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT rowid, id FROM {self.name}{where} ORDER BY rowid LIMIT ?",
+                    params + [position, batch_size]
+                ).fetchall()
+                cache = self._rows()
+                batch = [(rowid, cache[record_id]) for rowid, record_id in rows if record_id in cache]
+            yield from batch
+            if len(rows) < batch_size:
+                return
+            position = rows[-1][0]
+
+    def values(self) -> Iterable[Record]:
+        return self._rows().values()
+
+    def __len__(self) -> int:
+        return len(self._rows())
+
+    def count(self, **filters: Any) -> int:
+        filters = {field: value for field, value in filters.items() if value is not None}
+        if all(field in self.indexed_fields for field in filters):
+            where, params = self._where(filters)
+            with self._lock:
+                return self._conn.execute(f"SELECT COUNT(*) FROM {self.name}{where}", params).fetchone()[0]
+        return super().count(**filters)
+
+    def group_counts(self, field: str, default: Any = "Unknown") -> Dict[Any, int]:
+        if field not in self.indexed_fields:
+            return super().group_counts(field, default)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {field}, COUNT(*) FROM {self.name} GROUP BY {field}").fetchall()
+        return {(default if value is None else value): count for value, count in rows}
+
+    def total(self, field: str) -> float:
+        if field not in self._columns:
+            return super().total(field)
+        with self._lock:
+            return self._conn.execute(f"SELECT COALESCE(SUM({field}), 0) FROM {self.name}").fetchone()[0]
+
+    def columns(self) -> RecordColumns:
+        with self._lock:
+            cache = self._rows()
+            if isinstance(cache, ColumnStore):
+                return StoreColumns(cache, cache.live_rows())
+        return super().columns()
+
+    def export_state(self) -> TableState:
+        with self._lock:
+            cache = self._rows()
+            if isinstance(cache, ColumnStore):
+                arrays, state = cache.export()
+                return arrays, ("columns", state)
+            return {}, ("records", cache)
+
+    def restore_state(self, arrays: Dict[str, np.ndarray], state: Any) -> None:
+        kind, state = state
+        with self._lock:
+            if kind == "columns":
+                self._cache = ColumnStore.restore(arrays, state)
+                self._vocabulary = self._cache.vocabulary
+            else:
+                self._cache = state
+            self.version += 1
+
+    def _freeze(self) -> RecordTable:
+        cache = self._rows()
+        if isinstance(cache, ColumnStore):
+            return frozen_columnar_table(self.name, self.indexed_fields, cache)
+        return FrozenTable(self.name, self.indexed_fields, dict(cache))
+
+
+class JobTable(ABC):
+    """Background job records plus their ordered result rows
+
+    Kept apart from the registry tables: progress updates are frequent and
+    must not look like registry changes to other workers.
+    """
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Record]:
+        ...
+
+    @abstractmethod
+    def put(self, job: Record) -> None:
+        """Insert or replace a job record"""
+
+    @abstractmethod
+    def recent(self, limit: int) -> List[Record]:
+        """Most recently created jobs first"""
+
+    @abstractmethod
+    def append_results(self, job_id: str, start: int, rows: List[Record]) -> None:
+        """Store result rows at positions start, start + 1, ..."""
+
+    @abstractmethod
+    def results(self, job_id: str, after: Optional[int], limit: int) -> Tuple[List[Record], Optional[int]]:
+        """Up to ``limit`` result rows after a position plus the position to resume from"""
+
+    @abstractmethod
+    def update(self, job_id: str, changes: Dict[str, Any]) -> Optional[Record]:
+        """Atomically apply field changes to a job; None if it doesn't exist"""
+
+
+class InMemoryJobTable(JobTable):
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._jobs: Dict[str, Record] = {}
+        self._results: Dict[str, List[Record]] = {}
+
+    def get(self, job_id: str) -> Optional[Record]:
+        return self._jobs.get(job_id)
+
+    def put(self, job: Record) -> None:
+        with self._lock:
+            self._jobs[job["id"]] = job
+
+    def update(self, job_id: str, changes: Dict[str, Any]) -> Optional[Record]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job = self._jobs[job_id] = {**job, **changes}
+            return job
+
+    def recent(self, limit: int) -> List[Record]:
+        return list(reversed(list(self._jobs.values())))[:limit]
+
+    def append_results(self, job_id: str, start: int, rows: List[Record]) -> None:
+        with self._lock:
+            results = self._results.setdefault(job_id, [])
+            del results[start:]
+            results.extend(rows)
+
+    def results(self, job_id: str, after: Optional[int], limit: int) -> Tuple[List[Record], Optional[int]]:
+        results = self._results.get(job_id, [])
+        start = 0 if after is None else after + 1
+        page = results[start:start + limit]
+        return page, (start + len(page) - 1 if start + len(page) < len(results) else None)
+
+
+class SQLiteJobTable(JobTable):
+    """Jobs in their own database file, so progress writes don't trigger registry syncs"""
+
+    def __init__(self, path: str):
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_results (job_id TEXT NOT NULL, position INTEGER NOT NULL, "
+                "data TEXT NOT NULL, PRIMARY KEY (job_id, position))"
+            )
+
+    def get(self, job_id: str) -> Optional[Record]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, job: Record) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+                (job["id"], json.dumps(job))
+            )
+
+    def update(self, job_id: str, changes: Dict[str, Any]) -> Optional[Record]:
+        # BEGIN IMMEDIATE takes the write lock before reading, so workers can't interleave updates
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                job = None if row is None else {**json.loads(row[0]), **changes}
+                if job is not None:
+                    self._conn.execute("UPDATE jobs SET data = ? WHERE id = ?", (json.dumps(job), job_id))
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            return job
+
+    def recent(self, limit: int) -> List[Record]:
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM jobs ORDER BY rowid DESC LIMIT ?", (limit,)).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def append_results(self, job_id: str, start: int, rows: List[Record]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM job_results WHERE job_id = ? AND position >= ?", (job_id, start))
+            self._conn.executemany(
+                "INSERT INTO job_results VALUES (?, ?, ?)",
+                [(job_id, start + offset, json.dumps(row)) for offset, row in enumerate(rows)]
+            )
+
+    def results(self, job_id: str, after: Optional[int], limit: int) -> Tuple[List[Record], Optional[int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT position, data FROM job_results WHERE job_id = ? AND position > ? "
+                "ORDER BY position LIMIT ?",
+                (job_id, -1 if after is None else after, limit + 1)
+            ).fetchall()
+        page = [json.loads(data) for _, data in rows[:limit]]
+        return page, (rows[limit - 1][0] if len(rows) > limit else None)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RegistryVersion(NamedTuple):
+    """Read-only candidates and industries tables as of one moment"""
+    candidates: RecordTable
+    industries: RecordTable
+
+
+def pin_registry(lock: threading.RLock, candidates: RecordTable, industries: RecordTable) -> RegistryVersion:
+    """Both tables as of the same moment; only takes the lock if one changed since it was last pinned"""
+    version = RegistryVersion(candidates.frozen(), industries.frozen())
+    if version.candidates.version == candidates.version and version.industries.version == industries.version:
+        return version
+    with lock:
+        return RegistryVersion(candidates.frozen(), industries.frozen())
+
+
+class MemoryStore:
+    """In-process store; data lives and dies with the worker"""
+
+    # Whether the records survive a restart without a snapshot
+    persistent = False
+
+    def __init__(self, layout: str = "columnar"):
+        self.layout = layout
+        self.lock = threading.RLock()
+        if layout == "columnar":
+            vocabulary = Vocabulary()
+            self.candidates: RecordTable = ColumnarTable(
+                "candidates", CANDIDATE_INDEXES, CANDIDATE_SCHEMA, vocabulary, self.lock)
+            self.industries: RecordTable = ColumnarTable(
+                "industries", INDUSTRY_INDEXES, INDUSTRY_SCHEMA, vocabulary, self.lock)
+        else:
+            self.candidates = InMemoryTable("candidates", CANDIDATE_INDEXES, self.lock)
+            self.industries = InMemoryTable("industries", INDUSTRY_INDEXES, self.lock)
+        self.jobs: JobTable = InMemoryJobTable()
+
+    def changed_elsewhere(self) -> bool:
+        return False
+
+    def sync(self) -> bool:
+        """Whether derived state must be rebuilt for another process's changes"""
+        return False
+
+    def generation(self) -> Optional[int]:
+        """Version of the registry tables that in-process state reflects; None if unknown"""
+        return 0
+
+    def pin(self) -> RegistryVersion:
+        """The registry as of now, for reading without the lock"""
+        return pin_registry(self.lock, self.candidates, self.industries)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteStore:
+    """SQLite-backed store in WAL mode, safe to share between worker processes"""
+
+    persistent = True
+
+    def __init__(self, path: str, layout: str = "columnar"):
+        self.path = path
+        self.layout = layout
+        self._lock = self.lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            # Bumped by every registry write, so snapshots of the caches can tell if they are current
+            self._conn.execute("CREATE TABLE IF NOT EXISTS registry_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.execute("INSERT OR IGNORE INTO registry_meta VALUES ('generation', 0)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS registry_changes "
+                               "(seq INTEGER PRIMARY KEY AUTOINCREMENT, table_name TEXT NOT NULL, record_id TEXT NOT NULL)")
+        columnar = layout == "columnar"
+        vocabulary = Vocabulary()
+        self.candidates: RecordTable = SQLiteTable(
+            self._conn, self._lock, "candidates", CANDIDATE_INDEXES,
+            schema=CANDIDATE_SCHEMA if columnar else None, vocabulary=vocabulary, committed=self._committed
+        )
+        self.industries: RecordTable = SQLiteTable(
+            self._conn, self._lock, "industries", INDUSTRY_INDEXES, INDUSTRY_NUMERIC_COLUMNS,
+            schema=INDUSTRY_SCHEMA if columnar else None, vocabulary=vocabulary, committed=self._committed
+        )
+        root, ext = os.path.splitext(path)
+        self.jobs: JobTable = SQLiteJobTable(f"{root}.jobs{ext or '.db'}")
+        self._tables = {"candidates": self.candidates, "industries": self.industries}
+        self._data_version = self._read_data_version()
+        self._change_seq = self._read_change_seq()
+
+    def _read_data_version(self) -> int:
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _read_change_seq(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM registry_changes").fetchone()[0]
+
+    def _committed(self) -> None:
+        # Nobody else committed since the last sync, so every logged change is applied here already
+        if self._read_data_version() == self._data_version:
+            self._change_seq = self._read_change_seq()
+
+    def changed_elsewhere(self) -> bool:
+        """Whether another connection committed since the last sync(); cheap enough to ask per request"""
+        return self._read_data_version() != self._data_version
+
+    def sync(self) -> bool:
+        """Apply what other connections committed since the last call
+
+        Changed records are re-read and applied to the caches, notifying the
+        table listeners. If the change log no longer reaches back to the last
+        sync, the caches are dropped instead and True is returned: anything
+        derived from the records must then be rebuilt.
+        """
+        with self._lock:
+            version = self._read_data_version()
+            if version == self._data_version:
+                return False
+            self._data_version = version
+            changes = self._conn.execute(
+                "SELECT seq, table_name, record_id FROM registry_changes WHERE seq > ? ORDER BY seq",
+                (self._change_seq,)
+            ).fetchall()
+            if not changes:
+                return False
+            # Sequence numbers are consecutive, so a jump means the log was trimmed past us
+            complete = changes[0][0] == self._change_seq + 1
+            self._change_seq = changes[-1][0]
+            if not complete:
+                for table in self._tables.values():
+                    table.invalidate_cache()
+                return True
+            for name, table in self._tables.items():
+                table.apply_changes(record_id for _, table_name, record_id in changes if table_name == name)
+            return False
+
+    def generation(self) -> Optional[int]:
+        """Registry generation the cached records reflect; None if another connection
+        has committed since the last sync()"""
+        with self._lock:
+            generation = self._conn.execute(
+                "SELECT value FROM registry_meta WHERE key = 'generation'").fetchone()[0]
+            if self._read_data_version() != self._data_version:
+                return None
+            return generation
+
+    def pin(self) -> RegistryVersion:
+        """The records this process has cached, as of now, for reading without the lock"""
+        return pin_registry(self.lock, self.candidates, self.industries)
+
+    def close(self) -> None:
+        self.jobs.close()
+        with self._lock:
+            self._conn.close()
+
+
+def open_store(backend: str = "sqlite", path: str = "pm_internship.db", layout: str = "columnar"):
+    """Create the configured store: "sqlite" (default) or "memory", in a record layout from LAYOUTS"""
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown record layout: {layout}")
+    if backend == "memory":
+        return MemoryStore(layout)
+    if backend == "sqlite":
+        return SQLiteStore(path, layout)
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,158 @@
+"""Reproducible synthetic candidates and internships for benchmarks and load tests.
+
+Records have the shape of the registration models. Skills follow per-sector
+vocabularies with a long-tailed popularity, locations come from the
+matcher's region mapping, and the category and district-type mixes follow
+the scheme's applicant profile, so matching work resembles production data.
+The same seed always produces the same records.
+"""
+import random
+from functools import lru_cache
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+Record = Dict[str, Any]
+
+SECTOR_SKILLS: Dict[str, List[str]] = {
+    "Technology": ["Python", "Java", "JavaScript", "SQL", "React", "Django", "Cloud Computing",
+                   "Docker", "Git", "Linux", "REST APIs", "Node.js", "C++", "Cybersecurity"],
+    "Data Science": ["Python", "Machine Learning", "Data Analysis", "Statistics", "SQL", "Pandas",
+                     "Deep Learning", "Power BI", "Tableau", "R", "Data Visualization"],
+    "Finance": ["Financial Analysis", "Excel", "Accounting", "Risk Management", "Investment",
+                "Financial Modeling", "Taxation", "Auditing", "Tally", "Power BI"],
+    "Banking": ["Banking Operations", "Credit Analysis", "Excel", "KYC", "Customer Service",
+                "Risk Management", "Loan Processing", "Financial Analysis"],
+    "Marketing": ["Digital Marketing", "Social Media", "Content Writing", "SEO", "Analytics",
+                  "Market Research", "Branding", "Email Marketing", "Copywriting"],
+    "E-commerce": ["Digital Marketing", "Supply Chain", "Inventory Management", "Excel",
+                   "Customer Service", "Analytics", "Catalog Management"],
+    "Design": ["UI/UX Design", "Figma", "Adobe Creative Suite", "Prototyping", "User Research",
+               "Graphic Design", "Illustration", "Wireframing"],
+    "Healthcare": ["Patient Care", "Medical Coding", "Pharmacology", "Healthcare Management",
+                   "Clinical Research", "First Aid", "Data Entry"],
+    "Manufacturing": ["AutoCAD", "Quality Control", "Lean Manufacturing", "Six Sigma",
+                      "Production Planning", "SolidWorks", "Maintenance"],
+    "Agriculture": ["Agronomy", "Soil Science", "Irrigation", "Farm Management", "Horticulture",
+                    "Agricultural Marketing", "Data Entry"]
+}
+
+GENERAL_SKILLS = ["Communication", "Teamwork", "MS Office", "Problem Solving", "Excel", "Presentation"]
+
+# (candidate qualification, internship preferred qualification) per sector
+SECTOR_QUALIFICATIONS: Dict[str, List[Tuple[str, str]]] = {
+    "Technology": [("B.Tech Computer Science", "B.Tech"), ("BCA", "BCA"), ("MCA", "MCA"),
+                   ("Diploma in Computer Engineering", "Diploma")],
+    "Data Science": [("B.Tech Computer Science", "B.Tech"), ("M.Sc Statistics", "M.Sc"),
+                     ("B.Sc Mathematics", "B.Sc"), ("MCA", "MCA")],
+    "Finance": [("B.Com", "B.Com"), ("MBA Finance", "MBA Finance"), ("CA Intermediate", "CA"),
+                ("BBA", "BBA")],
+    "Banking": [("B.Com", "B.Com"), ("BBA", "BBA"), ("MBA Finance", "MBA Finance"), ("B.A. Economics", "B.A.")],
+    "Marketing": [("MBA Marketing", "MBA Marketing"), ("BBA", "BBA"), ("B.A. Mass Communication", "Mass Communication")],
+    "E-commerce": [("BBA", "BBA"), ("MBA Marketing", "MBA Marketing"), ("B.Com", "B.Com")],
+    "Design": [("B.Des Interaction Design", "B.Des"), ("Diploma in Design", "Diploma in Design"),
+               ("B.F.A.", "B.F.A.")],
+    "Healthcare": [("B.Pharm", "B.Pharm"), ("B.Sc Nursing", "B.Sc Nursing"), ("BPT", "BPT")],
+    "Manufacturing": [("B.Tech Mechanical", "B.Tech"), ("Diploma in Mechanical Engineering", "Diploma"),
+                      ("ITI Fitter", "ITI")],
+    "Agriculture": [("B.Sc Agriculture", "B.Sc Agriculture"), ("Diploma in Agriculture", "Diploma")]
+}
+
+CATEGORY_MIX = (("General", 0.45), ("OBC", 0.27), ("SC", 0.17), ("ST", 0.11))
+DISTRICT_MIX = (("Urban", 0.40), ("Rural", 0.45), ("Aspirational", 0.15))
+LANGUAGES = ["Hindi", "Bengali", "Marathi", "Telugu", "Tamil", "Gujarati", "Kannada", "Malayalam"]
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Ishaan", "Kavya", "Meera", "Rohan",
+               "Saanvi", "Arjun", "Priya", "Rahul", "Neha", "Vikram", "Pooja", "Karan", "Sneha"]
+LAST_NAMES = ["Sharma", "Patel", "Singh", "Reddy", "Kumar", "Das", "Nair", "Iyer", "Gupta",
+              "Mehta", "Yadav", "Banerjee", "Joshi", "Khan", "Pillai", "Chauhan"]
+COMPANY_WORDS = ["Tech", "Fin", "Agro", "Health", "Digital", "Bharat", "Infra", "Green", "Nova", "Apex"]
+COMPANY_SUFFIXES = ["Solutions", "Labs", "Industries", "Services", "Pvt Ltd", "Systems", "Ventures"]
+
+
+def _weighted(rng: random.Random, mix: Sequence[Tuple[str, float]]) -> str:
+    return rng.choices([value for value, _ in mix], weights=[weight for _, weight in mix])[0]
+
+
+@lru_cache(maxsize=None)
+def _zipf_cum_weights(size: int) -> List[float]:
+    return list(accumulate(1.0 / (rank + 1) for rank in range(size)))
+
+
+def _popular(rng: random.Random, vocabulary: List[str], k: int) -> List[str]:
+    """k distinct items, earlier vocabulary entries being more popular (Zipf-like)"""
+    k = min(k, len(vocabulary))
+    cum_weights = _zipf_cum_weights(len(vocabulary))
+    chosen: Dict[str, None] = {}
+    while len(chosen) < k:
+        chosen[rng.choices(vocabulary, cum_weights=cum_weights)[0]] = None
+    return list(chosen)
+
+
+def _places(region_mapping: Dict[str, List[str]]) -> List[str]:
+    return sorted({region for regions in region_mapping.values() for region in regions})
+
+
+def generate_candidates(count: int, region_mapping: Dict[str, List[str]], seed: int = 0) -> Iterator[Record]:
+    """Candidate registrations, valid for CandidateRegistration"""
+    rng = random.Random(f"candidates-{seed}")
+    cities = sorted(region_mapping)
+    places = _places(region_mapping)
+    sectors = sorted(SECTOR_SKILLS)
+    for index in range(count):
+        sector = rng.choice(sectors)
+        second = rng.choice(sectors)
+        skills = _popular(rng, SECTOR_SKILLS[sector], rng.randint(3, 6))
+        if second != sector and rng.random() < 0.4:
+            skills += _popular(rng, SECTOR_SKILLS[second], 1)
+        skills += _popular(rng, GENERAL_SKILLS, rng.randint(0, 2))
+        qualification = rng.choice(SECTOR_QUALIFICATIONS[sector])[0]
+        current = rng.choice(cities)
+        preferences = [current] if rng.random() < 0.7 else []
+        preferences += rng.sample(cities + places, rng.randint(0, 2))
+        if rng.random() < 0.05:
+            preferences = []
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield {
+            "name": f"{first} {last}",
+            "email": f"{first.lower()}.{last.lower()}{index}@example.com",
+            "phone": f"+91-9{rng.randrange(10 ** 9):09d}",
+            "skills": list(dict.fromkeys(skills)),
+            "qualifications": [qualification],
+            "location_preference": list(dict.fromkeys(preferences)),
+            "current_location": current,
+            "category": _weighted(rng, CATEGORY_MIX),
+            "district_type": _weighted(rng, DISTRICT_MIX),
+            "past_participation": rng.random() < 0.1,
+            "experience_months": min(int(rng.expovariate(1 / 6)), 36),
+            "preferred_sectors": list(dict.fromkeys([sector] + ([second] if rng.random() < 0.5 else []))),
+            "languages": ["English"] + rng.sample(LANGUAGES, rng.randint(0, 2))
+        }
+
+
+def generate_industries(count: int, region_mapping: Dict[str, List[str]], seed: int = 0) -> Iterator[Record]:
+    """Internship registrations, valid for IndustryRegistration"""
+    rng = random.Random(f"industries-{seed}")
+    cities = sorted(region_mapping)
+    sectors = sorted(SECTOR_SKILLS)
+    for index in range(count):
+        sector = rng.choice(sectors)
+        skills = _popular(rng, SECTOR_SKILLS[sector], rng.randint(3, 5))
+        qualifications = [preferred for _, preferred in
+                          rng.sample(SECTOR_QUALIFICATIONS[sector], rng.randint(0, 2))]
+        low = rng.randrange(5, 30) * 1000
+        yield {
+            "company_name": f"{rng.choice(COMPANY_WORDS)}{rng.choice(COMPANY_WORDS).lower()} "
+                            f"{rng.choice(COMPANY_SUFFIXES)} {index}",
+            "contact_email": f"hr{index}@example.com",
+            "contact_phone": f"+91-11-{rng.randrange(10 ** 8):08d}",
+            "internship_title": f"{sector} Intern",
+            "internship_description": f"Hands-on {sector.lower()} work using " + ", ".join(skills),
+            "required_skills": skills,
+            "preferred_qualifications": qualifications,
+            "location": rng.choice(cities),
+            "sector": sector,
+            "internship_capacity": rng.randint(1, 20),
+            "duration_months": rng.randint(2, 6),
+            "stipend_range": f"₹{low:,} - ₹{low + 10000:,}",
+            "remote_allowed": rng.random() < 0.3,
+            "preferred_candidate_profile": f"Students interested in {sector.lower()}"
+        }
@@ -0,0 +1,88 @@
+import os
+import random
+import sys
+
+import pytest
+
+# The backend modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests that import main get an empty in-process registry, not the SQLite file in the working directory
+os.environ.setdefault("PM_STORAGE_BACKEND", "memory")
+os.environ.setdefault("PM_SNAPSHOT_DIR", "")
+os.environ.setdefault("PM_BACKGROUND_WARMUP", "0")
+os.environ.setdefault("PM_SEED_DUMMY_DATA", "0")
+
+
+class Oracle:
+    """Reference results: every pair scored one by one with MatchingEngine.score_features"""
+
+    def __init__(self, main):
+        self.main = main
+
+    def score(self, candidate, industry, weights=None):
+        main = self.main
+        return main.MatchingEngine.score_features(
+            main.feature_cache.candidate(candidate), main.feature_cache.industry(industry),
+            weights or main.DEFAULT_WEIGHTS)["overall_score"]
+
+    def open_industries(self):
+        return [industry for industry in self.main.industries_db.values()
+                if industry["filled_positions"] < industry["internship_capacity"]]
+
+    def rank(self, candidates, industries, top_n, min_score_threshold=0.0, weights=None):
+        """(candidate id, industry id, score) best first; ties in nested candidate/industry order"""
+        scored = [(candidate["id"], industry["id"], self.score(candidate, industry, weights))
+                  for candidate in candidates for industry in industries]
+        scored = [entry for entry in scored if entry[2] >= min_score_threshold]
+        scored.sort(key=lambda entry: -entry[2])
+        return scored[:top_n]
+
+    def matches(self, request):
+        """What /match_internships should return for a MatchRequest, as rank() tuples"""
+        main = self.main
+        candidates = ([main.candidates_db[request.candidate_id]] if request.candidate_id
+                      else list(main.candidates_db.values()))
+        # A candidate is ranked against open internships even when an industry_id is also given
+        industries = ([main.industries_db[request.industry_id]] if request.industry_id and not request.candidate_id
+                      else self.open_industries())
+        weights = request.weights.as_tuple() if request.weights is not None else None
+        return self.rank(candidates, industries, request.top_n, request.min_score_threshold, weights)
+
+
+@pytest.fixture
+def registry():
+    """main, with its registry reset to a seeded synthetic dataset
+
+    Ids are fixed, a few internships are full and some candidates were
+    edited or removed after registration, so the derived indexes have seen
+    every kind of write. Tests may write to it freely.
+    """
+    import main
+    from synthetic import generate_candidates, generate_industries
+
+    for table in (main.candidates_db, main.industries_db):
+        for record_id in list(table.keys()):
+            table.delete(record_id)
+    main.rebuild_derived_indexes()
+
+    areas = main.MatchingEngine.REGION_MAPPING
+    candidates = [{**main.new_candidate_record(main.CandidateRegistration(**candidate).model_dump()), "id": f"c{index:04d}"}
+                  for index, candidate in enumerate(generate_candidates(300, areas, seed=7))]
+    industries = [{**main.new_industry_record(main.IndustryRegistration(**industry).model_dump()), "id": f"i{index:04d}"}
+                  for index, industry in enumerate(generate_industries(40, areas, seed=7))]
+    main.candidates_db.put_many(candidates)
+    main.industries_db.put_many(industries)
+    rng = random.Random(7)
+    for industry in rng.sample(industries, 8):
+        main.industries_db.update(industry["id"], {"filled_positions": industry["internship_capacity"]})
+    for candidate in rng.sample(candidates, 20):
+        main.candidates_db.update(candidate["id"], {"skills": rng.sample(candidate["skills"], 2)})
+    for candidate in rng.sample(candidates, 10):
+        main.candidates_db.delete(candidate["id"])
+    return main
+
+
+@pytest.fixture
+def oracle(registry):
+    return Oracle(registry)
@@ -0,0 +1,103 @@
+import itertools
+import random
+
+import numpy as np
+
+from allocation import AllocationEngine
+
+
+def _optimal(pairs, n_candidates, n_industries):
+    edges = tuple(np.array(column) for column in zip(*pairs))
+    buckets = [{None: 1} for _ in range(n_industries)]
+    assignment = {}
+    AllocationEngine._optimal([{} for _ in range(n_candidates)], edges, buckets, assignment)
+    return {c: i for c, (i, _, _) in assignment.items()}
+
+
+def test_optimal_assigns_as_many_candidates_as_possible_before_maximizing_score():
+    # Pairing c1-i0 and c2-i1 scores 2.0 but leaves c0 unassigned; all three fit otherwise
+    pairs = [(0, 0, 0.3), (1, 0, 1.0), (1, 1, 0.3), (2, 1, 1.0), (2, 2, 0.3)]
+    assert _optimal(pairs, 3, 3) == {0: 0, 1: 1, 2: 2}
+
+
+def test_optimal_maximizes_score_among_the_largest_assignments():
+    pairs = [(0, 0, 0.9), (0, 1, 0.5), (1, 0, 0.8), (1, 1, 0.7)]
+    assert _optimal(pairs, 2, 2) == {0: 0, 1: 1}
+
+
+def _best_by_brute_force(candidates, pairs, buckets):
+    """Best (assigned, total score) over every choice of one bucket or none per candidate"""
+    options = [[None] + [(i, key, score) for c2, i, score in pairs if c2 == c for key in buckets[i]
+                         if key is None or candidate.get(key[0]) == key[1]]
+               for c, candidate in enumerate(candidates)]
+    best = (0, 0.0)
+    for choice in itertools.product(*options):
+        taken = [(i, key) for i, key, _ in filter(None, choice)]
+        if all(taken.count(seat) <= buckets[seat[0]][seat[1]] for seat in set(taken)):
+            best = max(best, (len(taken), round(sum(score for *_, score in filter(None, choice)), 3)))
+    return best
+
+
+def test_optimal_matches_brute_force_with_quota_buckets():
+    rng = random.Random(0)
+    for _ in range(60):
+        candidates = [{"category": rng.choice(["GEN", "SC"])} for _ in range(rng.randint(1, 5))]
+        industries = [{"internship_capacity": rng.randint(0, 4), "filled_positions": 0} for _ in range(rng.randint(1, 3))]
+        linked = {(rng.randrange(len(candidates)), rng.randrange(len(industries))) for _ in range(rng.randint(1, 8))}
+        pairs = [(c, i, round(rng.random(), 3)) for c, i in sorted(linked)]
+        buckets = [AllocationEngine.seat_buckets(industry, {"category": {"SC": 0.5}}) for industry in industries]
+        expected = _best_by_brute_force(candidates, pairs, buckets)
+
+        assignment = {}
+        AllocationEngine._optimal(candidates, tuple(np.array(column) for column in zip(*pairs)), buckets, assignment)
+        assert (len(assignment), round(sum(score for _, score, _ in assignment.values()), 3)) == expected
+
+
+def test_optimal_work_does_not_grow_with_seats():
+    # Twenty million seats: one column per seat would not fit in memory, a node per bucket is instant
+    rng = np.random.default_rng(0)
+    n, m = 5000, 200
+    c_idx = np.repeat(np.arange(n), 10)
+    i_idx = np.concatenate([rng.choice(m, 10, replace=False) for _ in range(n)])
+    scores = np.round(rng.random(len(c_idx)), 3)
+    buckets = [{None: 100_000} for _ in range(m)]
+    assignment = {}
+    AllocationEngine._optimal([{} for _ in range(n)], (c_idx, i_idx, scores), buckets, assignment)
+
+    # With room everywhere every candidate gets their best internship
+    best = scores.reshape(n, 10).max(axis=1)
+    assert sorted(assignment) == list(range(n))
+    assert np.array_equal([assignment[c][1] for c in range(n)], best)
+
+
+def test_commit_skips_taken_seats_and_writes_each_table_once(registry):
+    main = registry
+    candidates = list(main.candidates_db.find(status="active"))[:3]
+    industry = next(i for i in main.industries_db.values() if i["internship_capacity"] - i["filled_positions"] >= 2)
+    assignment = {position: (0, 0.9, "open") for position in range(3)}
+    # All but one seat are taken after the snapshot the assignment was made on
+    main.industries_db.update(industry["id"], {"filled_positions": industry["internship_capacity"] - 1})
+    versions = main.candidates_db.version, main.industries_db.version
+
+    allocations = main.apply_allocation(candidates, [industry], assignment, commit=True)
+    assert [a["candidate_id"] for a in allocations] == [candidates[0]["id"]]
+    assert (main.candidates_db.version, main.industries_db.version) == (versions[0] + 1, versions[1] + 1)
+    assert main.candidates_db[candidates[0]["id"]]["status"] == "allocated"
+    assert main.candidates_db[candidates[1]["id"]]["status"] == "active"
+    assert main.industries_db[industry["id"]]["filled_positions"] == industry["internship_capacity"]
+
+
+def test_allocation_inputs_are_prepared_without_the_store_lock(registry, monkeypatch):
+    main = registry
+    prepare = main.BatchMatchingEngine.prepare.__func__
+    held = []
+
+    def recording(cls, candidates, industries, skills=None):
+        held.append(main.store.lock._is_owned())
+        return prepare(cls, candidates, industries, skills)
+
+    monkeypatch.setattr(main.BatchMatchingEngine, "prepare", classmethod(recording))
+    candidates, industries, inputs = main.snapshot_allocation_inputs()
+    assert held == [False]
+    assert {c["id"] for c in candidates} == {c["id"] for c in main.candidates_db.find(status="active")}
+    assert inputs is not None and len(industries) > 0
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+def pair_ids(candidates, industries, pairs):
+    return [(candidates[c_pos]["id"], industries[i_pos]["id"]) for c_pos, i_pos in pairs]
+
+
+def ranked_ids(ranked):
+    return [(candidate_id, industry_id) for candidate_id, industry_id, _ in ranked]
+
+
+@pytest.mark.parametrize("top_n, min_score_threshold", [(1, 0.0), (25, 0.0), (200, 0.5), (100_000, 0.0), (10, 1.1)])
+def test_top_pairs_match_exhaustive_scoring(registry, oracle, monkeypatch, top_n, min_score_threshold):
+    # Small blocks, so the running top-N is merged across many of them
+    monkeypatch.setattr(registry.BatchMatchingEngine, "BLOCK_CELLS", 1000)
+    candidates, industries = list(registry.candidates_db.values()), oracle.open_industries()
+
+    pairs = registry.BatchMatchingEngine.top_pairs(candidates, industries, top_n, min_score_threshold)
+    assert pair_ids(candidates, industries, pairs) == ranked_ids(
+        oracle.rank(candidates, industries, top_n, min_score_threshold))
+
+
+def test_sharded_rank_pairs_match_exhaustive_scoring(registry, oracle, monkeypatch):
+    monkeypatch.setattr(registry.BatchMatchingEngine, "BLOCK_CELLS", 1000)
+    candidates, industries = list(registry.candidates_db.values()), oracle.open_industries()
+    inputs = registry.BatchMatchingEngine.prepare(candidates, industries)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        pairs = registry.BatchMatchingEngine.rank_pairs(inputs, 50, 0.3, executor, shards=7)
+    assert pair_ids(candidates, industries, pairs) == ranked_ids(oracle.rank(candidates, industries, 50, 0.3))
+
+
+def test_all_pairs_request_matches_exhaustive_scoring(registry, oracle):
+    request = registry.MatchRequest(top_n=30, min_score_threshold=0.0)
+
+    entries = registry.compute_matches(request)
+    assert [(entry["candidate_id"], entry["industry_id"], entry["match_score"]["overall_score"])
+            for entry in entries] == oracle.matches(request)
+
+
+def test_skill_weights_survive_writes_within_tolerance(registry, oracle, monkeypatch):
+    monkeypatch.setattr(registry.SkillsIndex, "REFIT_TOLERANCE", 0.05)
+    weights = registry.skills_index.weights()
+    candidate_id = next(iter(registry.candidates_db.keys()))
+    # Terms new to the vocabulary weigh as unseen until the next refit
+    registry.candidates_db.update(candidate_id, {"skills": ["Rust", "Embedded Systems", "Python"]})
+    assert registry.skills_index.weights() is weights
+
+    candidates, industries = list(registry.candidates_db.values()), oracle.open_industries()
+    pairs = registry.BatchMatchingEngine.top_pairs(candidates, industries, 100, 0.0)
+    assert pair_ids(candidates, industries, pairs) == ranked_ids(oracle.rank(candidates, industries, 100))
+
+    monkeypatch.setattr(registry.SkillsIndex, "REFIT_TOLERANCE", 0)
+    registry.candidates_db.update(candidate_id, {"skills": ["Python"]})
+    assert registry.skills_index.weights() is not weights
@@ -0,0 +1,116 @@
+import random
+
+import numpy as np
+
+from columnar import ColumnStore, DictColumns, StoreColumns
+from columnar import _SegmentColumn
+
+SCHEMA = (("name", "text"), ("skills", "tokens"), ("city", "category"), ("remote", "bool"),
+          ("months", "int"), ("registered", "timestamp"))
+
+VALUES = {
+    "name": ["Asha", "", "Ravi " * 50, None, 7],
+    "skills": [["Python", "SQL"], [], ["SQL"], None, "Python", ["Python", 3]],
+    "city": ["Delhi", "Pune", None, 3, ("Delhi",)],
+    "remote": [True, False, None, 1],
+    "months": [0, -5, 2 ** 40, 2 ** 70, None, 1.5, "many"],
+    "registered": ["2024-01-02T03:04:05", "2024-01-02T03:04:05.123456", "2024-01-02", "soon", None],
+}
+
+
+def _record(rng, record_id):
+    record = {"id": record_id}
+    for field, values in VALUES.items():
+        # Absent fields stay absent
+        if rng.random() < 0.9:
+            record[field] = rng.choice(values)
+    if rng.random() < 0.2:
+        record["note"] = {"free": ["form"]}
+    return record
+
+
+def test_records_read_back_as_written_across_updates_and_deletes(monkeypatch):
+    monkeypatch.setattr(_SegmentColumn, "COMPACT_MIN_GARBAGE", 64)
+    rng = random.Random(3)
+    store, expected = ColumnStore(SCHEMA), {}
+    for step in range(3000):
+        record_id = f"r{rng.randrange(200)}"
+        if record_id in expected and rng.random() < 0.2:
+            assert store.pop(record_id) == expected.pop(record_id)
+        else:
+            expected[record_id] = _record(rng, record_id)
+            store[record_id] = dict(expected[record_id])
+        if step % 500 == 0:
+            assert {record["id"]: record for record in store.values()} == expected
+    assert len(store) == len(expected)
+    assert all(record_id in store and store[record_id] == record for record_id, record in expected.items())
+    assert {record["id"]: record for record in store.values()} == expected
+    assert store.get("r-none") is None and "r-none" not in store
+
+
+def test_frozen_copies_never_see_later_writes():
+    rng = random.Random(4)
+    store = ColumnStore(SCHEMA)
+    for number in range(50):
+        store.put(_record(rng, f"r{number}"))
+    frozen = store.frozen()
+    before = {record["id"]: record for record in frozen.values()}
+
+    for number in range(0, 50, 2):
+        store.put(_record(rng, f"r{number}"))
+    for number in range(1, 50, 4):
+        store.remove(f"r{number}")
+    for number in range(50, 80):
+        store.put(_record(rng, f"r{number}"))
+    # A deleted id registered again starts a new row the copy must not read
+    store.put(_record(rng, "r1"))
+
+    assert len(frozen) == 50
+    assert {record["id"]: record for record in frozen.values()} == before
+    assert all(frozen[record_id] == record for record_id, record in before.items())
+    assert "r60" not in frozen and frozen.get("r60") is None
+    assert len(store) == 50 - 13 + 30 + 1
+
+
+def test_export_restore_round_trips():
+    rng = random.Random(5)
+    store = ColumnStore(SCHEMA)
+    for number in range(40):
+        store.put(_record(rng, f"r{number}"))
+    store.remove("r7")
+    arrays, state = store.export()
+    restored = ColumnStore.restore({key: array.copy() for key, array in arrays.items()}, state)
+    assert list(restored.values()) == list(store.values())
+    assert "r7" not in restored and len(restored) == len(store)
+
+
+def test_store_columns_agree_with_dict_columns():
+    rng = random.Random(6)
+    store = ColumnStore(SCHEMA)
+    for number in range(60):
+        record = {"id": f"r{number}", "skills": rng.sample(["Python", "SQL", "Excel", "Go"], rng.randint(0, 3)),
+                  "city": rng.choice(["Delhi", "Pune", "Agra"]), "months": rng.randint(0, 48),
+                  "remote": rng.random() < 0.5}
+        for field in ("skills", "city", "months"):
+            if rng.random() < 0.1:
+                del record[field]
+        store.put(record)
+    # Overflowed values are read through the records
+    store.put({"id": "r5", "city": 3, "months": 2 ** 70, "skills": "Python"})
+    store.remove("r9")
+
+    rows = store.live_rows()
+    for mask in (np.ones(len(rows), dtype=bool), np.arange(len(rows)) % 3 == 0, np.arange(len(rows)) != 5):
+        columns = StoreColumns(store, rows).subset(mask)
+        reference = DictColumns(list(store.values())).subset(mask)
+        assert columns.ids == reference.ids
+        for field, default in (("city", "Unknown"), ("remote", False)):
+            codes, values = columns.categories(field, default)
+            reference_codes, reference_values = reference.categories(field, default)
+            assert [values[code] for code in codes] == [reference_values[code] for code in reference_codes]
+        indptr, codes, strings = columns.token_lists("skills")
+        reference_indptr, reference_codes, reference_strings = reference.token_lists("skills")
+        assert indptr.tolist() == reference_indptr.tolist()
+        assert [strings[code] for code in codes] == [reference_strings[code] for code in reference_codes]
+        assert columns.list_lengths("skills").tolist() == reference.list_lengths("skills").tolist()
+        assert columns.numbers("months", 0).tolist() == reference.numbers("months", 0).tolist()
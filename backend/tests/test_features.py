@@ -0,0 +1,70 @@
+import random
+
+from fastapi.testclient import TestClient
+
+
+def test_cached_features_follow_every_write(registry):
+    main = registry
+    cache = main.feature_cache
+    rng = random.Random(9)
+    candidate_ids = list(main.candidates_db.keys())
+    industry_ids = list(main.industries_db.keys())
+    for candidate_id in rng.sample(candidate_ids, 10):
+        main.candidates_db.update(candidate_id, {
+            "qualifications": ["B.Tech Computer Science"], "experience_months": rng.choice([0, 30]),
+            "category": rng.choice(["General", "SC", "ST"]), "location_preference": ["Pune"]})
+    for industry_id in rng.sample(industry_ids, 5):
+        industry = main.industries_db[industry_id]
+        main.industries_db.update(industry_id, {"location": "Pune", "sector": "Healthcare",
+                                                "filled_positions": industry["internship_capacity"]})
+    deleted = candidate_ids[0]
+    main.candidates_db.delete(deleted)
+
+    for candidate in main.candidates_db.values():
+        assert cache.candidate_by_id(candidate["id"]) == main.CandidateFeatures.compile(candidate)
+    for industry in main.industries_db.values():
+        assert cache.industry_by_id(industry["id"]) == main.IndustryFeatures.compile(industry)
+    assert deleted not in cache._candidates
+
+
+def test_matching_reads_compiled_features_without_recompiling(registry, oracle, monkeypatch):
+    main = registry
+    compiled = []
+    for features in (main.CandidateFeatures, main.IndustryFeatures):
+        compile_ = features.compile
+
+        def counting(record, compile_=compile_):
+            compiled.append(record["id"])
+            return compile_(record)
+
+        monkeypatch.setattr(features, "compile", staticmethod(counting))
+
+    with TestClient(main.app) as client:
+        # Warm-up rebuilt the cache; matching from here on only reads it
+        del compiled[:]
+        for body in ({"industry_id": "i0003"}, {"candidate_id": "c0005"}):
+            assert client.post("/match_internships", json={**body, "min_score_threshold": 0.0}).status_code == 200
+        assert compiled == []
+        # All pairs are scored column-wise; only the returned pairs are scored from records
+        assert client.post("/match_internships", json={"top_n": 20, "min_score_threshold": 0.0}).status_code == 200
+        assert len(compiled) <= 2 * 20
+    del compiled[:]
+
+    # A write compiles the written record once, and matching still reads from the cache
+    main.candidates_db.update("c0005", {"experience_months": 40})
+    assert compiled == ["c0005"]
+    request = main.MatchRequest(candidate_id="c0005", top_n=5)
+    entries = main.compute_matches(request)
+    assert compiled == ["c0005"]
+    assert [(entry["candidate_id"], entry["industry_id"], entry["match_score"]["overall_score"])
+            for entry in entries] == oracle.matches(request)
+
+
+def test_pinned_features_keep_their_version(registry):
+    main = registry
+    state = main.match_states.pin()
+    before = state.features.candidate_by_id("c0002")
+    main.candidates_db.update("c0002", {"category": "ST", "skills": ["Welding"]})
+    assert state.features.candidate_by_id("c0002") == before
+    assert main.feature_cache.candidate_by_id("c0002").skills == ("Welding",)
+    assert main.match_states.pin().features.candidate_by_id("c0002") != before
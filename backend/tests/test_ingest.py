@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from ingest import iter_csv_rows, iter_jsonl_rows
+
+LIST_FIELDS = frozenset({"skills", "location_preference"})
+
+
+async def _chunks(data, size):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def _rows(parser, data, *args, chunk_size=4):
+    async def collect():
+        return [row async for row in parser(_chunks(data, chunk_size), *args)]
+    return asyncio.run(collect())
+
+
+def test_csv_empty_list_cells_are_empty_lists_and_other_empty_cells_are_dropped():
+    data = "﻿name,skills,location_preference,phone\nAsha,Python;SQL,,\n".encode()
+    assert _rows(iter_csv_rows, data, LIST_FIELDS) == [
+        (1, {"name": "Asha", "skills": ["Python", "SQL"], "location_preference": []})
+    ]
+
+
+def test_invalid_utf8_lines_are_row_errors():
+    data = b'{"name": "Asha"}\n{"name": "\xff"}\n{"name": "Ren\xc3\xa9"}\n'
+    rows = _rows(iter_jsonl_rows, data, chunk_size=1)
+    assert rows[0] == (1, {"name": "Asha"})
+    assert rows[1][0] == 2 and rows[1][1].startswith("Invalid UTF-8")
+    assert rows[2] == (3, {"name": "René"})
+
+    data = b'name,skills\n"Asha\n\xff",Python\nRavi,Excel\n'
+    rows = _rows(iter_csv_rows, data, LIST_FIELDS)
+    assert rows[0][0] == 1 and rows[0][1].startswith("Invalid UTF-8")
+    assert rows[1] == (2, {"name": "Ravi", "skills": ["Excel"]})
+
+
+def test_lines_split_the_same_at_any_chunk_size():
+    data = "﻿".encode() + b'{"name": "Asha"}\r\n\n{"name": "' + b"x" * 5000 + b'"}\n{"name": "Ravi"}'
+    expected = _rows(iter_jsonl_rows, data, chunk_size=len(data))
+    assert [row for _, row in expected] == [{"name": "Asha"}, {"name": "x" * 5000}, {"name": "Ravi"}]
+    for chunk_size in (1, 2, 3, 7, 4096):
+        assert _rows(iter_jsonl_rows, data, chunk_size=chunk_size) == expected
+
+
+def test_bulk_upload_reports_rejected_rows_in_order_across_batches(registry, monkeypatch):
+    main = registry
+    monkeypatch.setattr(main, "BULK_BATCH_SIZE", 2)
+    valid = {"name": "Asha", "email": "a@example.com", "phone": "1", "skills": ["Python"], "qualifications": [],
+             "location_preference": [], "current_location": "Delhi", "category": "SC", "district_type": "Urban"}
+    lines = [json.dumps(valid), "not json", json.dumps({**valid, "experience_months": "many"}),
+             json.dumps(valid), json.dumps({"name": "Ravi"})]
+    before = len(main.candidates_db)
+
+    body = TestClient(main.app).post("/register_candidates/bulk?format=jsonl", content="\n".join(lines)).json()
+    assert (body["registered"], body["failed"]) == (2, 3)
+    assert [error["row"] for error in body["errors"]] == [2, 3, 5]
+    assert body["errors"][1]["errors"][0]["field"] == "experience_months"
+    assert len(main.candidates_db) == before + 2
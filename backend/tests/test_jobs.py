@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(registry, monkeypatch):
+    # Several chunks per job, so progress and cancellation are seen between them
+    monkeypatch.setattr(registry.JobManager, "CHUNK_CELLS", 2000)
+    with TestClient(registry.app) as client:
+        yield client
+
+
+def finished(client, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()["job"]
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} still running")
+
+
+def all_results(client, job_id, limit=7):
+    rows, cursor = [], None
+    while True:
+        page = client.get(f"/jobs/{job_id}/results", params={"limit": limit, "cursor": cursor}).json()
+        rows += page["results"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return rows
+
+
+def test_match_job_pages_the_same_top_pairs_as_exhaustive_scoring(registry, oracle, client):
+    submitted = client.post("/jobs/match", json={"top_n": 25, "min_score_threshold": 0.4})
+    assert submitted.status_code == 202
+    job = finished(client, submitted.json()["job"]["id"])
+
+    assert job["status"] == "completed" and job["result_count"] == 25
+    assert job["progress"]["pairs_scored"] == job["progress"]["total_pairs"] == \
+        len(registry.candidates_db) * len(oracle.open_industries())
+    rows = all_results(client, job["id"])
+    assert [(row["candidate_id"], row["industry_id"], row["match_score"]["overall_score"]) for row in rows] == \
+        oracle.rank(list(registry.candidates_db.values()), oracle.open_industries(), 25, 0.4)
+    assert client.get("/jobs").json()["jobs"][0]["id"] == job["id"]
+
+
+def test_per_candidate_job_lists_each_candidates_best_internships(registry, oracle, client):
+    job = finished(client, client.post("/jobs/match", json={"per_candidate": 3, "min_score_threshold": 0.0})
+                   .json()["job"]["id"])
+    rows = all_results(client, job["id"], limit=50)
+    assert [row["candidate_id"] for row in rows] == list(registry.candidates_db.keys())
+    industries = {industry["id"]: industry for industry in oracle.open_industries()}
+    for row in rows[::25]:
+        candidate = registry.candidates_db[row["candidate_id"]]
+        # Internships tied at the cut-off may be listed instead of one another
+        assert [match["overall_score"] for match in row["matches"]] == \
+            [score for _, _, score in oracle.rank([candidate], industries.values(), 3)]
+        for match in row["matches"]:
+            assert match["overall_score"] == oracle.score(candidate, industries[match["industry_id"]])
+
+
+def test_committed_allocation_job_writes_what_a_dry_run_reports(registry, client):
+    dry_run = client.post("/allocate", json={"method": "optimal"}).json()
+    job = finished(client, client.post("/jobs/allocate", json={"method": "optimal", "commit": True})
+                   .json()["job"]["id"])
+    assert job["status"] == "completed"
+    assert job["summary"]["total_allocated"] == dry_run["total_allocated"] > 0
+    for row in all_results(client, job["id"], limit=100):
+        candidate = registry.candidates_db[row["candidate_id"]]
+        assert (candidate["status"], candidate["allocated_industry_id"]) == ("allocated", row["industry_id"])
+
+
+def test_cancelled_job_stops_between_chunks(registry, client, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    advance = registry.JobContext.advance
+
+    def held(context, pairs):
+        started.set()
+        release.wait(10)
+        advance(context, pairs)
+
+    monkeypatch.setattr(registry.JobContext, "advance", held)
+    job_id = client.post("/jobs/match", json={"top_n": 10}).json()["job"]["id"]
+    assert started.wait(10)
+    assert client.delete(f"/jobs/{job_id}").json()["job"]["cancel_requested"] is True
+    release.set()
+    job = finished(client, job_id)
+    assert job["status"] == "cancelled"
+    assert job["progress"]["pairs_scored"] < job["progress"]["total_pairs"]
+
+
+def test_unknown_jobs_and_bad_requests(registry, client):
+    assert client.get("/jobs/nope").status_code == 404
+    assert client.get("/jobs/nope/results").status_code == 404
+    assert client.delete("/jobs/nope").status_code == 404
+    assert client.post("/jobs/match", json={"top_n": 0}).status_code == 400
+    assert client.post("/jobs/allocate", json={"method": "random"}).status_code == 400
+
+
+def test_jobs_of_a_dead_process_are_marked_interrupted(registry):
+    main = registry
+    job = {"id": "orphan", "kind": "match", "status": "running", "owner": {"pid": 2 ** 22 + 1, "token": "gone"},
+           "created_at": "2026-01-01T00:00:00"}
+    main.job_manager.table.put(job)
+    main.job_manager.recover()
+    assert main.job_manager.table.get("orphan")["status"] == "interrupted"
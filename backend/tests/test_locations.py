@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from locations import ELSEWHERE, NEARBY, SAME_PLACE, LocationHierarchy
+
+LOCATIONS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "locations.csv")
+
+# The region mapping location scores were hard-coded with before the hierarchy
+BASELINE_REGIONS = {
+    "Delhi": ["NCR", "North India"],
+    "Mumbai": ["Maharashtra", "West India"],
+    "Bangalore": ["Karnataka", "South India"],
+    "Hyderabad": ["Telangana", "South India"],
+    "Chennai": ["Tamil Nadu", "South India"],
+    "Kolkata": ["West Bengal", "East India"],
+    "Pune": ["Maharashtra", "West India"],
+    "Ahmedabad": ["Gujarat", "West India"],
+    "Patna": ["Bihar", "East India"],
+}
+
+
+@pytest.fixture(scope="module")
+def hierarchy():
+    return LocationHierarchy.load(LOCATIONS_FILE)
+
+
+def test_baseline_region_mapping_cities_score_as_before(hierarchy):
+    places = set(BASELINE_REGIONS) | {area for areas in BASELINE_REGIONS.values() for area in areas}
+    for location, areas in BASELINE_REGIONS.items():
+        for preference in places:
+            expected = SAME_PLACE if preference == location else NEARBY if preference in areas else ELSEWHERE
+            assert hierarchy.score(preference, location) == expected, (preference, location)
+
+
+def test_district_state_and_region_preferences_are_nearby(hierarchy):
+    assert hierarchy.score("Gautam Buddh Nagar", "Noida") == NEARBY      # district
+    assert hierarchy.score("Thane", "Navi Mumbai") == NEARBY             # district named after a city
+    assert hierarchy.score("Haryana", "Gurugram") == NEARBY              # state
+    assert hierarchy.score("South India", "Secunderabad") == NEARBY      # region
+    assert hierarchy.score("NCR", "Faridabad") == NEARBY                 # extra area
+    # Containment only counts one way: a city preference does not cover its state
+    assert hierarchy.score("Noida", "Uttar Pradesh") == ELSEWHERE
+    assert hierarchy.score("Pune", "Mumbai") == ELSEWHERE
+    assert "Maharashtra" in hierarchy.nearby("Pune") and "Mumbai" not in hierarchy.nearby("Pune")
+
+
+def test_nearby_radius_adds_close_cities_in_other_areas():
+    assert LocationHierarchy.load(LOCATIONS_FILE).score("Chandigarh", "Patiala") == ELSEWHERE
+    near = LocationHierarchy.load(LOCATIONS_FILE, nearby_km=75)
+    assert near.score("Chandigarh", "Patiala") == NEARBY
+    assert near.score("Patiala", "Chandigarh") == NEARBY
+    assert near.score("Chandigarh", "Chennai") == ELSEWHERE
+    assert near.fingerprint != LocationHierarchy.load(LOCATIONS_FILE).fingerprint
+
+
+def test_aliases_resolve_to_their_city(hierarchy):
+    assert hierarchy.canonical("Bombay") == "Mumbai"
+    assert hierarchy.score("Bombay", "Mumbai") == SAME_PLACE
+    assert hierarchy.score("Bengaluru", "Bangalore") == SAME_PLACE
+    assert hierarchy.score("NCR", "Gurgaon") == NEARBY
+    assert hierarchy.nearby("Gurgaon") == hierarchy.nearby("Gurugram")
+
+    with pytest.raises(ValueError):
+        LocationHierarchy([{"city": "Delhi", "state": "Delhi"}, {"city": "Noida", "aliases": "Delhi"}])
+
+
+def test_unknown_places_only_match_themselves(hierarchy):
+    assert hierarchy.score("Atlantis", "Atlantis") == SAME_PLACE
+    assert hierarchy.score("Atlantis", "Delhi") == ELSEWHERE
+    assert hierarchy.score("Delhi", "Atlantis") == ELSEWHERE
+    assert hierarchy.nearby("Atlantis") == frozenset()
+
+
+def test_score_table_agrees_with_score(hierarchy):
+    places = ["Delhi", "Gurgaon", "NCR", "Maharashtra", "Bombay", "Thane", "South India", "Atlantis"]
+    table = hierarchy.score_table(places, places)
+    assert [[hierarchy.score(p, location) for location in places] for p in places] == table.tolist()
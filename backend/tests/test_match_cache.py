@@ -0,0 +1,97 @@
+import asyncio
+import json
+import random
+import threading
+
+from fastapi.testclient import TestClient
+
+
+def served_matches(main, request):
+    body = json.loads(asyncio.run(main.match_internships(request)).body)
+    return body["cache_hit"], [(entry["candidate_id"], entry["industry_id"], entry["match_score"]["overall_score"])
+                               for entry in body["matches"]]
+
+
+def test_cached_results_match_exhaustive_scoring_across_writes(registry, oracle):
+    main = registry
+    rng = random.Random(11)
+    candidate_ids = list(main.candidates_db.keys())
+    industry_ids = list(main.industries_db.keys())
+    requests = [main.MatchRequest(top_n=20), main.MatchRequest(top_n=5, min_score_threshold=0.6)]
+    requests += [main.MatchRequest(candidate_id=candidate_id, top_n=5) for candidate_id in rng.sample(candidate_ids, 5)]
+    requests += [main.MatchRequest(industry_id=industry_id, top_n=8) for industry_id in rng.sample(industry_ids, 5)]
+
+    hits = 0
+    for round_ in range(6):
+        for request in requests + requests:
+            cache_hit, matches = served_matches(main, request)
+            assert matches == oracle.matches(request)
+            hits += cache_hit
+        # Writes between rounds, to records in cached results and to others
+        for industry_id in rng.sample(industry_ids, 3):
+            industry = main.industries_db[industry_id]
+            main.industries_db.update(industry_id, {
+                "filled_positions": rng.randint(0, industry["internship_capacity"])})
+        if round_ % 2:
+            # Shifts the TF-IDF weights, which at zero tolerance expires every entry
+            for candidate_id in rng.sample(candidate_ids, 10):
+                candidate = main.candidates_db[candidate_id]
+                main.candidates_db.update(candidate_id, {"skills": candidate["skills"] + ["Kubernetes"]})
+    assert hits > 0
+
+
+def test_revalidation_past_its_budget_is_a_miss(registry, oracle, monkeypatch):
+    main = registry
+    request = main.MatchRequest(candidate_id="c0001", top_n=5)
+    assert served_matches(main, request)[0] is False
+    listed = {industry_id for _, industry_id, _ in oracle.matches(request)}
+    unlisted = next(industry_id for industry_id in main.industries_db.keys() if industry_id not in listed)
+
+    # Rescoring the written internship shows it can't enter the list: still a hit
+    main.industries_db.update(unlisted, {"stipend_range": "10000-12000"})
+    assert served_matches(main, request)[0] is True
+
+    monkeypatch.setattr(main.MatchResultCache, "REVALIDATION_BUDGET_SECONDS", 0)
+    main.industries_db.update(unlisted, {"stipend_range": "12000-15000"})
+    cache_hit, matches = served_matches(main, request)
+    assert cache_hit is False
+    assert matches == oracle.matches(request)
+
+
+def test_lookup_runs_on_a_match_worker_without_the_store_lock(registry, monkeypatch):
+    main = registry
+    lookups = []
+    get = main.match_cache.get
+
+    def recording_get(key, state, change_seq):
+        lookups.append((threading.current_thread().name, main.store.lock._is_owned()))
+        return get(key, state, change_seq)
+
+    monkeypatch.setattr(main.match_cache, "get", recording_get)
+    with TestClient(main.app) as client:
+        for _ in range(2):
+            assert client.post("/match_internships", json={"industry_id": "i0003"}).status_code == 200
+    assert len(lookups) == 2
+    assert all(name.startswith("match") and not locked for name, locked in lookups)
+
+
+def test_drift_tolerance_is_opt_in(registry, monkeypatch):
+    main = registry
+    request = main.MatchRequest(candidate_id="c0001", top_n=5)
+    candidate_ids = [candidate_id for candidate_id in main.candidates_db.keys() if candidate_id != "c0001"]
+
+    def refit():
+        weights = main.skills_index.weights()
+        for candidate_id in candidate_ids:
+            main.candidates_db.update(candidate_id, {"skills": main.candidates_db[candidate_id]["skills"] + ["Rust"]})
+            if main.skills_index.weights() is not weights:
+                return
+
+    assert served_matches(main, request)[0] is False
+    refit()
+    # Scored with weights since refit: recomputed by default
+    assert served_matches(main, request)[0] is False
+
+    monkeypatch.setattr(main.match_cache, "idf_drift_tolerance", 1.0)
+    refit()
+    assert served_matches(main, request)[0] is True
@@ -0,0 +1,86 @@
+import re
+
+from fastapi.testclient import TestClient
+
+from metrics import MetricsRegistry
+
+SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+
+
+def scrape(client):
+    """{(name, ((label, value), ...)): value} for every sample on /metrics"""
+    response = client.get("/metrics")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+    samples = {}
+    for line in response.text.splitlines():
+        if line.startswith("#"):
+            continue
+        name, labels, value = SAMPLE.match(line).groups()
+        pairs = tuple(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', labels or ""))
+        samples[name, pairs] = float(value)
+    return samples
+
+
+def test_histograms_are_cumulative_and_labels_escaped():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.5, 7.0):
+        latency.observe(seconds, '/a"b\\c')
+    calls = registry.counter("calls_total", "Calls", ("route",))
+    calls.inc(2, "/x")
+    calls.inc(3, "/x")
+    registry.gauge("up", "Up", lambda: [((), 1)])
+
+    lines = registry.render().splitlines()
+    label = 'route="/a\\"b\\\\c"'
+    assert lines[:2] == ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"]
+    assert lines[2:7] == [
+        f'latency_seconds_bucket{{{label},le="0.1"}} 1', f'latency_seconds_bucket{{{label},le="1.0"}} 3',
+        f'latency_seconds_bucket{{{label},le="+Inf"}} 4', f"latency_seconds_sum{{{label}}} 8.05",
+        f"latency_seconds_count{{{label}}} 4"]
+    assert 'calls_total{route="/x"} 5' in lines
+    assert lines[-3:] == ["# HELP up Up", "# TYPE up gauge", "up 1"]
+
+
+def test_requests_and_scored_pairs_are_counted(registry, oracle):
+    main = registry
+    with TestClient(main.app) as client:
+        before = scrape(client)
+        for candidate_id in ("c0001", "c0002", "c0003"):
+            assert client.get(f"/candidates/{candidate_id}").status_code == 200
+        assert client.get("/candidates/nobody").status_code == 404
+        assert client.post("/match_internships", json={"candidate_id": "c0004", "top_n": 5}).status_code == 200
+        assert client.post("/match_internships", json={"candidate_id": "c0004", "top_n": 5}).status_code == 200
+        assert client.post("/match_internships", json={"top_n": 5}).status_code == 200
+        after = scrape(client)
+
+    def delta(name, **labels):
+        key = (name, tuple(labels.items()))
+        return after.get(key, 0) - before.get(key, 0)
+
+    # Routes are reported by their template, not the requested path
+    route = {"method": "GET", "route": "/candidates/{candidate_id}"}
+    assert delta("pm_http_request_duration_seconds_count", **route, status="200") == 3
+    assert delta("pm_http_request_duration_seconds_count", **route, status="404") == 1
+    assert delta("pm_http_request_duration_seconds_bucket", **route, status="200", le="+Inf") == 3
+
+    state = main.match_states.pin()
+    # The repeated request was a cache hit and scored nothing
+    assert delta("pm_match_pairs_scored_total", mode="candidate") + \
+        delta("pm_match_pairs_pruned_total", mode="candidate") == len(state.index.industries.seq)
+    assert (delta("pm_match_cache_hits_total"), delta("pm_match_cache_misses_total")) == (1, 2)
+    assert delta("pm_match_pairs_scored_total", mode="all") == len(main.candidates_db) * len(oracle.open_industries())
+    assert delta("pm_match_stage_duration_seconds_count", stage="score", mode="all") == 1
+    assert after["pm_registry_records", (("kind", "candidate"),)] == len(main.candidates_db)
+    assert after["pm_registry_records", (("kind", "industry"),)] == len(main.industries_db)
+
+
+def test_profiled_requests_carry_a_server_timing_breakdown(registry):
+    with TestClient(registry.app) as client:
+        plain = client.post("/match_internships", json={"industry_id": "i0003"})
+        profiled = client.post("/match_internships", json={"industry_id": "i0004"}, headers={"X-Profile": "1"})
+    assert "server-timing" not in plain.headers
+    entries = dict(entry.split(";", 1) for entry in profiled.headers["server-timing"].split(", "))
+    assert {"cache_lookup", "search", "build_entries", "total"} <= set(entries)
+    assert all(re.fullmatch(r'dur=\d+\.\d{3}|desc="\d+"', value) for value in entries.values())
+    assert int(entries["pairs_scored"][6:-1]) > 0
@@ -0,0 +1,72 @@
+from fastapi.testclient import TestClient
+
+
+def walk(client, path, **params):
+    """Every page of a listing: (pages, records in page order)"""
+    pages, records, cursor = [], [], None
+    while True:
+        page = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        pages.append(page)
+        records += page[path.strip("/")]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages, records
+
+
+def test_pages_concatenate_to_the_full_listing(registry):
+    main = registry
+    queries = [("/candidates", {}, lambda record: True),
+               ("/candidates", {"category": "SC"}, lambda record: record["category"] == "SC"),
+               ("/candidates", {"sector": "Healthcare", "status": "active"},
+                lambda record: "Healthcare" in record.get("preferred_sectors", []) and record["status"] == "active"),
+               ("/industries", {}, lambda record: True),
+               ("/industries", {"location": "Agartala"}, lambda record: record["location"] == "Agartala")]
+    with TestClient(main.app) as client:
+        for path, filters, keep in queries:
+            table = main.candidates_db if path == "/candidates" else main.industries_db
+            expected = [record["id"] for record in table.values() if keep(record)]
+            assert expected
+            for limit in (1, 7, 40, 1000):
+                pages, records = walk(client, path, limit=limit, **filters)
+                assert [record["id"] for record in records] == expected
+                assert all(page["count"] == len(page[path.strip("/")]) <= limit for page in pages)
+                assert pages[0]["total"] == len(expected)
+                assert all(page["total"] is None for page in pages[1:])
+
+
+def test_writes_between_pages_neither_repeat_nor_skip_records(registry):
+    main = registry
+    before = [record["id"] for record in main.candidates_db.values()]
+    with TestClient(main.app) as client:
+        page = client.get("/candidates", params={"limit": 50}).json()
+        seen = [record["id"] for record in page["candidates"]]
+        # Edit a listed record, delete an unlisted one and register a new one
+        main.candidates_db.update(seen[0], {"experience_months": 99})
+        deleted = before[100]
+        main.candidates_db.delete(deleted)
+        added = {**main.candidates_db[before[1]], "id": "c-new"}
+        main.candidates_db.put(added)
+        _, rest = walk(client, "/candidates", limit=50, cursor=page["next_cursor"])
+        seen += [record["id"] for record in rest]
+    assert len(seen) == len(set(seen))
+    assert seen == [candidate_id for candidate_id in before if candidate_id != deleted] + ["c-new"]
+
+
+def test_fields_select_the_returned_keys(registry):
+    main = registry
+    with TestClient(main.app) as client:
+        page = client.get("/candidates", params={"limit": 5, "fields": "id, name,status,no_such_field"}).json()
+        assert [set(record) for record in page["candidates"]] == [{"id", "name", "status"}] * 5
+        assert page["candidates"] == [{field: record[field] for field in ("id", "name", "status")}
+                                      for record in list(main.candidates_db.values())[:5]]
+
+        _, records = walk(client, "/industries", limit=9, fields="id,location")
+        assert records == [{"id": record["id"], "location": record["location"]}
+                           for record in main.industries_db.values()]
+
+        exported = client.get("/candidates/export", params={"fields": "id,category", "category": "OBC"})
+        assert exported.text.splitlines() == [
+            '{"id": "%s", "category": "OBC"}' % record["id"]
+            for record in main.candidates_db.values() if record["category"] == "OBC"]
+
+        assert client.get("/candidates", params={"cursor": "next"}).status_code == 400
@@ -0,0 +1,57 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+CASES = [(1, 0.0), (10, 0.0), (10, 0.6), (1000, 0.0), (5, 1.1)]
+
+
+@pytest.mark.parametrize("top_n, min_score_threshold", CASES)
+def test_match_candidate_matches_exhaustive_scoring(registry, oracle, top_n, min_score_threshold):
+    state = registry.match_states.pin()
+    for candidate in random.Random(top_n).sample(list(registry.candidates_db.values()), 25):
+        top, _ = state.index.match_candidate(candidate, state.features, state.skills, top_n, min_score_threshold)
+        assert [(candidate["id"], industry_id, score) for score, _, industry_id in top] == \
+            oracle.rank([candidate], oracle.open_industries(), top_n, min_score_threshold)
+
+
+@pytest.mark.parametrize("top_n, min_score_threshold", CASES)
+def test_match_industry_matches_exhaustive_scoring(registry, oracle, top_n, min_score_threshold):
+    candidates = list(registry.candidates_db.values())
+    state = registry.match_states.pin()
+    for industry in registry.industries_db.values():
+        top, _ = state.index.match_industry(industry, state.features, state.skills, top_n, min_score_threshold)
+        assert [(candidate_id, industry["id"], score) for score, _, candidate_id in top] == \
+            oracle.rank(candidates, [industry], top_n, min_score_threshold)
+
+
+def test_search_reads_its_pinned_state_while_writes_proceed(registry, oracle, monkeypatch):
+    main = registry
+    request = main.MatchRequest(candidate_id=next(iter(main.candidates_db.keys())), top_n=5)
+    expected = oracle.matches(request)
+    searching, written = threading.Event(), threading.Event()
+    skills_component = main.MatchingEngine.skills_component.__func__
+
+    def paused(cls, candidate, industry, skills=None):
+        if not searching.is_set():
+            searching.set()
+            written.wait(5)
+        return skills_component(cls, candidate, industry, skills)
+
+    monkeypatch.setattr(main.MatchingEngine, "skills_component", classmethod(paused))
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        search = executor.submit(main.compute_matches, request)
+        assert searching.wait(5)
+        try:
+            # Would block on the store lock if the search held it
+            writer = threading.Thread(target=main.industries_db.delete, args=(expected[0][1],))
+            writer.start()
+            writer.join(5)
+            assert not writer.is_alive()
+        finally:
+            written.set()
+        entries = search.result(5)
+    # The deleted internship was still registered in the version the search pinned
+    assert [(entry["candidate_id"], entry["industry_id"], entry["match_score"]["overall_score"])
+            for entry in entries] == expected
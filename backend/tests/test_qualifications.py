@@ -0,0 +1,19 @@
+from main import MatchingEngine
+from qualifications import qualification_token_ids, qualification_tokens
+
+
+def test_spaced_degree_abbreviations_are_folded():
+    assert qualification_tokens("B Tech") == ("btech",)
+    assert qualification_tokens("B Com") == qualification_tokens("B.Com") == ("bcom",)
+    assert qualification_tokens("M Sc Statistics") == ("msc", "statistics")
+    assert qualification_tokens("Grade B in Maths") == ("grade", "b", "maths")
+
+
+def test_spaced_abbreviation_shares_a_keyword_with_the_dotted_degree():
+    assert MatchingEngine.calculate_qualification_match(["B.Tech Computer Science"], ["B Tech"]) == 0.3
+    assert MatchingEngine.calculate_qualification_match(["B Tech"], ["B.Tech"]) == 1.0
+
+
+def test_token_ids_are_sets_of_small_ids():
+    assert qualification_token_ids("B.Tech Computer Science") == qualification_token_ids("computer science b-tech")
+    assert qualification_token_ids("of the") == frozenset()
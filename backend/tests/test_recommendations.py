@@ -0,0 +1,46 @@
+import random
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def recommendations(registry, monkeypatch):
+    """Lists kept for K=10; the store listeners look them up by name, so writes reach them"""
+    lists = registry.recommendation_lists(10)
+    monkeypatch.setattr(registry, "recommendations", lists)
+    lists.start()
+    yield lists
+    lists.stop()
+
+
+def test_lists_match_exhaustive_scoring_after_skills_edits(registry, oracle, recommendations):
+    main = registry
+    rng = random.Random(5)
+    candidate_ids = list(main.candidates_db.keys())
+    subjects = rng.sample(candidate_ids, 10)
+
+    for _ in range(3):
+        for candidate_id in subjects:
+            candidate = main.candidates_db[candidate_id]
+            _, top = recommendations.top("candidate", candidate_id, 5, 0.0)
+            assert [(candidate_id, industry_id, score) for score, _, industry_id in top] == \
+                oracle.rank([candidate], oracle.open_industries(), 5)
+        # Taking on another candidate's skills shifts the TF-IDF weights behind every kept list
+        for candidate_id in rng.sample(candidate_ids, 10):
+            main.candidates_db.update(candidate_id, {"skills": main.candidates_db[rng.choice(candidate_ids)]["skills"]})
+
+
+def recommendation_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "recommendations"]
+
+
+def test_thread_runs_only_when_started_and_enabled(registry):
+    disabled, enabled = registry.recommendation_lists(0), registry.recommendation_lists(5)
+    assert not recommendation_threads()
+    disabled.start()
+    assert not recommendation_threads()
+    enabled.start()
+    assert len(recommendation_threads()) == 1
+    enabled.stop()
+    assert not recommendation_threads()
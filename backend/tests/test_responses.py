@@ -0,0 +1,75 @@
+from fastapi.testclient import TestClient
+
+from responses import etag_matches
+
+
+def match(client, **body):
+    response = client.post("/match_internships", json={"top_n": 10, "min_score_threshold": 0.0, **body})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_compact_matches_carry_the_same_data_as_full(registry):
+    with TestClient(registry.app) as client:
+        for body in ({}, {"candidate_id": "c0001"}, {"industry_id": "i0003"}):
+            full = match(client, **body)["matches"]
+            compact = match(client, response_format="compact", **body)
+            rows = [dict(zip(compact["match_fields"], row)) for row in compact["matches"]]
+            assert len(rows) == len(full) > 0
+            for entry, row in zip(full, rows):
+                assert (row["candidate_id"], row["industry_id"]) == (entry["candidate_id"], entry["industry_id"])
+                assert {field: row[field] for field in compact["match_fields"][2:]} == entry["match_score"]
+                assert compact["candidates"][row["candidate_id"]] == {"name": entry["candidate_name"]}
+                assert compact["internships"][row["industry_id"]] == {
+                    field: entry[field] for field in ("company_name", "internship_title", "available_positions")}
+
+
+def test_without_breakdown_only_overall_scores_are_returned(registry):
+    with TestClient(registry.app) as client:
+        full = match(client, candidate_id="c0001")["matches"]
+        brief = match(client, candidate_id="c0001", include_breakdown=False)["matches"]
+        assert [entry["match_score"] for entry in brief] == \
+            [{"overall_score": entry["match_score"]["overall_score"]} for entry in full]
+        compact = match(client, candidate_id="c0001", response_format="compact", include_breakdown=False)
+        assert compact["match_fields"] == ["candidate_id", "industry_id", "overall_score"]
+
+        response = client.post("/match_internships", json={"response_format": "xml"})
+        assert response.status_code == 400
+
+
+def test_unchanged_listings_and_stats_answer_304_until_a_write(registry):
+    main = registry
+    with TestClient(main.app) as client:
+        for url in ("/stats", "/candidates?limit=5", "/industries?limit=5"):
+            first = client.get(url)
+            tag = first.headers["etag"]
+            assert tag.startswith('W/"') and first.headers["cache-control"] == "no-cache"
+            again = client.get(url, headers={"If-None-Match": tag})
+            assert again.status_code == 304 and again.content == b""
+
+        tag = client.get("/stats").headers["etag"]
+        main.candidates_db.delete(next(iter(main.candidates_db.keys())))
+        changed = client.get("/stats", headers={"If-None-Match": tag})
+        assert changed.status_code == 200 and changed.headers["etag"] != tag
+
+
+def test_etag_comparison_is_weak_and_accepts_lists():
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert etag_matches('W/"x", W/"abc"', 'W/"abc"')
+    assert etag_matches("*", 'W/"abc"')
+    assert not etag_matches('W/"abd"', 'W/"abc"')
+    assert not etag_matches(None, 'W/"abc"')
+
+
+def test_large_responses_are_compressed_when_accepted(registry):
+    with TestClient(registry.app) as client:
+        body = {"top_n": 200, "min_score_threshold": 0.0}
+        compressed = client.post("/match_internships", json=body, headers={"Accept-Encoding": "gzip"})
+        assert compressed.headers["content-encoding"] == "gzip"
+        plain = client.post("/match_internships", json=body, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert compressed.json()["matches"] == plain.json()["matches"]
+
+        stream = client.get("/candidates/export", headers={"Accept-Encoding": "gzip"})
+        assert stream.headers["content-encoding"] == "gzip"
+        assert len(stream.text.splitlines()) == len(registry.candidates_db)
@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip("sklearn")
+
+
+def semantic_matches(main, **fields):
+    request = main.MatchRequest(retrieval="semantic", min_score_threshold=0.0, **fields)
+    return request, main.compute_matches(request)
+
+
+def assert_valid(main, oracle, request, entries):
+    assert 0 < len(entries) <= request.top_n
+    for entry in entries:
+        candidate = main.candidates_db[entry["candidate_id"]]
+        industry = main.industries_db[entry["industry_id"]]
+        assert industry["filled_positions"] < industry["internship_capacity"] or request.industry_id
+        assert entry["match_score"]["overall_score"] == oracle.score(candidate, industry)
+    scores = [entry["match_score"]["overall_score"] for entry in entries]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_semantic_retrieval_returns_registered_open_pairs_scored_exactly(registry, oracle):
+    main = registry
+    for candidate_id in list(main.candidates_db.keys())[:10]:
+        request, entries = semantic_matches(main, candidate_id=candidate_id, top_n=5)
+        assert_valid(main, oracle, request, entries)
+        assert {entry["candidate_id"] for entry in entries} == {candidate_id}
+    for industry_id in list(main.industries_db.keys())[:5]:
+        request, entries = semantic_matches(main, industry_id=industry_id, top_n=8)
+        assert_valid(main, oracle, request, entries)
+        assert {entry["industry_id"] for entry in entries} == {industry_id}
+
+
+def test_semantic_retrieval_follows_writes_after_training(registry, oracle):
+    main = registry
+    candidate_id = next(iter(main.candidates_db.keys()))
+    _, entries = semantic_matches(main, candidate_id=candidate_id, top_n=5)
+    assert main.semantic_index.trained
+
+    # The best internship goes away and a copy of it is registered under a new id
+    best = main.industries_db[entries[0]["industry_id"]]
+    main.industries_db.delete(best["id"])
+    main.industries_db.put({**best, "id": "i-copy"})
+    request, entries = semantic_matches(main, candidate_id=candidate_id, top_n=5)
+    assert_valid(main, oracle, request, entries)
+    assert best["id"] not in {entry["industry_id"] for entry in entries}
+    assert entries[0]["industry_id"] == "i-copy"
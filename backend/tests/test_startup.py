@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def held_warm_up(registry, monkeypatch):
+    """Background warm-up that waits for the returned event before it runs"""
+    release = threading.Event()
+    warm_up = registry.warm_up
+
+    def held(preload=False):
+        release.wait(10)
+        warm_up()
+
+    monkeypatch.setattr(registry, "BACKGROUND_WARMUP", True)
+    monkeypatch.setattr(registry, "warm_up", held)
+    yield release
+    release.set()
+
+
+def test_requests_wait_for_background_warm_up(registry, held_warm_up):
+    with TestClient(registry.app) as client:
+        assert client.get("/health").status_code == 200
+        assert client.get("/ready").status_code == 503
+        assert client.get("/").json()["status"] == "starting"
+
+        with ThreadPoolExecutor(1) as pool:
+            gated = pool.submit(client.get, "/stats")
+            time.sleep(0.2)
+            assert not gated.done()
+            held_warm_up.set()
+            assert gated.result(10).status_code == 200
+        assert client.get("/ready").status_code == 200
+        assert client.get("/").json()["candidates_count"] == len(registry.candidates_db)
+
+
+def test_failed_warm_up_answers_503(registry, monkeypatch):
+    def broken():
+        raise RuntimeError("store unreadable")
+
+    monkeypatch.setattr(registry, "rebuild_derived_indexes", broken)
+    with TestClient(registry.app) as client:
+        assert client.get("/health").status_code == 200
+        assert client.get("/ready").status_code == 503
+        assert client.get("/stats").status_code == 503
+
+
+def test_app_can_start_again_after_shutdown(registry):
+    for _ in range(2):
+        with TestClient(registry.app) as client:
+            response = client.post("/match_internships", json={"top_n": 3, "min_score_threshold": 0.0})
+            assert response.status_code == 200
+            assert len(response.json()["matches"]) == 3
+
+
+def test_import_leaves_scipy_and_seeding_for_later():
+    env = {**os.environ, "PM_STORAGE_BACKEND": "memory", "PM_SNAPSHOT_DIR": "", "PM_BACKGROUND_WARMUP": "0"}
+    env.pop("PM_SEED_DUMMY_DATA", None)
+    code = ("import sys, main; "
+            "print(any(name.split('.')[0] == 'scipy' for name in sys.modules), main.SEED_DUMMY_DATA)")
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    assert output.split() == ["False", "False"]
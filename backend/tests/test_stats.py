@@ -0,0 +1,40 @@
+import random
+import threading
+
+from fastapi.testclient import TestClient
+
+
+def recomputed(main):
+    return main.RegistryStats.recompute(main.candidates_db.values(), main.industries_db.values()).snapshot()
+
+
+def write_continuously(main, seed, stop):
+    rng = random.Random(seed)
+    candidate_ids = list(main.candidates_db.keys())
+    industry_ids = list(main.industries_db.keys())
+    while not stop.is_set():
+        candidate_id = rng.choice(candidate_ids)
+        if candidate_id in main.candidates_db:
+            main.candidates_db.update(candidate_id, {"category": rng.choice(["General", "OBC", "SC", "ST"])})
+        industry = main.industries_db[rng.choice(industry_ids)]
+        main.industries_db.update(industry["id"], {
+            "filled_positions": rng.randint(0, industry["internship_capacity"])})
+
+
+def test_stats_stay_exact_when_verified_during_writes(registry):
+    main = registry
+    stop = threading.Event()
+    writers = [threading.Thread(target=write_continuously, args=(main, seed, stop)) for seed in range(3)]
+    with TestClient(main.app) as client:
+        for writer in writers:
+            writer.start()
+        try:
+            for _ in range(30):
+                response = client.get("/stats", params={"verify": "true"})
+                assert response.status_code == 200
+                assert response.json()["verification"] == {"consistent": True}
+        finally:
+            stop.set()
+            for writer in writers:
+                writer.join()
+        assert client.get("/stats").json()["system_stats"] == recomputed(main)
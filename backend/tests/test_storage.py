@@ -0,0 +1,41 @@
+import storage
+from storage import SQLiteStore
+
+
+def _candidate(record_id, **changes):
+    return {"id": record_id, "name": "Asha", "skills": ["Python"], "current_location": "Delhi",
+            "category": "General", "district_type": "Urban", "status": "active", **changes}
+
+
+def test_sync_applies_other_connections_writes_through_listeners(tmp_path):
+    path = str(tmp_path / "registry.db")
+    worker, other = SQLiteStore(path, layout="dict"), SQLiteStore(path, layout="dict")
+    worker.candidates.put(_candidate("c1"))
+    changes = []
+    worker.candidates.subscribe(lambda old, new: changes.append((old and old["status"], new and new["status"])))
+
+    other.candidates.put(_candidate("c2"))
+    other.candidates.update("c1", {"status": "allocated"})
+    assert worker.changed_elsewhere()
+    assert worker.sync() is False
+    assert changes == [(None, "active"), ("active", "allocated")]
+    assert worker.candidates["c1"]["status"] == "allocated"
+
+    worker.candidates.put(_candidate("c3"))
+    changes.clear()
+    other.candidates.delete("c2")
+    worker.sync()
+    # This worker's own write isn't applied twice
+    assert changes == [("active", None)]
+    assert sorted(worker.candidates.keys()) == ["c1", "c3"]
+
+
+def test_sync_reloads_when_the_change_log_was_trimmed(tmp_path, monkeypatch):
+    path = str(tmp_path / "registry.db")
+    worker, other = SQLiteStore(path, layout="dict"), SQLiteStore(path, layout="dict")
+    len(worker.candidates)
+    monkeypatch.setattr(storage, "CHANGE_LOG_KEPT", 2)
+    for index in range(5):
+        other.candidates.put(_candidate(f"c{index}"))
+    assert worker.sync() is True
+    assert len(worker.candidates) == 5
@@ -0,0 +1,59 @@
+import heapq
+
+import pytest
+
+BODIES = [{"candidate_id": "c0001"}, {"industry_id": "i0003"}, {}, {"candidate_id": "c0001", "industry_id": "i0003"}]
+
+
+@pytest.mark.parametrize("body", BODIES)
+def test_entries_are_built_only_for_returned_matches(registry, oracle, monkeypatch, body):
+    main = registry
+    built = []
+    build_match_entry = main.build_match_entry
+
+    def counting(candidate, industry, details):
+        built.append((candidate["id"], industry["id"]))
+        return build_match_entry(candidate, industry, details)
+
+    monkeypatch.setattr(main, "build_match_entry", counting)
+    for top_n in (1, 7):
+        del built[:]
+        request = main.MatchRequest(top_n=top_n, min_score_threshold=0.0, **body)
+        entries = main.compute_matches(request)
+        assert [(entry["candidate_id"], entry["industry_id"], entry["match_score"]["overall_score"])
+                for entry in entries] == oracle.matches(request)
+        assert built == [(entry["candidate_id"], entry["industry_id"]) for entry in entries]
+
+
+def test_heap_never_holds_more_than_top_n(registry, monkeypatch):
+    main = registry
+    sizes = []
+    heappush = heapq.heappush
+
+    def recording(heap, entry):
+        heappush(heap, entry)
+        sizes.append(len(heap))
+
+    monkeypatch.setattr(main.heapq, "heappush", recording)
+    state = main.match_states.pin()
+    for industry_id in ("i0001", "i0002", "i0003"):
+        top, scored = state.index.match_industry(main.industries_db[industry_id], state.features, state.skills, 4, 0.0)
+        assert len(top) == 4 and scored > 4
+    assert sizes and max(sizes) == 4
+
+
+def test_ties_at_the_cutoff_keep_registration_order(registry, oracle):
+    main = registry
+    # Identical internships score the same for every candidate
+    template = {field: value for field, value in main.industries_db["i0005"].items() if field != "id"}
+    copies = [f"i-tie{number}" for number in range(12)]
+    for industry_id in copies:
+        main.industries_db.put({**template, "id": industry_id, "filled_positions": 0})
+    for candidate_id in ("c0001", "c0010", "c0100"):
+        everything = main.MatchRequest(candidate_id=candidate_id, top_n=1000, min_score_threshold=0.0)
+        ranked = [industry_id for _, industry_id, _ in oracle.matches(everything)]
+        # Cut the list off partway through the tied copies
+        request = everything.model_copy(update={"top_n": ranked.index(copies[0]) + 5})
+        matched = [entry["industry_id"] for entry in main.compute_matches(request)]
+        assert matched == ranked[:request.top_n]
+        assert [industry_id for industry_id in matched if industry_id in copies] == copies[:5]
@@ -0,0 +1,39 @@
+import random
+
+from fastapi.testclient import TestClient
+
+WEIGHTS = dict(skills=0.6, location=0.1, qualification=0.1, sector=0.1, base=0.1,
+               affirmative_bonus=0.5, experience_penalty=2.0)
+
+
+def test_weighted_ranking_matches_exhaustive_scoring_after_writes(registry, oracle):
+    main = registry
+    request = main.MatchRequest(top_n=15, min_score_threshold=0.0, weights=main.ScoreWeights(**WEIGHTS))
+    rng = random.Random(3)
+    candidate_ids = list(main.candidates_db.keys())
+
+    for _ in range(3):
+        entries = main.compute_matches(request)
+        assert [(entry["candidate_id"], entry["industry_id"], entry["match_score"]["overall_score"])
+                for entry in entries] == oracle.matches(request)
+        # Taking on another candidate's skills shifts the TF-IDF weights behind the kept matrices
+        for candidate_id in rng.sample(candidate_ids, 10):
+            main.candidates_db.update(candidate_id, {"skills": main.candidates_db[rng.choice(candidate_ids)]["skills"]})
+
+
+def test_industry_id_is_checked_and_gives_way_to_candidate_id(registry, oracle):
+    main = registry
+    candidate_id = next(iter(main.candidates_db.keys()))
+    industry_id = next(iter(main.industries_db.keys()))
+    with TestClient(main.app) as client:
+        for weights in (None, WEIGHTS):
+            response = client.post("/match_internships", json={
+                "candidate_id": candidate_id, "industry_id": "nope", "weights": weights})
+            assert response.status_code == 404
+
+            request = main.MatchRequest(candidate_id=candidate_id, industry_id=industry_id, top_n=5, min_score_threshold=0.0,
+                                        weights=main.ScoreWeights(**weights) if weights else None)
+            response = client.post("/match_internships", json=request.model_dump())
+            assert response.status_code == 200
+            assert [(entry["candidate_id"], entry["industry_id"], entry["match_score"]["overall_score"])
+                    for entry in response.json()["matches"]] == oracle.matches(request)
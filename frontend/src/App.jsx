@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback, useMemo } from "react";
+import React, { useState, useEffect, useCallback } from "react";
 
 // --- Helper Components & Icons ---
 
@@ -833,10 +833,28 @@ function MatchDashboard({ candidates }) {
     title: "",
   });
 
-  const selectedCandidate = useMemo(
-    () => candidates.find((c) => c.id === selectedCandidateId),
-    [candidates, selectedCandidateId]
-  );
+  const [selectedCandidate, setSelectedCandidate] = useState(null);
+
+  // The list only carries ids and names: load the full record once one is chosen
+  useEffect(() => {
+    setSelectedCandidate(null);
+    if (!selectedCandidateId) return;
+    let cancelled = false;
+    fetch(`${API_BASE_URL}/candidates/${selectedCandidateId}`)
+      .then((response) => {
+        if (!response.ok) throw new Error("Failed to fetch candidate details");
+        return response.json();
+      })
+      .then((data) => {
+        if (!cancelled) setSelectedCandidate(data.candidate);
+      })
+      .catch((err) => {
+        if (!cancelled) setError(err.message);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [selectedCandidateId]);
 
   const handleFindMatches = useCallback(async () => {
     if (!selectedCandidateId) return;
@@ -1137,10 +1155,20 @@ export default function App() {
   const fetchCandidates = useCallback(async () => {
     try {
       setError(null);
-      const response = await fetch(`${API_BASE_URL}/candidates`);
-      if (!response.ok) throw new Error("Failed to fetch candidates");
-      const data = await response.json();
-      setCandidates(data.candidates || []);
+      // The list is paginated: follow next_cursor until the last page. The
+      // dropdown only shows names, so only ids and names are fetched
+      const allCandidates = [];
+      let cursor = null;
+      do {
+        const params = new URLSearchParams({ limit: "1000", fields: "id,name" });
+        if (cursor) params.set("cursor", cursor);
+        const response = await fetch(`${API_BASE_URL}/candidates?${params}`);
+        if (!response.ok) throw new Error("Failed to fetch candidates");
+        const data = await response.json();
+        allCandidates.push(...(data.candidates || []));
+        cursor = data.next_cursor;
+      } while (cursor);
+      setCandidates(allCandidates);
     } catch (error) {
       console.error(error);
       if (error instanceof TypeError && error.message === "Failed to fetch") {